@@ -1,107 +1,181 @@
 # backend/app.py
 
-# Import necessary modules from Flask and Flask-SQLAlchemy, and Flask-CORS
-from flask import Flask, jsonify, request, send_from_directory
-from flask_sqlalchemy import SQLAlchemy
+# Import necessary modules from Flask and Flask-CORS
+from flask import Flask, jsonify, request, send_from_directory, abort
 from flask_cors import CORS
 import os
 from datetime import datetime # Import datetime for timestamp in Incident model
 
 # Import the configuration settings from config.py
-from config import SQLALCHEMY_DATABASE_URI, SQLALCHEMY_TRACK_MODIFICATIONS, SECRET_KEY
+from config import SQLALCHEMY_DATABASE_URI, SQLALCHEMY_TRACK_MODIFICATIONS, SECRET_KEY, UPLOADS_DIR, MAX_REQUEST_BYTES
 
-# Import the database models we just defined
-from database import db
+# Import the shared SQLAlchemy instance
+from database import db, build_engine_options
 
-from models import Department, Incident
 
-# Import the incidents Blueprint
-from routes.incidents import incidents_bp
-# Import the departments Blueprint
-from routes.departments import departments_bp
+def create_app():
+    """
+    Application factory.
+
+    Builds and configures a Flask app without touching the database, so it is
+    cheap to call in a gunicorn master before forking (preload_app) and in the
+    Flask CLI. Schema and seed data are set up separately by init_database().
+    """
+    # Initialize the Flask application
+    app = Flask(__name__)
+
+    # Load configuration from config.py
+    app.config['SQLALCHEMY_DATABASE_URI'] = SQLALCHEMY_DATABASE_URI
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = SQLALCHEMY_TRACK_MODIFICATIONS
+    # Engine tuning (connection pooling, SQLite WAL profile) for the configured database
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(SQLALCHEMY_DATABASE_URI)
+    app.config['SECRET_KEY'] = SECRET_KEY
+    # Werkzeug refuses to read more than this from a request body
+    app.config['MAX_CONTENT_LENGTH'] = MAX_REQUEST_BYTES
+
+    # Initialize the SQLAlchemy database instance
+    db.init_app(app) # Use db.init_app(app) instead of SQLAlchemy(app) when db is imported from models
+
+    # Initialize CORS to allow requests from your Netlify domain
+    # Replace 'your-netlify-app.netlify.app' with your actual Netlify domain
+    CORS(app, origins=['http://localhost:3000', 'http://127.0.0.1:5000', 'https://cityalert.netlify.app'])
+
+    # Turn away oversized bodies before anything reads them, then log the request
+    app.before_request(reject_oversized_request)
+    app.before_request(log_request_info)
+    app.register_error_handler(413, request_too_large)
+
+    register_blueprints(app)
+
+    # gzip/brotli for larger JSON and text responses
+    from utils.compression import register_compression
+    register_compression(app)
+
+    # Top-level (non-API) routes
+    app.add_url_rule('/', 'home', home)
+    app.add_url_rule('/uploads/<filename>', 'uploaded_file', uploaded_file)
+    app.add_url_rule('/test-email', 'test_email', test_email)
+
+    # Database maintenance commands (flask db upgrade, flask copy-sqlite, ...)
+    from cli import register_commands
+    register_commands(app)
+
+    return app
+
+
+def register_blueprints(app):
+    """
+    Registers the API Blueprints with the '/api' prefix.
+    The route modules are imported here rather than at module import time so
+    that importing app.py (e.g. from the gunicorn config) stays cheap.
+    """
+    from routes.incidents import incidents_bp
+    from routes.departments import departments_bp
+    from routes.chat import chat_bp
+    from routes.subscriptions import subscriptions_bp
+    from routes.config import config_bp
+    from routes.monitoring import monitoring_bp
+    from routes.images import images_bp
+
+    app.register_blueprint(incidents_bp, url_prefix='/api')
+    app.register_blueprint(departments_bp, url_prefix='/api')
+    app.register_blueprint(chat_bp, url_prefix='/api')
+    app.register_blueprint(subscriptions_bp, url_prefix='/api')
+    app.register_blueprint(config_bp, url_prefix='/api')
+    app.register_blueprint(monitoring_bp, url_prefix='/api')
+    app.register_blueprint(images_bp, url_prefix='/api')
+
+
+def init_database(app):
+    """
+    One-time database setup: applies pending migrations and seeds the default
+    departments. Run it once per deployment (the gunicorn master does this in
+    gunicorn.conf.py) rather than in every worker.
+
+    The engine's connections are disposed afterwards so that no open database
+    connection is inherited by forked worker processes.
+    """
+    from migrations import upgrade as upgrade_database
 
-# Chat backend
-from routes.chat import chat_bp
+    with app.app_context():
+        # Bring the schema up to date (creates the tables on a fresh database)
+        upgrade_database(db.engine)
+        # After creating tables, populate with default departments
+        create_default_departments()
+        db.engine.dispose()
 
-# Add this import
-from routes.config import config_bp
-from routes.subscriptions import subscriptions_bp
 
-# Initialize the Flask application
-app = Flask(__name__)
+# Header and JSON field values that are credentials and must never reach the logs
+REDACTED_HEADERS = ('Authorization', 'Cookie')
+REDACTED_FIELDS = ('login_key', 'department_key')
 
-# Load configuration from config.py
-app.config['SQLALCHEMY_DATABASE_URI'] = SQLALCHEMY_DATABASE_URI
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = SQLALCHEMY_TRACK_MODIFICATIONS
-app.config['SECRET_KEY'] = SECRET_KEY
 
-# Initialize the SQLAlchemy database instance
-db.init_app(app) # Use db.init_app(app) instead of SQLAlchemy(app) when db is imported from models
+# Reject requests whose declared body is over MAX_CONTENT_LENGTH up front, so the
+# 413 isn't swallowed by a route's catch-all exception handler
+def reject_oversized_request():
+    if request.content_length is not None and request.content_length > MAX_REQUEST_BYTES:
+        abort(413)
 
-# Initialize CORS to allow requests from your Netlify domain
-# Replace 'your-netlify-app.netlify.app' with your actual Netlify domain
-CORS(app, origins=['http://localhost:3000', 'http://127.0.0.1:5000', 'https://cityalert.netlify.app'])
 
+def request_too_large(error):
+    return jsonify({"error": f"Request body is larger than {MAX_REQUEST_BYTES // (1024 * 1024)} MB"}), 413
 
-# Add a before_request handler to log all incoming requests
-@app.before_request
+
+# Log all incoming requests
 def log_request_info():
+    headers = {name: '[redacted]' if name in REDACTED_HEADERS else value for name, value in request.headers.items()}
     print(f"\n=== INCOMING REQUEST ===")
     print(f"Method: {request.method}")
     print(f"URL: {request.url}")
-    print(f"Headers: {dict(request.headers)}")
+    print(f"Headers: {headers}")
     if request.is_json:
-        print(f"JSON Data: {request.get_json()}")
+        data = request.get_json()
+        if isinstance(data, dict):
+            data = {key: '[redacted]' if key in REDACTED_FIELDS else value for key, value in data.items()}
+        print(f"JSON Data: {data}")
     print("========================\n")
 
 
-# Register Blueprints with the '/api' prefix
-app.register_blueprint(incidents_bp, url_prefix='/api')
-app.register_blueprint(departments_bp, url_prefix='/api')
-app.register_blueprint(chat_bp, url_prefix='/api')
-app.register_blueprint(subscriptions_bp, url_prefix='/api')
-
-# Add this line with your other blueprint registrations
-app.register_blueprint(config_bp, url_prefix='/api')
-
 # Function to initialize default departments
 def create_default_departments():
     """
-    Checks if default departments exist in the database and creates them if not.
-    This ensures that the system has the necessary departments for incident classification.
+    Makes sure every department in the department registry exists.
+
+    This is a single set-based upsert (INSERT ... ON CONFLICT DO NOTHING) on
+    SQLite and PostgreSQL, so boot cost stays constant however many
+    departments are registered. Existing departments are left untouched.
     """
-    # List of default departments and their simple login keys
-    default_departments = [
-        {"name": "POLICE", "login_key": "policekey"},
-        {"name": "FIRE", "login_key": "firekey"},
-        {"name": "MEDICAL", "login_key": "medicalkey"},
-        {"name": "PUBLIC_WORKS", "login_key": "publicworkskey"},
-        {"name": "ENVIRONMENT", "login_key": "environmentkey"},
-        {"name": "ANIMAL_CONTROL", "login_key": "animalkey"},
-        {"name": "BUILDING_SAFETY", "login_key": "buildingsafetykey"},
-        {"name": "TRANSPORTATION", "login_key": "transportationkey"},
-        {"name": "PARKS_RECREATION", "login_key": "parkskey"},
-        {"name": "UTILITIES", "login_key": "utilitieskey"},
-        {"name": "GENERAL", "login_key": "generalkey"} # Add GENERAL department
-    ]
-
-    print("Checking for default departments...")
-    for dept_data in default_departments:
-        # Query the database to see if a department with this name already exists
-        department = Department.query.filter_by(name=dept_data["name"]).first()
-        if not department:
-            # If the department does not exist, create a new Department object
-            new_department = Department(name=dept_data["name"], login_key=dept_data["login_key"])
-            # Add the new department to the session
-            db.session.add(new_department)
-            print(f"Added department: {dept_data['name']}")
-    # Commit the changes to the database
+    from models import Department
+    from utils.department_registry import DEPARTMENTS
+
+    rows = [{"name": dept["name"], "login_key": dept["login_key"]} for dept in DEPARTMENTS]
+    dialect = db.engine.dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        # No conflict target: skip rows clashing on either unique column (name or login_key)
+        statement = insert(Department.__table__).values(rows).on_conflict_do_nothing()
+        added = db.session.execute(statement).rowcount
+    else:
+        # Other databases: one query for what exists, one bulk insert for the rest
+        existing = {name for (name,) in db.session.query(Department.name)}
+        missing = [row for row in rows if row["name"] not in existing]
+        if missing:
+            db.session.execute(Department.__table__.insert(), missing)
+        added = len(missing)
+
+    if added:
+        # Tell every worker's department cache to reload
+        from utils.department_cache import departments_changed
+        departments_changed()
     db.session.commit()
-    print("Default department check complete.")
+    print(f"Default departments ready ({added} added, {len(rows)} registered).")
 
 
 # Define a simple root route to check if the backend is running
-@app.route('/')
 def home():
     """
     A simple home route that returns a JSON message.
@@ -110,19 +184,16 @@ def home():
     return jsonify({"message": "CityAlert Backend is running!"})
 
 
-@app.route('/uploads/<filename>')
 def uploaded_file(filename):
     """Serve uploaded images"""
-    uploads_dir = os.path.join(os.path.dirname(__file__), 'uploads')
-    return send_from_directory(uploads_dir, filename)
+    return send_from_directory(UPLOADS_DIR, filename)
 
-@app.route('/test-email')
 def test_email():
     """Test email functionality"""
     try:
         from utils.email_service import send_incident_alert_email
         from models import UserSubscription
-        
+
         # Test with a sample incident
         test_incident = {
             'id': 999,
@@ -132,30 +203,28 @@ def test_email():
             'status': 'reported',
             'timestamp': datetime.now().isoformat()
         }
-        
+
         # Get first active subscription or create a test one
         test_subscription = UserSubscription.query.filter_by(is_active=True).first()
         if not test_subscription:
             return jsonify({"error": "No active subscriptions found. Please subscribe first."}), 400
-            
+
         success = send_incident_alert_email(test_subscription.email, test_incident)
-        
+
         if success:
             return jsonify({"message": f"Test email sent successfully to {test_subscription.email}"})
         else:
             return jsonify({"error": "Failed to send test email"}), 500
-            
+
     except Exception as e:
         return jsonify({"error": f"Test email failed: {str(e)}"}), 500
 
 # This block ensures that the Flask development server runs only when the script
 # is executed directly (e.g., `python app.py`), not when imported as a module.
+# In production, run gunicorn with gunicorn.conf.py instead.
 if __name__ == '__main__':
-    with app.app_context():
-        # Create the database tables if they don't already exist.
-        db.create_all()
-        # After creating tables, populate with default departments
-        create_default_departments()
+    app = create_app()
+    init_database(app)
     # Run the Flask application in debug mode with specific host and port
     print("Starting CityAlert Backend Server...")
     host = '0.0.0.0'
@@ -163,4 +232,3 @@ if __name__ == '__main__':
     print(f"Server will be available at: http://{host}:{port}")
     print(f"API endpoints available at: http://{host}:{port}/api/")
     app.run(debug=False, host=host, port=port)
-
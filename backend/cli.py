@@ -0,0 +1,164 @@
+# backend/cli.py
+
+"""
+Flask CLI commands for database maintenance.
+
+Run them from the backend/ directory, e.g.:
+
+    FLASK_APP=app flask db upgrade
+    FLASK_APP=app flask copy-sqlite --source site.db
+    FLASK_APP=app flask import-incidents reports.csv
+"""
+
+import os
+
+import click
+from sqlalchemy import create_engine, inspect, select, text
+
+from config import BASE_DIR
+from database import db, is_postgres_uri
+import migrations
+from utils.bulk_import import import_incidents, detect_format, FORMATS, DEFAULT_BATCH_SIZE
+
+
+def copy_database(source_engine, target_engine, batch_size=1000, replace=False):
+    """
+    Copies every model table from one database into another.
+
+    Tables are copied in dependency order inside a single transaction, so a
+    failed copy leaves the target untouched. Only columns that exist in both
+    databases are copied; new columns take their defaults. Returns a dict of
+    table name -> rows copied.
+
+    Args:
+        source_engine: Engine for the database to read from (usually SQLite).
+        target_engine: Engine for the database to write to (usually PostgreSQL).
+        batch_size (int): Rows per INSERT round trip.
+        replace (bool): Delete existing target rows first instead of refusing.
+    """
+    # Bring the target to the current schema through the migrations, so it also
+    # gets their indexes, search index and triggers and records what was applied
+    migrations.upgrade(target_engine)
+
+    source_tables = set(inspect(source_engine).get_table_names())
+    copied = {}
+
+    with source_engine.connect() as source, target_engine.begin() as target:
+        tables = [t for t in db.metadata.sorted_tables if t.name in source_tables]
+
+        for table in reversed(tables):
+            existing = target.execute(select(db.func.count()).select_from(table)).scalar()
+            if existing and not replace:
+                raise click.ClickException(
+                    f"Target table '{table.name}' already has {existing} rows. Use --replace to overwrite it."
+                )
+            if existing:
+                target.execute(table.delete())
+
+        for table in tables:
+            source_columns = {c['name'] for c in inspect(source_engine).get_columns(table.name)}
+            columns = [c for c in table.columns if c.name in source_columns]
+            result = source.execute(select(*columns).order_by(*table.primary_key.columns))
+
+            count = 0
+            while True:
+                rows = result.fetchmany(batch_size)
+                if not rows:
+                    break
+                target.execute(table.insert(), [dict(row._mapping) for row in rows])
+                count += len(rows)
+            copied[table.name] = count
+
+        # Rows were inserted with explicit IDs, so move each serial sequence past them
+        if is_postgres_uri(str(target_engine.url)):
+            for table in tables:
+                if 'id' in table.columns:
+                    target.execute(text(
+                        f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                        f"COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) FROM {table.name}"
+                    ))
+
+    return copied
+
+
+def register_commands(app):
+    """Attaches the maintenance commands to the Flask app's CLI."""
+
+    @app.cli.command('copy-sqlite')
+    @click.option('--source', default=os.path.join(BASE_DIR, 'site.db'), show_default=True,
+                  help="Path to the SQLite database file to copy from.")
+    @click.option('--batch-size', default=1000, show_default=True, help="Rows per INSERT.")
+    @click.option('--replace', is_flag=True, help="Overwrite tables that already contain rows.")
+    def copy_sqlite_command(source, batch_size, replace):
+        """Copy an existing SQLite database into the configured DATABASE_URL."""
+        if not os.path.exists(source):
+            raise click.ClickException(f"SQLite database not found: {source}")
+
+        source_engine = create_engine('sqlite:///' + os.path.abspath(source))
+        target_engine = db.engine
+        if str(target_engine.url) == str(source_engine.url):
+            raise click.ClickException("DATABASE_URL points at the source database; set it to the target first.")
+
+        click.echo(f"Copying {source} -> {target_engine.url.render_as_string(hide_password=True)}")
+        copied = copy_database(source_engine, target_engine, batch_size=batch_size, replace=replace)
+        for table_name, count in copied.items():
+            click.echo(f"  {table_name}: {count} rows")
+        click.echo("Copy complete.")
+
+    @app.cli.command('import-incidents')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(FORMATS), default=None,
+                  help="File format (default: from the file extension).")
+    @click.option('--batch-size', default=DEFAULT_BATCH_SIZE, show_default=True, help="Rows per transaction.")
+    @click.option('--no-geocode', is_flag=True, help="Don't geocode rows without latitude/longitude.")
+    @click.option('--notify', is_flag=True, help="Email subscribers about the imported incidents.")
+    def import_incidents_command(path, fmt, batch_size, no_geocode, notify):
+        """Bulk import incidents from an NDJSON or CSV file."""
+        fmt = fmt or detect_format(filename=path)
+        if fmt is None:
+            raise click.ClickException("Can't tell the format from the file name; pass --format.")
+
+        def progress(result):
+            click.echo(f"  {result.imported} imported, {result.failed} failed", err=True)
+
+        with open(path, 'rb') as stream:
+            result = import_incidents(stream, fmt, batch_size=batch_size, geocode=not no_geocode,
+                                      notify=notify, progress=progress)
+        for error in result.errors:
+            click.echo(f"  row {error['row']}: {error['error']}")
+        if result.failed > len(result.errors):
+            click.echo(f"  ... and {result.failed - len(result.errors)} more failed rows")
+        click.echo(f"Imported {result.imported} incidents ({result.geocoded} geocoded), {result.failed} failed.")
+
+    @app.cli.group('db')
+    def db_group():
+        """Schema migrations."""
+
+    @db_group.command('upgrade')
+    @click.option('--revision', type=int, default=None, help="Stop at this revision (default: latest).")
+    def db_upgrade_command(revision):
+        """Apply pending migrations."""
+        applied = migrations.upgrade(db.engine, target=revision, log=click.echo)
+        click.echo(f"Database at revision {migrations.current_revision(db.engine)}"
+                   f" ({len(applied)} migration(s) applied).")
+
+    @db_group.command('downgrade')
+    @click.option('--revision', type=int, required=True, help="Revision to downgrade to (0 = empty).")
+    def db_downgrade_command(revision):
+        """Revert migrations newer than --revision."""
+        reverted = migrations.downgrade(db.engine, target=revision, log=click.echo)
+        click.echo(f"Database at revision {migrations.current_revision(db.engine)}"
+                   f" ({len(reverted)} migration(s) reverted).")
+
+    @db_group.command('current')
+    def db_current_command():
+        """Show the current schema revision."""
+        click.echo(migrations.current_revision(db.engine))
+
+    @db_group.command('history')
+    def db_history_command():
+        """List all migrations and whether they are applied."""
+        done = migrations.applied_revisions(db.engine)
+        for migration in migrations.load_migrations():
+            marker = 'x' if migration.revision in done else ' '
+            click.echo(f"[{marker}] {migration.revision:04d}  {migration.description}")
@@ -1,8 +1,97 @@
 # backend/database.py
 
+import sqlite3
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from config import (
+    SQLITE_PROFILE, SQLITE_JOURNAL_MODE, SQLITE_SYNCHRONOUS, SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_CACHE_SIZE_KB, SQLITE_MMAP_SIZE, SQLITE_POOL_SIZE,
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING,
+    DB_CONNECT_TIMEOUT, DB_STATEMENT_TIMEOUT_MS
+)
 
 # Initialize the SQLAlchemy instance here without passing the app initially.
 # The app will be passed later using db.init_app(app).
 db = SQLAlchemy()
 
+
+def is_sqlite_uri(uri):
+    """Returns True if the SQLAlchemy database URI points at SQLite."""
+    return uri.startswith('sqlite:')
+
+
+def is_postgres_uri(uri):
+    """Returns True if the SQLAlchemy database URI points at PostgreSQL."""
+    return uri.startswith('postgresql')
+
+
+def build_engine_options(uri):
+    """
+    Returns the SQLALCHEMY_ENGINE_OPTIONS for the configured database.
+
+    For a SQLite file this keeps a pool of open connections (so the PRAGMAs
+    below are paid once per connection, not once per request), lets pooled
+    connections move between worker threads, and sets the driver-level lock
+    timeout to match the busy timeout.
+
+    For PostgreSQL the pool is sized from config, connections are checked
+    with a ping before use and recycled periodically, and every session gets
+    a server-side statement timeout.
+    """
+    options = {}
+    if is_sqlite_uri(uri):
+        options['connect_args'] = {
+            'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000.0,
+            'check_same_thread': False,
+        }
+        # In-memory databases need SQLAlchemy's default single-connection pool
+        if ':memory:' not in uri and uri not in ('sqlite://', 'sqlite:///'):
+            options['poolclass'] = QueuePool
+            options['pool_size'] = SQLITE_POOL_SIZE
+            options['max_overflow'] = SQLITE_POOL_SIZE
+    elif is_postgres_uri(uri):
+        options.update({
+            'pool_size': DB_POOL_SIZE,
+            'max_overflow': DB_MAX_OVERFLOW,
+            'pool_timeout': DB_POOL_TIMEOUT,
+            'pool_recycle': DB_POOL_RECYCLE,
+            'pool_pre_ping': DB_POOL_PRE_PING,
+            'connect_args': {
+                'connect_timeout': DB_CONNECT_TIMEOUT,
+                'application_name': 'cityalert-backend',
+                'options': f"-c statement_timeout={int(DB_STATEMENT_TIMEOUT_MS)}",
+            },
+        })
+    return options
+
+
+def sqlite_pragmas():
+    """The PRAGMA statements for the active SQLite profile, in execution order."""
+    if SQLITE_PROFILE != 'production':
+        return []
+    return [
+        f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT_MS)}",
+        # A negative cache_size is measured in KiB rather than pages
+        f"PRAGMA cache_size=-{int(SQLITE_CACHE_SIZE_KB)}",
+        f"PRAGMA mmap_size={int(SQLITE_MMAP_SIZE)}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+@event.listens_for(Engine, 'connect')
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Applies the SQLite profile to every new pooled connection."""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
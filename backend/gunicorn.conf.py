@@ -0,0 +1,54 @@
+# backend/gunicorn.conf.py
+
+# Gunicorn configuration for multi-worker deployments.
+# Start from the backend/ directory with:
+#   gunicorn -c gunicorn.conf.py
+# Every setting can be tuned through environment variables.
+
+import multiprocessing
+import os
+
+wsgi_app = 'wsgi:app'
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Requests spend most of their time waiting on Gemini, geocoding and SMTP,
+# so each process runs several threads to keep the CPU busy while they wait.
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# config.py keeps shared state (chat sessions, rate limits, idempotency keys)
+# in the database when it sees more than one worker
+os.environ['WEB_CONCURRENCY'] = str(workers)
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+
+# Load the app once in the master and fork workers from it: imports are paid
+# once and the code pages are shared copy-on-write between workers.
+preload_app = True
+
+# Gemini responses can take several seconds
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers periodically to cap slow memory growth
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = 100
+
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    """Runs once in the master: apply migrations and seed departments before any worker starts."""
+    from wsgi import app
+    from app import init_database
+
+    init_database(app)
+
+
+def post_fork(server, worker):
+    """Make sure each worker opens its own database connections."""
+    from wsgi import app
+    from database import db
+
+    with app.app_context():
+        db.engine.dispose()
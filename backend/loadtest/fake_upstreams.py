@@ -0,0 +1,324 @@
+# backend/loadtest/fake_upstreams.py
+
+"""
+Local stand-ins for the external services the backend talks to:
+
+- a fake Gemini API (the generateContent and streamGenerateContent endpoints),
+- a fake Google Geocoding API,
+- a fake SMTP server.
+
+Each fake has a configurable latency (with jitter) and error rate so the
+load-test harness can reproduce slow or flaky upstreams without touching
+the real services or spending API quota.
+"""
+
+import hashlib
+import json
+import random
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class UpstreamProfile:
+    """
+    Latency and failure behaviour for one fake upstream.
+
+    Attributes:
+        latency_ms (float): Mean response latency in milliseconds.
+        jitter_ms (float): Latency is drawn uniformly from latency_ms +/- jitter_ms.
+        error_rate (float): Probability (0.0 - 1.0) that a call fails.
+    """
+
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+
+    def sample_ms(self):
+        """Draws one latency in milliseconds."""
+        return max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms))
+
+    def delay(self):
+        """Sleeps for one sampled latency."""
+        latency = self.sample_ms()
+        if latency > 0:
+            time.sleep(latency / 1000.0)
+
+    def should_fail(self):
+        """Returns True if this call should be answered with an error."""
+        return random.random() < self.error_rate
+
+
+def _count(server, key):
+    with server.stats_lock:
+        server.stats[key] += 1
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Load tests open many short-lived connections at once
+    request_queue_size = 256
+
+
+class _FakeHTTPHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; without TCP_NODELAY a kept-alive
+    # client sees ~40ms of Nagle/delayed-ACK stall on every response.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        # Silence the default per-request stderr logging
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        try:
+            return json.loads(raw or b'{}')
+        except ValueError:
+            return {}
+
+
+# Words of the canned reply sent per streamed event
+STREAM_WORDS_PER_CHUNK = 4
+
+
+class FakeGeminiHandler(_FakeHTTPHandler):
+    """
+    Answers POST .../models/<model>:generateContent like the Gemini API, and
+    :streamGenerateContent?alt=sse as a server-sent event stream.
+    """
+
+    def do_POST(self):
+        profile = self.server.profile
+        payload = self._read_json()
+        if ':streamGenerateContent' in self.path:
+            self._stream_reply(profile, payload)
+            return
+        profile.delay()
+        _count(self.server, 'requests')
+
+        if profile.should_fail():
+            _count(self.server, 'errors')
+            self._send_json(503, {"error": {"code": 503, "message": "The model is overloaded.", "status": "UNAVAILABLE"}})
+            return
+
+        if ':generateContent' not in self.path:
+            self._send_json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+            return
+
+        self._send_json(200, {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": fake_gemini_reply(payload)}]},
+                "finishReason": "STOP"
+            }],
+            "usageMetadata": {"promptTokenCount": 0, "candidatesTokenCount": 0}
+        })
+
+
+    def _stream_reply(self, profile, payload):
+        """
+        Streams the canned reply a few words per event. The sampled latency is
+        spread evenly over the events, so the first one arrives after only a
+        fraction of the time the one-shot endpoint takes.
+        """
+        words = fake_gemini_reply(payload).split(' ')
+        pieces = [' '.join(words[i:i + STREAM_WORDS_PER_CHUNK]) + ' ' for i in range(0, len(words), STREAM_WORDS_PER_CHUNK)]
+        pieces[-1] = pieces[-1].rstrip()
+        step = profile.sample_ms() / 1000.0 / len(pieces)
+        _count(self.server, 'requests')
+
+        time.sleep(step)
+        if profile.should_fail():
+            _count(self.server, 'errors')
+            self._send_json(503, {"error": {"code": 503, "message": "The model is overloaded.", "status": "UNAVAILABLE"}})
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for index, piece in enumerate(pieces):
+            if index:
+                time.sleep(step)
+            chunk = {"candidates": [{"content": {"role": "model", "parts": [{"text": piece}]}}]}
+            if index == len(pieces) - 1:
+                chunk["candidates"][0]["finishReason"] = "STOP"
+            self._write_chunk(f"data: {json.dumps(chunk)}\r\n\r\n".encode('utf-8'))
+        self._write_chunk(b'')
+
+    def _write_chunk(self, data):
+        """Writes one HTTP/1.1 chunked-encoding frame (an empty one ends the body)."""
+        self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+
+def fake_gemini_reply(payload):
+    """
+    Picks a canned bot reply that walks the reporting flow forward:
+    ask for a location first, then produce the confirmation sentence that
+    chat.js parses before submitting an incident.
+    """
+    user_turns = [c for c in payload.get('contents', []) if c.get('role') == 'user']
+    texts = [p.get('text', '') for c in user_turns for p in c.get('parts', []) if 'text' in p]
+    if len(texts) < 2:
+        return "I'm sorry to hear that. Can you provide the location where this is happening?"
+    description = texts[-2][:80] or "reported hazard"
+    location = texts[-1][:80] or "an unknown location"
+    return (f"Okay, so I have that there is a {description} at {location}. "
+            f"This will be classified under PUBLIC_WORKS. Is this information correct and complete?")
+
+
+class FakeGeocodingHandler(_FakeHTTPHandler):
+    """Answers GET /maps/api/geocode/json like the Google Geocoding API."""
+
+    def do_GET(self):
+        profile = self.server.profile
+        profile.delay()
+        _count(self.server, 'requests')
+
+        if profile.should_fail():
+            _count(self.server, 'errors')
+            self._send_json(500, {"status": "UNKNOWN_ERROR", "results": []})
+            return
+
+        # Derive stable coordinates from the query so repeated addresses geocode identically
+        digest = hashlib.sha1(self.path.encode('utf-8')).digest()
+        latitude = 33.70 + digest[0] / 255.0 * 0.20
+        longitude = -84.50 + digest[1] / 255.0 * 0.20
+        self._send_json(200, {
+            "status": "OK",
+            "results": [{
+                "formatted_address": "123 Fake Street, Atlanta, GA, USA",
+                "geometry": {"location": {"lat": latitude, "lng": longitude}}
+            }]
+        })
+
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+    """
+    A minimal ESMTP dialogue: enough for smtplib's login() and sendmail().
+    Latency and failures are applied when a message body is accepted.
+    """
+
+    def _reply(self, line):
+        self.wfile.write((line + '\r\n').encode('utf-8'))
+
+    def handle(self):
+        profile = self.server.profile
+        self._reply('220 fake-smtp ESMTP ready')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+
+            if verb == 'EHLO':
+                self._reply('250-fake-smtp')
+                self._reply('250-AUTH PLAIN LOGIN')
+                self._reply('250 OK')
+            elif verb == 'HELO':
+                self._reply('250 fake-smtp')
+            elif verb == 'AUTH':
+                self._reply('235 Authentication successful')
+            elif verb in ('MAIL', 'RCPT', 'RSET', 'NOOP'):
+                self._reply('250 OK')
+            elif verb == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line in (b'.\r\n', b'.\n'):
+                        break
+                profile.delay()
+                _count(self.server, 'requests')
+                if profile.should_fail():
+                    _count(self.server, 'errors')
+                    self._reply('451 Temporary local problem - please try later')
+                else:
+                    self._reply('250 Message accepted')
+            elif verb == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('502 Command not implemented')
+
+
+class _QuietTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 256
+
+
+class FakeUpstreams:
+    """
+    Starts the three fake servers on free localhost ports.
+
+    Use env() to get the environment variables that point the backend at them.
+    """
+
+    def __init__(self, gemini=None, geocoding=None, smtp=None, host='127.0.0.1'):
+        self.host = host
+        self.profiles = {
+            'gemini': gemini or UpstreamProfile(),
+            'geocoding': geocoding or UpstreamProfile(),
+            'smtp': smtp or UpstreamProfile(),
+        }
+        self.servers = {}
+        self._threads = []
+
+    def start(self):
+        self.servers['gemini'] = _QuietHTTPServer((self.host, 0), FakeGeminiHandler)
+        self.servers['geocoding'] = _QuietHTTPServer((self.host, 0), FakeGeocodingHandler)
+        self.servers['smtp'] = _QuietTCPServer((self.host, 0), FakeSMTPHandler)
+
+        for name, server in self.servers.items():
+            server.profile = self.profiles[name]
+            server.stats = {'requests': 0, 'errors': 0}
+            server.stats_lock = threading.Lock()
+            thread = threading.Thread(target=server.serve_forever, name=f"fake-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
+
+    def port(self, name):
+        return self.servers[name].server_address[1]
+
+    def env(self):
+        """Environment variables that route the backend's upstream calls to the fakes."""
+        return {
+            'GEMINI_API_KEY': 'fake-gemini-key',
+            'GEMINI_API_BASE_URL': f"http://{self.host}:{self.port('gemini')}",
+            'GOOGLE_MAPS_API_KEY': 'fake-maps-key',
+            'GEOCODING_API_URL': f"http://{self.host}:{self.port('geocoding')}/maps/api/geocode/json",
+            'SMTP_SERVER': self.host,
+            'SMTP_PORT': str(self.port('smtp')),
+            'SMTP_USE_TLS': 'false',
+            'SMTP_USERNAME': 'loadtest@example.com',
+            'SMTP_PASSWORD': 'loadtest',
+            'SENDER_EMAIL': 'loadtest@example.com',
+        }
+
+    def stats(self):
+        return {name: dict(server.stats) for name, server in self.servers.items()}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,260 @@
+# backend/loadtest/run.py
+
+"""
+End-to-end load-test harness for the CityAlert backend.
+
+Boots local fake SMTP / Geocoding / Gemini servers, starts the Flask app
+against them with a throwaway database, replays a weighted mix of realistic
+traffic from N concurrent users and prints throughput, latency percentiles
+and error rates per endpoint.
+
+Run from the backend/ directory:
+
+    python -m loadtest.run --users 20 --duration 60
+    python -m loadtest.run --mix chat=1,alerts=5,dashboard=3,status=1 \\
+        --gemini-latency 800 --gemini-error-rate 0.05 --json-output results.json
+
+Use --app-command to benchmark a different server setup, or --target to
+drive an already running backend (its upstreams are then up to you).
+"""
+
+import argparse
+import json
+import os
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from loadtest.fake_upstreams import FakeUpstreams, UpstreamProfile
+from loadtest.scenarios import DEFAULT_MIX, SCENARIOS, IncidentPool, LoadClient
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+
+class StatsRecorder:
+    """Collects latency samples and outcomes per endpoint label."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def record(self, label, elapsed, status, error=None):
+        with self._lock:
+            entry = self._samples.setdefault(label, {'latencies': [], 'errors': 0, 'statuses': {}})
+            entry['latencies'].append(elapsed)
+            key = str(status) if status is not None else 'connection_error'
+            entry['statuses'][key] = entry['statuses'].get(key, 0) + 1
+            if error:
+                entry['errors'] += 1
+
+    def summary(self, elapsed_seconds):
+        with self._lock:
+            results = {}
+            for label, entry in sorted(self._samples.items()):
+                latencies = sorted(entry['latencies'])
+                count = len(latencies)
+                results[label] = {
+                    'requests': count,
+                    'throughput_rps': round(count / elapsed_seconds, 2) if elapsed_seconds else 0.0,
+                    'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+                    'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+                    'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+                    'error_rate': round(entry['errors'] / count, 4) if count else 0.0,
+                    'statuses': dict(entry['statuses']),
+                }
+            return results
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def parse_mix(text):
+    """Parses 'chat=1,alerts=5' into {'chat': 1.0, 'alerts': 5.0}."""
+    mix = {}
+    for item in text.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario '{name}'. Choose from: {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(base_url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(base_url + '/', timeout=1).ok:
+                return True
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def start_backend(args, upstream_env, workdir):
+    """Starts the Flask app as a subprocess wired to the fake upstreams."""
+    port = free_port()
+    env = dict(os.environ)
+    env.update(upstream_env)
+    env['PORT'] = str(port)
+    env['DATABASE_URL'] = args.database_url or 'sqlite:///' + os.path.join(workdir, 'loadtest.db')
+    env['BASE_URL'] = f"http://127.0.0.1:{port}"
+    if not args.rate_limits:
+        # Every simulated user comes from 127.0.0.1, so per-IP limits would only measure 429s
+        env['RATE_LIMIT_ENABLED'] = 'false'
+
+    command = shlex.split(args.app_command.replace('{port}', str(port)))
+    log_file = open(args.app_log or os.path.join(workdir, 'backend.log'), 'w')
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+    return process, f"http://127.0.0.1:{port}", log_file
+
+
+def seed_subscribers(base_url, count):
+    """Creates active email subscriptions so incident/status emails fan out."""
+    with requests.Session() as session:
+        for i in range(count):
+            session.post(f"{base_url}/api/subscriptions/subscribe",
+                         json={"email": f"subscriber{i}@example.com"}, timeout=30)
+
+
+def run_users(base_url, args, mix, recorder):
+    """Runs the simulated users until the duration elapses."""
+    incident_ids = IncidentPool()
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    stop_at = time.time() + args.duration
+
+    def user_loop(seed):
+        rng = random.Random(seed)
+        client = LoadClient(base_url, recorder, incident_ids, think_time=args.think_time, timeout=args.timeout)
+        while time.time() < stop_at:
+            scenario = SCENARIOS[rng.choices(names, weights)[0]]
+            scenario(client)
+            client.pause()
+
+    threads = [threading.Thread(target=user_loop, args=(i,), daemon=True) for i in range(args.users)]
+    started = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.time() - started
+
+
+def print_report(results, elapsed, upstream_stats):
+    header = f"{'endpoint':42} {'reqs':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>8}"
+    print()
+    print(f"=== LOAD TEST RESULTS ({elapsed:.1f}s) ===")
+    print(header)
+    print('-' * len(header))
+    for label, r in results.items():
+        print(f"{label:42} {r['requests']:>7} {r['throughput_rps']:>8} {r['p50_ms']:>9} "
+              f"{r['p95_ms']:>9} {r['p99_ms']:>9} {r['error_rate'] * 100:>7.2f}%")
+    if upstream_stats:
+        print()
+        print("Upstream calls seen by the fakes:")
+        for name, stats in upstream_stats.items():
+            print(f"  {name:10} {stats['requests']:>7} calls, {stats['errors']:>5} injected errors")
+    print()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Load-test the CityAlert backend against local fake upstreams.")
+    parser.add_argument('--users', type=int, default=10, help="Concurrent simulated users (default: 10)")
+    parser.add_argument('--duration', type=float, default=30, help="Test duration in seconds (default: 30)")
+    parser.add_argument('--think-time', type=float, default=0.5, help="Mean pause between user actions in seconds")
+    parser.add_argument('--timeout', type=float, default=30, help="Per-request client timeout in seconds")
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help="Scenario weights, e.g. chat=1,alerts=5,dashboard=3,status=1")
+    parser.add_argument('--subscribers', type=int, default=5, help="Email subscriptions to create before the run")
+    parser.add_argument('--target', help="Base URL of an already running backend (skips fakes and app startup)")
+    parser.add_argument('--app-command', default=f"{shlex.quote(sys.executable)} app.py",
+                        help="Command that starts the backend from backend/; '{port}' is substituted, "
+                             "and PORT is also set in its environment")
+    parser.add_argument('--app-log', help="File to write the backend's output to (default: temp dir)")
+    parser.add_argument('--database-url', help="Database for the backend (default: a fresh temp SQLite file)")
+    parser.add_argument('--rate-limits', action='store_true',
+                        help="Keep the backend's rate limits on (all simulated users share one IP)")
+    parser.add_argument('--json-output', help="Also write the results as JSON to this file")
+
+    for name, latency in (('gemini', 600), ('geocoding', 80), ('smtp', 150)):
+        parser.add_argument(f'--{name}-latency', type=float, default=latency, help=f"Fake {name} latency in ms")
+        parser.add_argument(f'--{name}-jitter', type=float, default=latency / 4, help=f"Fake {name} jitter in ms")
+        parser.add_argument(f'--{name}-error-rate', type=float, default=0.0, help=f"Fake {name} error rate (0-1)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    fakes = None
+    process = None
+    log_file = None
+    workdir = tempfile.mkdtemp(prefix='cityalert-loadtest-')
+    try:
+        if args.target:
+            base_url = args.target.rstrip('/')
+        else:
+            fakes = FakeUpstreams(
+                gemini=UpstreamProfile(args.gemini_latency, args.gemini_jitter, args.gemini_error_rate),
+                geocoding=UpstreamProfile(args.geocoding_latency, args.geocoding_jitter, args.geocoding_error_rate),
+                smtp=UpstreamProfile(args.smtp_latency, args.smtp_jitter, args.smtp_error_rate),
+            ).start()
+            process, base_url, log_file = start_backend(args, fakes.env(), workdir)
+            print(f"Starting backend at {base_url} (logs: {log_file.name})")
+
+        if not wait_until_up(base_url):
+            print("ERROR: backend did not come up in time")
+            return 1
+
+        if args.subscribers:
+            seed_subscribers(base_url, args.subscribers)
+
+        print(f"Running {args.users} users for {args.duration:.0f}s with mix {args.mix}...")
+        recorder = StatsRecorder()
+        elapsed = run_users(base_url, args, args.mix, recorder)
+
+        results = recorder.summary(elapsed)
+        upstream_stats = fakes.stats() if fakes else None
+        print_report(results, elapsed, upstream_stats)
+
+        if args.json_output:
+            with open(args.json_output, 'w') as f:
+                json.dump({'elapsed_seconds': elapsed, 'users': args.users, 'mix': args.mix,
+                           'endpoints': results, 'upstreams': upstream_stats}, f, indent=2)
+            print(f"Results written to {args.json_output}")
+        return 0
+    finally:
+        if process:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if log_file:
+            log_file.close()
+        if fakes:
+            fakes.stop()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
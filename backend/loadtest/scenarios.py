@@ -0,0 +1,197 @@
+# backend/loadtest/scenarios.py
+
+"""
+Traffic scenarios replayed by the load-test harness.
+
+Each scenario is a function taking a LoadClient and performing one "visit"
+the way the real frontend would: a chat conversation that ends in an
+incident POST (chat.js), alerts polling (alerts.js), department dashboard
+polling (department-dashboard.js) and status updates from a dashboard.
+"""
+
+import json
+import random
+import threading
+import time
+
+import requests
+
+DEPARTMENT_NAMES = [
+    "POLICE", "FIRE", "MEDICAL", "PUBLIC_WORKS", "ENVIRONMENT", "ANIMAL_CONTROL",
+    "BUILDING_SAFETY", "TRANSPORTATION", "PARKS_RECREATION", "UTILITIES", "GENERAL"
+]
+
+INCIDENT_DESCRIPTIONS = [
+    "large pothole in the right lane",
+    "street light flickering all night",
+    "smoke coming from a dumpster",
+    "stray dog wandering near the school",
+    "water main break flooding the street",
+    "car accident blocking the intersection",
+    "fallen tree across the sidewalk",
+    "broken swing at the playground",
+    "traffic signal stuck on red",
+    "illegal dumping of tires behind the store",
+]
+
+STREETS = ["Main St", "Oak Ave", "Peachtree St", "5th St", "Elm St", "Pine Rd", "Maple Dr", "Ponce de Leon Ave"]
+
+STATUSES = ["reported", "in_progress", "resolved"]
+
+
+class LoadClient:
+    """
+    One simulated user: a keep-alive HTTP session plus a handle on the shared
+    stats recorder and the pool of incident IDs created so far.
+    """
+
+    def __init__(self, base_url, recorder, incident_ids, think_time=0.0, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.incident_ids = incident_ids
+        self.think_time = think_time
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def pause(self):
+        if self.think_time:
+            time.sleep(random.uniform(0, 2 * self.think_time))
+
+    def call(self, method, path, label, expected=(200,), **kwargs):
+        """
+        Issues one request and records its latency under the given endpoint label.
+        Statuses outside `expected` count as errors. Returns the Response or None.
+        """
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+        except requests.exceptions.RequestException as e:
+            self.recorder.record(label, time.perf_counter() - started, None, error=type(e).__name__)
+            return None
+        elapsed = time.perf_counter() - started
+        ok = response.status_code in expected
+        self.recorder.record(label, elapsed, response.status_code,
+                             error=None if ok else f"HTTP {response.status_code}")
+        return response
+
+    def stream_chat(self, path, label, **kwargs):
+        """
+        POSTs to a server-sent-events chat endpoint and reads the stream the
+        way chat.js does. Records the time to the first text chunk under
+        "<label> (first chunk)" and the full reply time under label.
+        Returns the "done" event's data ({"response", "sessionId"}), or None on failure.
+        """
+        started = time.perf_counter()
+        first_chunk_at = None
+        reply = None
+        error = None
+        status = None
+        try:
+            with self.session.post(self.base_url + path, timeout=self.timeout, stream=True, **kwargs) as response:
+                status = response.status_code
+                if not response.ok:
+                    error = f"HTTP {status}"
+                else:
+                    event = None
+                    for line in response.iter_lines():
+                        if line.startswith(b'event:'):
+                            event = line[6:].strip().decode()
+                        elif line.startswith(b'data:'):
+                            if event == 'chunk' and first_chunk_at is None:
+                                first_chunk_at = time.perf_counter()
+                            elif event == 'done':
+                                reply = json.loads(line[5:])
+                            elif event == 'error':
+                                error = 'stream error'
+                    if reply is None and error is None:
+                        error = 'incomplete stream'
+        except requests.exceptions.RequestException as e:
+            error = type(e).__name__
+
+        if first_chunk_at is not None:
+            self.recorder.record(f"{label} (first chunk)", first_chunk_at - started, status)
+        self.recorder.record(label, time.perf_counter() - started, status, error=error)
+        return reply if error is None else None
+
+
+class IncidentPool:
+    """Thread-safe, bounded list of incident IDs seen during the run."""
+
+    def __init__(self, max_size=5000):
+        self._ids = []
+        self._lock = threading.Lock()
+        self._max_size = max_size
+
+    def add(self, incident_id):
+        with self._lock:
+            self._ids.append(incident_id)
+            if len(self._ids) > self._max_size:
+                del self._ids[:len(self._ids) - self._max_size]
+
+    def pick(self):
+        with self._lock:
+            return random.choice(self._ids) if self._ids else None
+
+
+def chat_and_report(client):
+    """
+    A reporter chats with the bot (description, then location), confirms,
+    and submits the incident, mirroring chat.js: the first turn opens a chat
+    session and later turns send only the new message.
+    """
+    description = random.choice(INCIDENT_DESCRIPTIONS)
+    location = f"{random.randint(1, 999)} {random.choice(STREETS)}, Atlanta, GA"
+    greeting = "Hello! I'm CityAlert, your AI assistant for reporting incidents."
+    new_messages = [{"role": "model", "parts": [{"text": greeting}]}]
+    session_id = None
+
+    for user_text in (f"There is a {description}", location):
+        new_messages.append({"role": "user", "parts": [{"text": user_text}]})
+        reply = client.stream_chat('/api/chat/gemini/stream', 'POST /api/chat/gemini/stream',
+                                   json={"sessionId": session_id, "messages": new_messages})
+        if reply is None:
+            return
+        session_id = reply['sessionId']
+        new_messages = []
+        client.pause()
+
+    # Similar incidents at the same spot legitimately come back as 409 duplicates
+    response = client.call('POST', '/api/incidents', 'POST /api/incidents', expected=(201, 409), json={
+        "description": description,
+        "location": location,
+        "department_classification": random.choice(DEPARTMENT_NAMES[:-1]),
+    })
+    if response is not None and response.status_code == 201:
+        client.incident_ids.add(response.json()['id'])
+
+
+def poll_alerts(client):
+    """The public alerts page refreshing its incident list."""
+    client.call('GET', '/api/incidents', 'GET /api/incidents')
+
+
+def poll_department_dashboard(client):
+    """A department dashboard refreshing its incident list."""
+    department = random.choice(DEPARTMENT_NAMES)
+    client.call('GET', f'/api/departments/{department}/incidents', 'GET /api/departments/<name>/incidents')
+
+
+def update_status(client):
+    """A department moves an incident to a new status."""
+    incident_id = client.incident_ids.pick()
+    if incident_id is None:
+        poll_department_dashboard(client)
+        return
+    client.call('PUT', f'/api/incidents/{incident_id}', 'PUT /api/incidents/<id>',
+                expected=(200, 404), json={"status": random.choice(STATUSES)})
+
+
+SCENARIOS = {
+    'chat': chat_and_report,
+    'alerts': poll_alerts,
+    'dashboard': poll_department_dashboard,
+    'status': update_status,
+}
+
+# Default traffic mix: mostly polling, with a steady trickle of new reports
+DEFAULT_MIX = {'chat': 1, 'alerts': 5, 'dashboard': 3, 'status': 1}
@@ -0,0 +1,204 @@
+# backend/migrations/__init__.py
+
+"""
+Versioned schema migrations.
+
+Each migration is a module in this package named vNNNN_<slug>.py defining:
+
+    revision (int)       -- must match NNNN
+    description (str)    -- one line shown by `flask db history`
+    upgrade(ctx)         -- apply the change
+    downgrade(ctx)       -- undo it
+
+Migrations receive a MigrationContext and should only use its helpers, which
+are idempotent (they check what already exists). That lets `upgrade` run
+safely against databases that were created by the old db.create_all() call,
+and lets an interrupted migration simply be run again.
+
+Index creation is "online": on PostgreSQL indexes are built with
+CREATE INDEX CONCURRENTLY after the migration's transaction commits, so
+reads and writes keep flowing while a large table is indexed.
+
+Applied revisions are recorded in the schema_migrations table.
+"""
+
+import importlib
+import pkgutil
+import re
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+MIGRATIONS_TABLE = 'schema_migrations'
+_MODULE_PATTERN = re.compile(r'^v(\d{4})_\w+$')
+
+
+class MigrationContext:
+    """Schema helpers handed to each migration's upgrade()/downgrade()."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.dialect = connection.dialect.name
+        # (description, sql) pairs that must run outside the migration transaction
+        self.online_operations = []
+
+    @property
+    def is_postgres(self):
+        return self.dialect == 'postgresql'
+
+    @property
+    def is_sqlite(self):
+        return self.dialect == 'sqlite'
+
+    def execute(self, sql, **params):
+        return self.connection.execute(text(sql), params)
+
+    def _inspector(self):
+        return inspect(self.connection)
+
+    def has_table(self, table_name):
+        return table_name in self._inspector().get_table_names()
+
+    def has_column(self, table_name, column_name):
+        return any(c['name'] == column_name for c in self._inspector().get_columns(table_name))
+
+    def has_index(self, table_name, index_name):
+        return any(i['name'] == index_name for i in self._inspector().get_indexes(table_name))
+
+    def create_table(self, table):
+        """Creates a SQLAlchemy Table (e.g. Model.__table__) if it does not exist."""
+        table.create(bind=self.connection, checkfirst=True)
+
+    def drop_table(self, table):
+        table.drop(bind=self.connection, checkfirst=True)
+
+    def add_column(self, table_name, column_name, ddl):
+        """Adds a column, e.g. add_column('incidents', 'updated_at', 'TIMESTAMP NULL')."""
+        if not self.has_column(table_name, column_name):
+            self.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {ddl}")
+
+    def drop_column(self, table_name, column_name):
+        # SQLite supports DROP COLUMN from 3.35 onwards
+        if self.has_column(table_name, column_name):
+            self.execute(f"ALTER TABLE {table_name} DROP COLUMN {column_name}")
+
+    def create_index(self, index_name, table_name, columns, unique=False, using=None):
+        """
+        Queues an index build. On PostgreSQL it runs CONCURRENTLY (no write lock)
+        once the migration's transaction has committed; elsewhere it runs with
+        IF NOT EXISTS right after the transaction. `using` picks a PostgreSQL
+        index method (e.g. 'gin').
+        """
+        unique_sql = 'UNIQUE ' if unique else ''
+        column_sql = ', '.join(columns)
+        if using and self.is_postgres:
+            column_sql = f"USING {using} ({column_sql})"
+        else:
+            column_sql = f"({column_sql})"
+        if self.is_postgres:
+            # A previously interrupted concurrent build leaves an INVALID index behind
+            self.online_operations.append((
+                f"drop invalid {index_name}",
+                f"DO $$ BEGIN IF EXISTS (SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                f"WHERE c.relname = '{index_name}' AND NOT i.indisvalid) THEN "
+                f"EXECUTE 'DROP INDEX CONCURRENTLY {index_name}'; END IF; END $$"
+            ))
+            sql = f"CREATE {unique_sql}INDEX CONCURRENTLY IF NOT EXISTS {index_name} ON {table_name} {column_sql}"
+        else:
+            sql = f"CREATE {unique_sql}INDEX IF NOT EXISTS {index_name} ON {table_name} {column_sql}"
+        self.online_operations.append((f"create index {index_name}", sql))
+
+    def drop_index(self, index_name):
+        if self.is_postgres:
+            self.online_operations.append((f"drop index {index_name}", f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}"))
+        else:
+            self.execute(f"DROP INDEX IF EXISTS {index_name}")
+
+
+def load_migrations():
+    """Returns all migration modules sorted by revision."""
+    migrations = []
+    for module_info in pkgutil.iter_modules(__path__):
+        match = _MODULE_PATTERN.match(module_info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{__name__}.{module_info.name}")
+        if module.revision != int(match.group(1)):
+            raise RuntimeError(f"Migration {module_info.name} declares revision {module.revision}")
+        migrations.append(module)
+    return sorted(migrations, key=lambda m: m.revision)
+
+
+def _ensure_version_table(engine):
+    with engine.begin() as connection:
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} ("
+            f"revision INTEGER PRIMARY KEY, description VARCHAR(255) NOT NULL, applied_at TIMESTAMP NOT NULL)"
+        ))
+
+
+def applied_revisions(engine):
+    """Returns the set of revisions recorded as applied."""
+    _ensure_version_table(engine)
+    with engine.connect() as connection:
+        return {row[0] for row in connection.execute(text(f"SELECT revision FROM {MIGRATIONS_TABLE}"))}
+
+
+def current_revision(engine):
+    revisions = applied_revisions(engine)
+    return max(revisions) if revisions else 0
+
+
+def _run_online_operations(engine, operations, log):
+    if not operations:
+        return
+    with engine.connect() as connection:
+        autocommit = connection.execution_options(isolation_level='AUTOCOMMIT')
+        for label, sql in operations:
+            log(f"    {label}")
+            autocommit.execute(text(sql))
+
+
+def upgrade(engine, target=None, log=print):
+    """
+    Applies pending migrations up to `target` (default: latest).
+    Returns the list of revisions applied.
+    """
+    done = applied_revisions(engine)
+    applied = []
+    for migration in load_migrations():
+        if migration.revision in done or (target is not None and migration.revision > target):
+            continue
+        log(f"Applying migration {migration.revision:04d}: {migration.description}")
+        with engine.begin() as connection:
+            ctx = MigrationContext(connection)
+            migration.upgrade(ctx)
+        _run_online_operations(engine, ctx.online_operations, log)
+        with engine.begin() as connection:
+            connection.execute(
+                text(f"INSERT INTO {MIGRATIONS_TABLE} (revision, description, applied_at) VALUES (:r, :d, :t)"),
+                {'r': migration.revision, 'd': migration.description, 't': datetime.utcnow()}
+            )
+        applied.append(migration.revision)
+    return applied
+
+
+def downgrade(engine, target, log=print):
+    """
+    Reverts applied migrations newer than `target`, newest first.
+    Returns the list of revisions reverted.
+    """
+    done = applied_revisions(engine)
+    reverted = []
+    for migration in reversed(load_migrations()):
+        if migration.revision not in done or migration.revision <= target:
+            continue
+        log(f"Reverting migration {migration.revision:04d}: {migration.description}")
+        with engine.begin() as connection:
+            ctx = MigrationContext(connection)
+            migration.downgrade(ctx)
+        _run_online_operations(engine, ctx.online_operations, log)
+        with engine.begin() as connection:
+            connection.execute(text(f"DELETE FROM {MIGRATIONS_TABLE} WHERE revision = :r"), {'r': migration.revision})
+        reverted.append(migration.revision)
+    return reverted
@@ -0,0 +1,21 @@
+# backend/migrations/v0001_initial_schema.py
+
+"""The original incidents, departments and user_subscriptions tables."""
+
+from models import Department, Incident, UserSubscription
+
+revision = 1
+description = "Initial schema (incidents, departments, user_subscriptions)"
+
+
+def upgrade(ctx):
+    # No-op for databases that were created by db.create_all()
+    ctx.create_table(Department.__table__)
+    ctx.create_table(Incident.__table__)
+    ctx.create_table(UserSubscription.__table__)
+
+
+def downgrade(ctx):
+    ctx.drop_table(UserSubscription.__table__)
+    ctx.drop_table(Incident.__table__)
+    ctx.drop_table(Department.__table__)
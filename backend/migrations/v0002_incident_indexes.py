@@ -0,0 +1,24 @@
+# backend/migrations/v0002_incident_indexes.py
+
+"""Indexes for the hot incident and subscription queries."""
+
+revision = 2
+description = "Indexes for incident listing, duplicate checks and active subscriptions"
+
+
+def upgrade(ctx):
+    # Alerts/dashboard lists are ordered by timestamp; duplicate checks filter on the last hour
+    ctx.create_index('ix_incidents_timestamp', 'incidents', ['timestamp'])
+    # Status filter on the list endpoints and the active-incident duplicate check
+    ctx.create_index('ix_incidents_status_timestamp', 'incidents', ['status', 'timestamp'])
+    # Exact-duplicate lookup in create_incident (same location within the hour)
+    ctx.create_index('ix_incidents_location_timestamp', 'incidents', ['location', 'timestamp'])
+    # Every incident and status change loads the active subscribers
+    ctx.create_index('ix_user_subscriptions_is_active', 'user_subscriptions', ['is_active'])
+
+
+def downgrade(ctx):
+    ctx.drop_index('ix_user_subscriptions_is_active')
+    ctx.drop_index('ix_incidents_location_timestamp')
+    ctx.drop_index('ix_incidents_status_timestamp')
+    ctx.drop_index('ix_incidents_timestamp')
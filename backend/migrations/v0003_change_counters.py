@@ -0,0 +1,16 @@
+# backend/migrations/v0003_change_counters.py
+
+"""Version counters used to keep per-worker caches coherent."""
+
+from models import ChangeCounter
+
+revision = 3
+description = "Add change_counters table for cache invalidation"
+
+
+def upgrade(ctx):
+    ctx.create_table(ChangeCounter.__table__)
+
+
+def downgrade(ctx):
+    ctx.drop_table(ChangeCounter.__table__)
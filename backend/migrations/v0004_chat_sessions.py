@@ -0,0 +1,16 @@
+# backend/migrations/v0004_chat_sessions.py
+
+"""Server-side chat sessions (used by the 'database' chat session backend)."""
+
+from models import ChatSession
+
+revision = 4
+description = "Add chat_sessions table"
+
+
+def upgrade(ctx):
+    ctx.create_table(ChatSession.__table__)
+
+
+def downgrade(ctx):
+    ctx.drop_table(ChatSession.__table__)
@@ -0,0 +1,16 @@
+# backend/migrations/v0005_rate_limit_buckets.py
+
+"""Shared token buckets (used by the 'database' rate limit backend)."""
+
+from models import RateLimitBucket
+
+revision = 5
+description = "Add rate_limit_buckets table"
+
+
+def upgrade(ctx):
+    ctx.create_table(RateLimitBucket.__table__)
+
+
+def downgrade(ctx):
+    ctx.drop_table(RateLimitBucket.__table__)
@@ -0,0 +1,16 @@
+# backend/migrations/v0006_idempotency_records.py
+
+"""Stored responses for Idempotency-Key requests (used by the 'database' idempotency backend)."""
+
+from models import IdempotencyRecord
+
+revision = 6
+description = "Add idempotency_records table"
+
+
+def upgrade(ctx):
+    ctx.create_table(IdempotencyRecord.__table__)
+
+
+def downgrade(ctx):
+    ctx.drop_table(IdempotencyRecord.__table__)
@@ -0,0 +1,67 @@
+# backend/migrations/v0007_incident_search.py
+
+"""
+Full-text index over incident descriptions and locations (GET /api/incidents/search).
+
+SQLite: an FTS5 table over the incidents table (external content, so the text
+is not stored twice), kept in sync by triggers on insert, update and delete.
+PostgreSQL: a GIN expression index on the weighted tsvector of description and
+location, built CONCURRENTLY like every other index, so the table is neither
+rewritten nor locked against writes. Either way every write path (routes,
+bulk import, clear-all, copy-sqlite) updates the index without application code.
+"""
+
+# Shared with the search queries: PostgreSQL only uses the index for this exact expression
+from utils.incident_search import SEARCH_VECTOR_SQL
+
+revision = 7
+description = "Full-text search index on incident description and location"
+
+SQLITE_TRIGGERS = {
+    'incidents_fts_insert': (
+        "AFTER INSERT ON incidents BEGIN "
+        "INSERT INTO incidents_fts(rowid, description, location) VALUES (new.id, new.description, new.location); "
+        "END"
+    ),
+    'incidents_fts_delete': (
+        "AFTER DELETE ON incidents BEGIN "
+        "INSERT INTO incidents_fts(incidents_fts, rowid, description, location) "
+        "VALUES ('delete', old.id, old.description, old.location); "
+        "END"
+    ),
+    'incidents_fts_update': (
+        "AFTER UPDATE OF description, location ON incidents BEGIN "
+        "INSERT INTO incidents_fts(incidents_fts, rowid, description, location) "
+        "VALUES ('delete', old.id, old.description, old.location); "
+        "INSERT INTO incidents_fts(rowid, description, location) VALUES (new.id, new.description, new.location); "
+        "END"
+    ),
+}
+
+
+def upgrade(ctx):
+    if ctx.is_postgres:
+        ctx.create_index('ix_incidents_search', 'incidents', [f"({SEARCH_VECTOR_SQL})"], using='gin')
+    elif ctx.is_sqlite:
+        if not ctx.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')").scalar():
+            print("WARNING: This SQLite build has no FTS5; incident search will be unavailable")
+            return
+        existed = ctx.has_table('incidents_fts')
+        ctx.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS incidents_fts USING fts5("
+            "description, location, content='incidents', content_rowid='id', tokenize='porter unicode61')"
+        )
+        for name, body in SQLITE_TRIGGERS.items():
+            ctx.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+        if not existed:
+            # Index the incidents that are already there
+            ctx.execute("INSERT INTO incidents_fts(incidents_fts) VALUES ('rebuild')")
+
+
+def downgrade(ctx):
+    if ctx.is_postgres:
+        ctx.drop_index('ix_incidents_search')
+    elif ctx.is_sqlite:
+        for name in SQLITE_TRIGGERS:
+            ctx.execute(f"DROP TRIGGER IF EXISTS {name}")
+        ctx.execute("DROP TABLE IF EXISTS incidents_fts")
@@ -5,6 +5,9 @@
 from database import db
 from datetime import datetime # Import datetime to store timestamps
 
+# Incident lifecycle, in order
+INCIDENT_STATUSES = ('reported', 'in_progress', 'resolved')
+
 # Define the Incident model
 # This class represents the 'incidents' table in our database.
 class Incident(db.Model):
@@ -26,6 +29,12 @@ class Incident(db.Model):
     """
     # Define the table name explicitly. By default, SQLAlchemy would use 'incident'.
     __tablename__ = 'incidents'
+    # Keep in sync with migrations/v0002_incident_indexes.py
+    __table_args__ = (
+        db.Index('ix_incidents_timestamp', 'timestamp'),
+        db.Index('ix_incidents_status_timestamp', 'status', 'timestamp'),
+        db.Index('ix_incidents_location_timestamp', 'location', 'timestamp'),
+    )
 
     # Define columns for the 'incidents' table
     id = db.Column(db.Integer, primary_key=True) # Integer primary key, auto-increments
@@ -38,6 +47,12 @@ class Incident(db.Model):
     status = db.Column(db.String(50), default='reported', nullable=False) # Status, default 'reported', cannot be empty
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False) # Timestamp, defaults to current UTC time
 
+    # Keys of to_dict(), in order; list queries select just these columns
+    FIELDS = ('id', 'description', 'location', 'latitude', 'longitude', 'image_url',
+              'department_classification', 'status', 'timestamp')
+    # Compact list/map representation (?view=summary): no description, location or image
+    SUMMARY_FIELDS = ('id', 'department_classification', 'status', 'latitude', 'longitude', 'timestamp')
+
     # A __repr__ method for better debugging output when printing Incident objects
     def __repr__(self):
         return f"Incident(id={self.id}, status='{self.status}', departments='{self.department_classification}')"
@@ -99,6 +114,9 @@ class UserSubscription(db.Model):
                                           If None, receives all incident alerts.
     """
     __tablename__ = 'user_subscriptions'
+    __table_args__ = (
+        db.Index('ix_user_subscriptions_is_active', 'is_active'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(255), unique=True, nullable=False)
@@ -106,6 +124,9 @@ class UserSubscription(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     department_filter = db.Column(db.String(500), nullable=True)  # Optional department filtering
 
+    # Keys of to_dict(), in order
+    FIELDS = ('id', 'email', 'is_active', 'created_at', 'department_filter')
+
     def __repr__(self):
         return f"UserSubscription(id={self.id}, email='{self.email}', active={self.is_active})"
 
@@ -118,3 +139,108 @@ class UserSubscription(db.Model):
             'department_filter': self.department_filter
         }
 
+
+# Define the ChangeCounter model
+# One row per logical table (e.g. "departments"), bumped on every write to it.
+# Workers compare versions to know when their in-memory caches are stale.
+class ChangeCounter(db.Model):
+    """
+    A monotonically increasing version number for a cached dataset.
+
+    Attributes:
+        name (str): Primary key, the dataset name (e.g. "departments").
+        version (int): Incremented on every change to the dataset.
+        updated_at (datetime): When the dataset last changed.
+    """
+    __tablename__ = 'change_counters'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"ChangeCounter(name='{self.name}', version={self.version})"
+
+
+# Define the ChatSession model
+# Used only when CHAT_SESSION_BACKEND is 'database' (see utils/chat_sessions.py),
+# so chat sessions survive restarts and are shared by all workers.
+class ChatSession(db.Model):
+    """
+    Server-held conversation with the chatbot.
+
+    Attributes:
+        id (str): Primary key, random session ID handed to the client.
+        history (str): JSON list of {'role', 'parts'} chat messages.
+        created_at (datetime): When the conversation started.
+        updated_at (datetime): Last turn; sessions idle longer than CHAT_SESSION_TTL expire.
+    """
+    __tablename__ = 'chat_sessions'
+    # Keep in sync with migrations/v0004_chat_sessions.py
+    __table_args__ = (
+        db.Index('ix_chat_sessions_updated_at', 'updated_at'),
+    )
+
+    id = db.Column(db.String(64), primary_key=True)
+    history = db.Column(db.Text, nullable=False, default='[]')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"ChatSession(id='{self.id}', updated_at='{self.updated_at}')"
+
+
+# Define the RateLimitBucket model
+# Used only when RATE_LIMIT_BACKEND is 'database' (see utils/rate_limit.py),
+# so all workers draw from the same token buckets.
+class RateLimitBucket(db.Model):
+    """
+    Token bucket of one client for one rate-limited endpoint group.
+
+    Attributes:
+        key (str): Primary key, "<limit name>:<client key>".
+        tokens (float): Tokens left as of updated_at.
+        updated_at (float): Unix time of the last refill.
+    """
+    __tablename__ = 'rate_limit_buckets'
+    # Keep in sync with migrations/v0005_rate_limit_buckets.py
+    __table_args__ = (
+        db.Index('ix_rate_limit_buckets_updated_at', 'updated_at'),
+    )
+
+    key = db.Column(db.String(160), primary_key=True)
+    tokens = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        return f"RateLimitBucket(key='{self.key}', tokens={self.tokens})"
+
+
+# Define the IdempotencyRecord model
+# Used only when IDEMPOTENCY_BACKEND is 'database' (see utils/idempotency.py),
+# so a retried request is recognized by whichever worker receives it.
+class IdempotencyRecord(db.Model):
+    """
+    Outcome of a request sent with an Idempotency-Key header.
+
+    Attributes:
+        key (str): Primary key, "<scope>:<Idempotency-Key header>".
+        fingerprint (str): SHA-256 of the request body the key was first used with.
+        status_code (int): Stored response status, or None while the request is still running.
+        response_body (str): Stored response body (JSON).
+        created_at (datetime): When the key was first seen; records expire after IDEMPOTENCY_TTL.
+    """
+    __tablename__ = 'idempotency_records'
+    # Keep in sync with migrations/v0006_idempotency_records.py
+    __table_args__ = (
+        db.Index('ix_idempotency_records_created_at', 'created_at'),
+    )
+
+    key = db.Column(db.String(200), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer, nullable=True)
+    response_body = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"IdempotencyRecord(key='{self.key}', status_code={self.status_code})"
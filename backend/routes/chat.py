@@ -1,10 +1,17 @@
 # backend/routes/chat.py
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 import requests # Used to make HTTP requests to the Gemini API
 import json # Used for parsing JSON responses from Gemini
-import os # Used to access environment variables for API key
-from config import GEMINI_API_KEY  # Import API key from config
+from config import GEMINI_API_KEY, GEMINI_API_BASE_URL  # Import API key from config
+from utils.department_registry import classification_guide, DEFAULT_DEPARTMENT
+from utils.http_client import gemini_client  # Pooled, retrying client for outbound calls
+from utils.chat_context import fit_history
+from utils.chat_sessions import chat_session_store, new_session_id
+from utils.image_store import inline_data
+from utils.pre_classifier import classify_text
+from utils.rate_limit import rate_limited
+from config import CHAT_RATE_LIMIT_PER_MINUTE, CHAT_RATE_LIMIT_BURST
 
 # Create a Blueprint for chat-related routes
 chat_bp = Blueprint('chat_bp', __name__)
@@ -12,23 +19,15 @@ chat_bp = Blueprint('chat_bp', __name__)
 # Define the custom instructions for the Gemini chatbot
 # IMPORTANT: These instructions guide Gemini on how to interact and, crucially,
 # how to format the final summary for incident reporting.
-GEMINI_CHATBOT_INSTRUCTIONS = """
+# The department guide is generated from utils/department_registry.py.
+GEMINI_CHATBOT_INSTRUCTIONS = f"""
 NOTE: These are the instructions to provide the Chatbot with. The goal is to fine tune a gemini powered LLM
 You are CityAlert, an AI assistant for a community safety platform. Your ONLY purpose is to help users report incidents (such as fire, accident, crime, hazard, or public safety issues), classify them by department, and guide users through the CityAlert reporting workflow.
 
 DEPARTMENT CLASSIFICATION GUIDE:
-- POLICE: Criminal activities, suspicious behavior, traffic violations, missing persons, theft, vandalism
-- FIRE: Fires, smoke, burning smells, fire hazards, fire safety concerns
-- MEDICAL: Medical emergencies, injuries, health hazards, public health concerns
-- PUBLIC_WORKS: Potholes, street lights, road hazards, drainage issues, fallen trees
-- ENVIRONMENT: Pollution, illegal dumping, hazardous materials, water quality issues
-- ANIMAL_CONTROL: Stray animals, animal cruelty, wildlife concerns, dangerous animals
-- BUILDING_SAFETY: Unsafe structures, building code violations, construction issues
-- TRANSPORTATION: Traffic signal issues, road signs, public transit problems, parking violations
-- PARKS_RECREATION: Park maintenance, playground equipment, public space issues
-- UTILITIES: Power outages, water leaks, gas leaks, utility emergencies
-
-For each incident, you must classify it into one or more of these departments. If multiple departments are needed, separate them with commas (e.g., "POLICE,MEDICAL"). If uncertain, default to "GENERAL".
+{classification_guide()}
+
+For each incident, you must classify it into one or more of these departments. If multiple departments are needed, separate them with commas (e.g., "POLICE,MEDICAL"). If uncertain, default to "{DEFAULT_DEPARTMENT}".
 
 STRICT RULES:
 - You MUST NOT answer any questions or requests unrelated to incident reporting, safety alerts, or CityAlert platform features.
@@ -92,18 +91,211 @@ Bot: "I'm here only to help you report incidents or access CityAlert safety reso
 Remember: Every valid incident report conversation MUST end with the exact confirmation format above. This is non-negotiable for the system to function properly.
 """
 
-# Get the Gemini API key from config
-# For Canvas runtime, this should remain an empty string. Canvas will inject the key.
-# 
-# Gemini API endpoint
-GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+# Gemini API endpoints: one-shot and streamed (server-sent events) generation
+GEMINI_MODEL_URL = f"{GEMINI_API_BASE_URL}/v1beta/models/gemini-2.0-flash"
+GEMINI_API_URL = f"{GEMINI_MODEL_URL}:generateContent"
+GEMINI_STREAM_URL = f"{GEMINI_MODEL_URL}:streamGenerateContent"
+
+
+def gemini_headers():
+    # The key goes in a header, not the URL, so it can't leak into logged errors
+    return {'Content-Type': 'application/json', 'x-goog-api-key': GEMINI_API_KEY}
+
+
+# Generation settings shared by every chat request
+GEMINI_GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "topP": 0.95,
+    "topK": 40,
+    "maxOutputTokens": 800,
+}
+
+
+def build_gemini_payload(user_chat_history):
+    """
+    Builds the generateContent request body for a chat history sent by chat.js.
+    The instructions go in the systemInstruction field, identical on every
+    call so Gemini can serve them as a cached prefix. Older turns beyond the
+    history token budget are replaced by a summary appended to the system
+    instruction (see utils/chat_context.py).
+    """
+    summary, recent_history = fit_history(user_chat_history)
+
+    system_parts = [{"text": GEMINI_CHATBOT_INSTRUCTIONS}]
+    if summary:
+        system_parts.append({"text": f"SUMMARY OF THE EARLIER CONVERSATION (older turns are not repeated below):\n{summary}"})
+        print(f"[DEBUG] Summarized {len(user_chat_history) - len(recent_history)} older messages, sending {len(recent_history)}")
+
+    payload_contents = []
+    # Append the recent chat history
+    for message in recent_history:
+        # Ensure each message part has a 'text' key, even if it's empty,
+        # or if it contains inlineData, ensure it's structured correctly.
+        # Images uploaded through /api/images arrive as {'imageId': ...} handles.
+        processed_parts = []
+        for part in message['parts']:
+            if 'text' in part:
+                processed_parts.append({'text': part['text']})
+            if 'imageId' in part:
+                image = inline_data(part['imageId'])
+                if image:
+                    processed_parts.append({'inlineData': image})
+                else:
+                    processed_parts.append({'text': '[The attached image is no longer available]'})
+            if 'inlineData' in part:
+                processed_parts.append({
+                    'inlineData': {
+                        'mimeType': part['inlineData']['mimeType'],
+                        'data': part['inlineData']['data']
+                    }
+                })
+        payload_contents.append({"role": message['role'], "parts": processed_parts})
+
+    return {
+        "systemInstruction": {"parts": system_parts},
+        "contents": payload_contents,
+        "generationConfig": GEMINI_GENERATION_CONFIG
+    }
+
+
+def gemini_error_response(gemini_response):
+    """Turns a non-OK Gemini API response into the proxy's JSON error reply."""
+    error_text = gemini_response.text
+    print(f"[DEBUG] Gemini API error response: {error_text}")
+
+    if gemini_response.status_code == 403:
+        return jsonify({
+            "error": "Gemini API access forbidden. Please check your API key and billing status.",
+            "debug": f"HTTP 403: {error_text}",
+            "suggestion": "Verify that the Gemini API is enabled and your API key has proper permissions."
+        }), 500
+    else:
+        return jsonify({
+            "error": f"Gemini API returned error: {gemini_response.status_code}",
+            "debug": error_text
+        }), 500
+
+
+def resolve_chat_history(data):
+    """
+    Works out the conversation a chat request continues. Accepts either
+
+    - a session turn: {"sessionId": "<id, omitted on the first turn>",
+      "messages": [<messages added since the last turn>]}, or
+    - the legacy stateless body: {"chatHistory": [<the whole conversation>]}.
+
+    Returns (session_id, history, None) on success, session_id being None for
+    stateless requests, or (None, None, error_response).
+    """
+    if not data or ('messages' not in data and 'chatHistory' not in data):
+        return None, None, (jsonify({"error": "Missing 'messages' or 'chatHistory' in request"}), 400)
+
+    if 'messages' not in data:
+        return None, data['chatHistory'], None
+
+    messages = data['messages']
+    valid = isinstance(messages, list) and messages and all(
+        isinstance(message, dict) and message.get('role') in ('user', 'model') and isinstance(message.get('parts'), list)
+        for message in messages
+    )
+    if not valid:
+        return None, None, (jsonify({"error": "'messages' must be a non-empty list of {role, parts} messages"}), 400)
+
+    session_id = data.get('sessionId')
+    if session_id:
+        history = chat_session_store.get(session_id)
+        if history is None:
+            # The client still has the conversation and can start a new session with it
+            return None, None, (jsonify({"error": "Chat session not found or expired", "sessionExpired": True}), 404)
+    else:
+        session_id = new_session_id()
+        history = []
+    return session_id, history + messages, None
+
+
+def remember_reply(session_id, history, bot_message):
+    """Stores the conversation including the bot's reply (session turns only)."""
+    if session_id:
+        chat_session_store.save(session_id, history + [{"role": "model", "parts": [{"text": bot_message}]}])
+
+
+def pre_classify(history):
+    """
+    Local department guess (utils/pre_classifier.py) from everything the
+    reporter has written so far. Returned with every reply as
+    "classification" and used by the fallback flow below.
+    """
+    return classify_text(' '.join(
+        part['text'] for message in history if message.get('role') == 'user'
+        for part in message.get('parts', []) if part.get('text')
+    ))
+
+
+def gemini_unavailable(status_code):
+    """Upstream failures worth falling back on (as opposed to bad requests or keys)."""
+    return status_code == 429 or status_code >= 500
+
+
+def fallback_reply(history, classification):
+    """
+    Scripted reply used while Gemini is unavailable, so reporters still get
+    to the confirmation sentence chat.js submits from. Asks for the location
+    first; once the previous bot turn asked for it, confirms the first
+    description and latest message as the location, classified locally.
+    """
+    user_texts = []
+    last_bot_text = ''
+    for message in history:
+        text = ' '.join(part['text'] for part in message.get('parts', []) if part.get('text')).strip()
+        if message.get('role') == 'user' and text:
+            user_texts.append(text)
+        elif message.get('role') == 'model' and message is not history[-1]:
+            last_bot_text = text
+
+    if not user_texts:
+        return "Our assistant is temporarily unavailable, but I can still take your report. Please briefly describe the incident."
+
+    asked_for_location = 'location' in last_bot_text.lower() or 'where' in last_bot_text.lower()
+    if len(user_texts) >= 2 and asked_for_location:
+        description = user_texts[0].rstrip('.!?')
+        for prefix in ('there is a ', "there's a ", 'there is an ', 'there is ', "there's "):
+            if description.lower().startswith(prefix):
+                description = description[len(prefix):]
+                break
+        location = user_texts[-1].rstrip('.!?')
+        return (f"Okay, so I have that there is a {description} at {location}. "
+                f"This will be classified under {classification['department']}. Is this information correct and complete?")
+
+    return ("Our assistant is temporarily unavailable, but I can still take your report. "
+            "Can you provide the location where this is happening?")
+
+
+# Response headers for server-sent event streams
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    # Stop reverse proxies (nginx, Render) from buffering the stream
+    'X-Accel-Buffering': 'no',
+}
+
+
+def fallback_turn(session_id, history, classification, stream=False):
+    """Answers a chat turn with fallback_reply(), as JSON or as a one-chunk event stream."""
+    bot_message = fallback_reply(history, classification)
+    remember_reply(session_id, history, bot_message)
+    body = {"response": bot_message, "sessionId": session_id, "classification": classification, "fallback": True}
+    if stream:
+        events = _sse_event('chunk', {"text": bot_message}) + _sse_event('done', body)
+        return Response(events, mimetype='text/event-stream', headers=SSE_HEADERS)
+    return jsonify(body), 200
+
 
 @chat_bp.route('/chat/gemini', methods=['POST'])
+@rate_limited('chat', CHAT_RATE_LIMIT_PER_MINUTE, CHAT_RATE_LIMIT_BURST)
 def chat_with_gemini():
     """
     Proxies chat requests to the Gemini API.
-    Receives chat history from the frontend, adds system instructions,
-    and returns Gemini's response.
+    Receives the new messages (or the full chat history) from the frontend,
+    adds system instructions, and returns Gemini's response.
     """
     try:
         # Check if API key is available
@@ -114,83 +306,36 @@ def chat_with_gemini():
             }), 500
             
         data = request.get_json()
-        if not data or 'chatHistory' not in data:
-            return jsonify({"error": "Missing 'chatHistory' in request"}), 400
-
-        user_chat_history = data['chatHistory']
+        session_id, user_chat_history, error_response = resolve_chat_history(data)
+        if error_response:
+            return error_response
+        classification = pre_classify(user_chat_history)
         
-        print(f"[DEBUG] GEMINI_API_KEY present: {bool(GEMINI_API_KEY)}")
-        print(f"[DEBUG] API Key length: {len(GEMINI_API_KEY) if GEMINI_API_KEY else 0}")
-        if GEMINI_API_KEY:
-            print(f"[DEBUG] API Key starts with: {GEMINI_API_KEY[:10]}...")
         print(f"[DEBUG] Chat history length: {len(user_chat_history)}")
 
         # Construct the payload for the Gemini API
-        # The system instructions are added as the first 'user' and 'model' turn
-        # to set the context and persona for the LLM.
-        # Then, the actual user chat history follows.
-        payload_contents = [
-            {"role": "user", "parts": [{"text": GEMINI_CHATBOT_INSTRUCTIONS}]},
-            {"role": "model", "parts": [{"text": "Understood. I am ready to assist with incident reporting."}]}
-        ]
-        
-        # Append the actual user chat history
-        for message in user_chat_history:
-            # Ensure each message part has a 'text' key, even if it's empty,
-            # or if it contains inlineData, ensure it's structured correctly.
-            processed_parts = []
-            for part in message['parts']:
-                if 'text' in part:
-                    processed_parts.append({'text': part['text']})
-                if 'inlineData' in part:
-                    processed_parts.append({
-                        'inlineData': {
-                            'mimeType': part['inlineData']['mimeType'],
-                            'data': part['inlineData']['data']
-                        }
-                    })
-            payload_contents.append({"role": message['role'], "parts": processed_parts})
-
-        payload = {
-            "contents": payload_contents,
-            "generationConfig": {
-                "temperature": 0.7,
-                "topP": 0.95,
-                "topK": 40,
-                "maxOutputTokens": 800,
-            }
-        }
-        
-        headers = {
-            'Content-Type': 'application/json'
-        }
+        payload = build_gemini_payload(user_chat_history)
 
         # Make the request to the Gemini API
         print(f"[DEBUG] Making request to Gemini API...")
-        gemini_response = requests.post(f"{GEMINI_API_URL}?key={GEMINI_API_KEY}", headers=headers, data=json.dumps(payload))
+        # Reuses a kept-alive connection; times out and retries per GEMINI_* settings
+        try:
+            gemini_response = gemini_client.post(GEMINI_API_URL, headers=gemini_headers(), data=json.dumps(payload))
+        except requests.exceptions.RequestException as e:
+            print(f"Error calling Gemini API, using the local fallback: {e}")
+            return fallback_turn(session_id, user_chat_history, classification)
         
         print(f"[DEBUG] Gemini API response status: {gemini_response.status_code}")
         
         if not gemini_response.ok:
-            error_text = gemini_response.text
-            print(f"[DEBUG] Gemini API error response: {error_text}")
-            
-            if gemini_response.status_code == 403:
-                return jsonify({
-                    "error": "Gemini API access forbidden. Please check your API key and billing status.",
-                    "debug": f"HTTP 403: {error_text}",
-                    "suggestion": "Verify that the Gemini API is enabled and your API key has proper permissions."
-                }), 500
-            else:
-                return jsonify({
-                    "error": f"Gemini API returned error: {gemini_response.status_code}",
-                    "debug": error_text
-                }), 500
-        
+            if gemini_unavailable(gemini_response.status_code):
+                print(f"Gemini API returned {gemini_response.status_code}, using the local fallback")
+                return fallback_turn(session_id, user_chat_history, classification)
+            return gemini_error_response(gemini_response)
+
         gemini_response.raise_for_status() # This should not raise now, but keeping for safety
 
         gemini_data = gemini_response.json()
-        print(f"Gemini Raw Response: {json.dumps(gemini_data, indent=2)}")
 
         # Extract the bot's message from the Gemini response
         if gemini_data and gemini_data.get('candidates'):
@@ -199,7 +344,8 @@ def chat_with_gemini():
                 first_part = first_candidate_content['parts'][0]
                 if 'text' in first_part:
                     bot_message = first_part['text']
-                    return jsonify({"response": bot_message}), 200
+                    remember_reply(session_id, user_chat_history, bot_message)
+                    return jsonify({"response": bot_message, "sessionId": session_id, "classification": classification}), 200
                 else:
                     return jsonify({"error": "Gemini response part missing 'text' key"}), 500
             else:
@@ -220,3 +366,108 @@ def chat_with_gemini():
         print(f"An unexpected error occurred: {e}")
         return jsonify({"error": str(e)}), 500
 
+
+def _sse_event(event, data):
+    """Formats one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def relay_gemini_stream(gemini_response, session_id=None, history=None, classification=None):
+    """
+    Re-emits a Gemini streamGenerateContent (alt=sse) response as our own
+    events, one per text fragment as soon as it arrives:
+
+        event: chunk   data: {"text": "..."}
+        event: done    data: {"response": "<full reply>", "sessionId": "...", "classification": {...}}
+        event: error   data: {"error": "..."}
+
+    The complete reply is stored in the chat session before "done" is sent.
+    """
+    reply_parts = []
+    try:
+        for line in gemini_response.iter_lines():
+            # Gemini sends one "data: {...}" line per partial GenerateContentResponse
+            if not line.startswith(b'data:'):
+                continue
+            gemini_chunk = json.loads(line[5:].decode('utf-8'))
+            if 'error' in gemini_chunk:
+                print(f"[DEBUG] Gemini stream error: {gemini_chunk['error']}")
+                yield _sse_event('error', {"error": "Gemini API reported an error mid-response"})
+                return
+            for candidate in gemini_chunk.get('candidates', [])[:1]:
+                for part in (candidate.get('content') or {}).get('parts', []):
+                    if part.get('text'):
+                        reply_parts.append(part['text'])
+                        yield _sse_event('chunk', {"text": part['text']})
+
+        if reply_parts:
+            bot_message = ''.join(reply_parts)
+            remember_reply(session_id, history, bot_message)
+            yield _sse_event('done', {"response": bot_message, "sessionId": session_id, "classification": classification})
+        else:
+            yield _sse_event('error', {"error": "No candidates found in Gemini response"})
+    except (requests.exceptions.RequestException, ValueError) as e:
+        # The connection dropped or a chunk wasn't valid JSON after streaming began
+        print(f"Error while streaming Gemini response: {e}")
+        yield _sse_event('error', {"error": "Gemini response was interrupted"})
+    finally:
+        gemini_response.close()
+
+
+@chat_bp.route('/chat/gemini/stream', methods=['POST'])
+@rate_limited('chat', CHAT_RATE_LIMIT_PER_MINUTE, CHAT_RATE_LIMIT_BURST)
+def chat_with_gemini_stream():
+    """
+    Streaming variant of /chat/gemini used by chat.js.
+    Same request body (see resolve_chat_history), but the reply is relayed as
+    text/event-stream while Gemini generates it, so the first words reach the
+    reporter after a few hundred milliseconds instead of after the whole
+    reply. Errors before the first byte are returned as JSON like /chat/gemini.
+    """
+    try:
+        if not GEMINI_API_KEY:
+            return jsonify({
+                "error": "Gemini API key not configured. Please set GEMINI_API_KEY environment variable.",
+                "debug": "GEMINI_API_KEY is empty or not set"
+            }), 500
+
+        data = request.get_json()
+        session_id, user_chat_history, error_response = resolve_chat_history(data)
+        if error_response:
+            return error_response
+        classification = pre_classify(user_chat_history)
+
+        payload = build_gemini_payload(user_chat_history)
+
+        # stream=True returns once the headers arrive; retries only cover
+        # failures before that point, never a partially relayed reply
+        try:
+            gemini_response = gemini_client.post(
+                f"{GEMINI_STREAM_URL}?alt=sse",
+                headers=gemini_headers(),
+                data=json.dumps(payload),
+                stream=True
+            )
+        except requests.exceptions.RequestException as e:
+            print(f"Error calling Gemini API, using the local fallback: {e}")
+            return fallback_turn(session_id, user_chat_history, classification, stream=True)
+
+        if not gemini_response.ok:
+            try:
+                if gemini_unavailable(gemini_response.status_code):
+                    print(f"Gemini API returned {gemini_response.status_code}, using the local fallback")
+                    return fallback_turn(session_id, user_chat_history, classification, stream=True)
+                return gemini_error_response(gemini_response)
+            finally:
+                gemini_response.close()
+
+        # stream_with_context keeps the app context (and DB session) alive for saving the reply
+        relay = relay_gemini_stream(gemini_response, session_id, user_chat_history, classification)
+        return Response(stream_with_context(relay), mimetype='text/event-stream', headers=SSE_HEADERS)
+
+    except requests.exceptions.RequestException as e:
+        print(f"Error calling Gemini API: {e}")
+        return jsonify({"error": f"Failed to connect to Gemini API: {e}"}), 500
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+        return jsonify({"error": str(e)}), 500
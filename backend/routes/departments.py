@@ -1,8 +1,14 @@
 # backend/routes/departments.py
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g
 from database import db # Import the db instance
 from models import Department, Incident # Import our Department and Incident models
+from utils.department_cache import department_cache # In-memory department lookups
+from utils.auth import department_auth, issue_department_token, sessions_enabled
+from utils.fast_json import json_response, records
+from utils.incident_fields import selected_fields, columns, FieldSelectionError
+from utils.http_caching import conditional_on, INCIDENTS
+from config import DEPARTMENT_SESSION_TTL
 
 # Create a Blueprint for department-related routes
 departments_bp = Blueprint('departments_bp', __name__)
@@ -13,8 +19,12 @@ def department_login():
     """
     Handles department login.
     Expects JSON data with 'login_key'.
-    Returns department details if login is successful.
+    Returns department details and a signed session token if login is successful.
+    The dashboard sends the token back as "Authorization: Bearer <token>".
     """
+    if not sessions_enabled():
+        return jsonify({"error": "Department login is unavailable: the server has no SECRET_KEY configured"}), 503
+
     try:
         data = request.get_json()
         if not data or 'login_key' not in data:
@@ -22,13 +32,17 @@ def department_login():
 
         login_key = data['login_key']
 
-        # Find the department by the provided login key
-        department = Department.query.filter_by(login_key=login_key).first()
+        # Find the department by the provided login key (served from the department cache)
+        department = department_cache.get_by_login_key(login_key)
 
         if department:
             # If department found, return its details (excluding the login_key for security)
-            # In a real app, you'd generate a JWT token here for session management
-            return jsonify(department.to_dict()), 200
+            # plus a stateless session token for subsequent dashboard requests
+            return jsonify({
+                **department,
+                "token": issue_department_token(department),
+                "expires_in": DEPARTMENT_SESSION_TTL
+            }), 200
         else:
             return jsonify({"message": "Invalid login key"}), 401 # 401 Unauthorized
 
@@ -37,22 +51,37 @@ def department_login():
 
 # Route to get incidents specific to a department
 @departments_bp.route('/departments/<string:department_name>/incidents', methods=['GET'])
+@department_auth(required=False)
+@conditional_on(INCIDENTS)
 def get_department_incidents(department_name):
     """
     Retrieves incidents classified for a specific department.
     The department_name should match one of the names in the DEPARTMENT_CLASSIFICATION_GUIDE.
     Can also filter by 'status' query parameter.
+    'fields' (comma-separated) or 'view=summary' trims each incident to fewer fields.
+    Sends ETag/Last-Modified; an unchanged poll gets 304 without running the query.
+    A department session token, if sent, must belong to the requested department.
     """
     try:
         # Normalize department name to uppercase for consistency with classification
         department_name_upper = department_name.upper()
 
+        if g.department and g.department['name'] != department_name_upper:
+            return jsonify({"error": "Session token belongs to a different department"}), 403
+
         # Get optional status filter from query parameters
         status_filter = request.args.get('status')
+        try:
+            fields = selected_fields(request.args)
+        except FieldSelectionError as e:
+            return jsonify({"error": str(e)}), 400
 
         # Query incidents where department_classification contains the department_name
         # This handles cases where an incident is classified for multiple departments (e.g., "POLICE,MEDICAL")
-        query = Incident.query.filter(Incident.department_classification.like(f"%{department_name_upper}%"))
+        # Only the requested columns are selected, as plain rows (no ORM objects)
+        query = db.session.query(*columns(fields)).filter(
+            Incident.department_classification.like(f"%{department_name_upper}%")
+        )
 
         if status_filter:
             query = query.filter_by(status=status_filter)
@@ -60,12 +89,7 @@ def get_department_incidents(department_name):
         # Order by timestamp descending (newest first)
         query = query.order_by(Incident.timestamp.desc())
 
-        incidents = query.all()
-
-        # Convert list of Incident objects to list of dictionaries
-        incidents_data = [incident.to_dict() for incident in incidents]
-
-        return jsonify(incidents_data), 200
+        return json_response(records(fields, query.all()))
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -77,8 +101,7 @@ def get_all_departments():
     Retrieves a list of all registered departments.
     """
     try:
-        departments = Department.query.all()
-        departments_data = [dept.to_dict() for dept in departments]
+        departments_data = department_cache.all()
         return jsonify(departments_data), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
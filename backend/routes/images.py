@@ -0,0 +1,41 @@
+# backend/routes/images.py
+
+from flask import Blueprint, request, jsonify
+from utils.image_store import store_image, store_data_uri
+from utils.rate_limit import rate_limited
+from config import IMAGE_MAX_BYTES, CHAT_RATE_LIMIT_PER_MINUTE, CHAT_RATE_LIMIT_BURST
+
+# Create a Blueprint for image uploads
+images_bp = Blueprint('images_bp', __name__)
+
+
+@images_bp.route('/images', methods=['POST'])
+# Uploads happen during the chat, so they draw from the chat allowance
+@rate_limited('chat', CHAT_RATE_LIMIT_PER_MINUTE, CHAT_RATE_LIMIT_BURST)
+def upload_image():
+    """
+    Stores an image once and returns its handle:
+        {"imageId": "img_<hash>.png", "url": "/uploads/img_<hash>.png", "mimeType": "image/png", "size": 12345}
+
+    Send the file as multipart/form-data in the 'image' field (raw bytes, no
+    base64), or as JSON {"data": "data:image/png;base64,..."}. Chat messages
+    then reference it as {"imageId": ...} and incidents as "image_id".
+    """
+    try:
+        upload = request.files.get('image')
+        if upload is not None:
+            # Read one byte past the limit so oversized files are detected without loading more
+            handle, error = store_image(upload.read(IMAGE_MAX_BYTES + 1))
+        else:
+            data = request.get_json(silent=True) or {}
+            if not isinstance(data.get('data'), str) or not data['data'].startswith('data:image/'):
+                return jsonify({"error": "Send an 'image' file field or JSON {'data': 'data:image/...;base64,...'}"}), 400
+            handle, error = store_data_uri(data['data'])
+
+        if error:
+            return jsonify({"error": error}), 400
+        return jsonify(handle), 201
+
+    except Exception as e:
+        print(f"ERROR storing uploaded image: {str(e)}")
+        return jsonify({"error": "Failed to store image"}), 500
@@ -1,27 +1,53 @@
 # backend/routes/incidents.py
 
 import datetime
-import base64
-import os
-from flask import Blueprint, request, jsonify, send_from_directory
+import logging
+from flask import Blueprint, Response, request, jsonify, send_from_directory, g, stream_with_context
+from werkzeug.exceptions import RequestEntityTooLarge
 from database import db # Import the db instance from our database.py
-from models import Incident, Department, UserSubscription
+from models import Incident, Department, UserSubscription, INCIDENT_STATUSES
 from utils.geocoding import geocode_address # Import our new geocoding function
-from utils.email_service import send_incident_alert_email, send_status_update_email
-from uuid import uuid4
+from utils.email_service import send_incident_alert_email, send_status_update_email, email_delivery_available
+from utils.department_registry import parse_classification, unknown_departments, DEPARTMENT_NAMES
+from utils.auth import department_auth, department_can_access
+from utils.image_store import get_image, store_data_uri
+from utils.pre_classifier import classify_text
+from utils.rate_limit import rate_limited
+from utils.idempotency import idempotent
+from utils.bulk_import import import_incidents, detect_format, FORMATS, DEFAULT_BATCH_SIZE
+from utils import incident_export
+from utils.fast_json import json_response, records
+from utils.incident_fields import selected_fields, columns, FieldSelectionError
+from utils.http_caching import conditional_on, incidents_changed, INCIDENTS
+from utils import incident_search
+from utils.near_duplicates import find_near_duplicate, near_duplicate_index
+from utils.notifications import send_status_update_digests
+from config import (
+    UPLOADS_DIR, INCIDENT_RATE_LIMIT_PER_MINUTE, INCIDENT_RATE_LIMIT_BURST, NEAR_DUPLICATE_ENABLED,
+    BULK_STATUS_RATE_LIMIT_PER_MINUTE, BULK_STATUS_RATE_LIMIT_BURST,
+)
 
 # Create a Blueprint for incident-related routes.
 # A Blueprint helps organize a group of related views and other functions.
 incidents_bp = Blueprint('incidents_bp', __name__)
 
+logger = logging.getLogger(__name__)
+
 # Route to create a new incident
 @incidents_bp.route('/incidents', methods=['POST'])
+# Checked before the rate limit, so replaying a stored response costs no token
+@idempotent('incidents')
+@rate_limited('incidents', INCIDENT_RATE_LIMIT_PER_MINUTE, INCIDENT_RATE_LIMIT_BURST)
 def create_incident():
     """
     Handles the creation of a new incident report.
-    Expects JSON data with 'description', 'location', 'department_classification',
-    and optionally 'image_url' (can be base64 data or URL).
+    Expects JSON data with 'description' and 'location', and optionally
+    'department_classification' (when omitted, taken from the local
+    pre-classifier if the description is clear-cut, else a 400), 'image_id' (a handle from POST /api/images) or 'image_url'
+    (base64 data URI or URL).
     Now also geocodes the location and handles image storage.
+    Honours an Idempotency-Key header: a retried submission with the same key
+    returns the original response instead of creating the incident again.
     """
     print("=== INCIDENT CREATION REQUEST RECEIVED ===")
     print(f"Request method: {request.method}")
@@ -34,9 +60,35 @@ def create_incident():
         if not data:
             print("ERROR: No JSON data received")
             return jsonify({"error": "Request must contain JSON data"}), 400
-        if not all(key in data for key in ['description', 'location', 'department_classification']):
+        if not all(key in data for key in ['description', 'location']):
             print("ERROR: Missing required fields")
-            return jsonify({"error": "Missing required incident fields (description, location, department_classification)"}), 400
+            return jsonify({"error": "Missing required incident fields (description, location)"}), 400
+
+        # Clear-cut reports can skip the chatbot's classification; anything
+        # ambiguous still needs one from the client
+        if not str(data.get('department_classification') or '').strip():
+            classification = classify_text(data['description'])
+            if not classification['clear']:
+                return jsonify({
+                    "error": "Missing department_classification (the description could not be classified automatically)"
+                }), 400
+            data['department_classification'] = classification['department']
+            logger.info("Classified incident locally as %s (confidence %.2f, matched %s)",
+                        classification['department'], classification['confidence'],
+                        ', '.join(classification['matches']))
+
+        # Normalize the department classification and reject unknown departments
+        department_classification, classification_error = validate_classification(data['department_classification'])
+        if classification_error:
+            return classification_error
+        data['department_classification'] = department_classification
+
+        # An image uploaded during the chat is referenced by its handle, not re-sent
+        image_handle = None
+        if data.get('image_id'):
+            image_handle = get_image(data['image_id'])
+            if image_handle is None:
+                return jsonify({"error": "Unknown image_id; upload the image to /api/images first"}), 400
 
         # Check for duplicate incidents (within last hour with same details)
         # Enhanced duplicate detection with more detailed response
@@ -83,34 +135,55 @@ def create_incident():
         department_classification = data['department_classification']
         image_data = data.get('image_url')
 
+        # NEW: Geocode the location to get latitude and longitude
+        # (before storing anything, so the near-duplicate check can use the coordinates)
+        print("Attempting to geocode the location...")
+        latitude, longitude = geocode_address(location)
+        
+        if latitude is not None and longitude is not None:
+            print(f"✓ Successfully geocoded location to ({latitude}, {longitude})")
+        else:
+            print("⚠ Geocoding failed, but continuing with incident creation")
+
+        # Differently worded reports of the same incident nearby (see utils/near_duplicates.py)
+        near_duplicate = None
+        if NEAR_DUPLICATE_ENABLED:
+            try:
+                near_duplicate = find_near_duplicate(description, location, latitude, longitude,
+                                                     department_classification)
+            except Exception as e:
+                print(f"⚠ Near-duplicate check failed, continuing: {e}")
+                db.session.rollback()
+            if near_duplicate and near_duplicate.blocking:
+                existing, distance = near_duplicate.incident, near_duplicate.distance_m
+                if distance is None:
+                    message = f"A {existing.department_classification.lower()} incident with a very similar description was reported at this location {format_time_ago(existing.timestamp)}."
+                else:
+                    message = f"A similar {existing.department_classification.lower()} incident was reported about {distance:.0f} m away {format_time_ago(existing.timestamp)}."
+                return jsonify({
+                    "warning": "Possible duplicate of a recent incident",
+                    "existing_incident": existing.to_dict(),
+                    "similarity": round(near_duplicate.similarity, 2),
+                    "distance_m": None if distance is None else round(distance),
+                    "message": f"{message} Please check the Alerts page to see if this is the same incident.",
+                    "alerts_page_url": "/alerts.html"
+                }), 409
+
         print(f"Creating incident: {description[:50]}... at {location}")
 
         # Handle image storage
         stored_image_path = None
-        if image_data:
+        if image_handle:
+            stored_image_path = image_handle['url']
+        elif image_data:
             if image_data.startswith('data:image/'):
-                # This is base64 image data
+                # Base64 image data from older clients goes through the same store as /api/images
                 try:
-                    # Create uploads directory if it doesn't exist
-                    uploads_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads')
-                    os.makedirs(uploads_dir, exist_ok=True)
-                    
-                    # Extract base64 data and decode
-                    header, encoded = image_data.split(',', 1)
-                    image_bytes = base64.b64decode(encoded)
-                    
-                    # Generate unique filename
-                    file_extension = 'png' if 'png' in header else 'jpg'
-                    filename = f"incident_{uuid4()}.{file_extension}"
-                    file_path = os.path.join(uploads_dir, filename)
-                    
-                    # Save image file
-                    with open(file_path, 'wb') as f:
-                        f.write(image_bytes)
-                    
-                    stored_image_path = f"/uploads/{filename}"
-                    print(f"✓ Image saved as: {stored_image_path}")
-                    
+                    handle, error = store_data_uri(image_data)
+                    if handle:
+                        stored_image_path = handle['url']
+                    else:
+                        print(f"⚠ Image not saved: {error}")
                 except Exception as e:
                     print(f"⚠ Error saving image: {e}")
                     # Continue without image if saving fails
@@ -118,15 +191,6 @@ def create_incident():
                 # This is already a URL
                 stored_image_path = image_data
 
-        # NEW: Geocode the location to get latitude and longitude
-        print("Attempting to geocode the location...")
-        latitude, longitude = geocode_address(location)
-        
-        if latitude is not None and longitude is not None:
-            print(f"✓ Successfully geocoded location to ({latitude}, {longitude})")
-        else:
-            print("⚠ Geocoding failed, but continuing with incident creation")
-
         # Create a new Incident object with the stored image path
         new_incident = Incident(
             description=description,
@@ -139,9 +203,12 @@ def create_incident():
 
         # Add the new incident to the database session and commit
         db.session.add(new_incident)
+        incidents_changed() # Invalidates cached incident lists (ETags) in the same transaction
         db.session.commit()
 
         print(f"✓ Incident created successfully with ID: {new_incident.id}")
+        if NEAR_DUPLICATE_ENABLED:
+            near_duplicate_index.add(new_incident)
 
         # NEW: Send email alerts to subscribed users
         try:
@@ -157,7 +224,13 @@ def create_incident():
             emails_sent = 0
             emails_failed = 0
             
-            for subscription in active_subscriptions:
+            for index, subscription in enumerate(active_subscriptions):
+                # Fail fast while the mail server is down instead of timing out per subscriber
+                if not email_delivery_available():
+                    print(f"⚠️ SMTP circuit open - skipping the remaining {len(active_subscriptions) - index} alert emails")
+                    emails_failed += len(active_subscriptions) - index
+                    break
+
                 print(f"📧 Processing subscription for: {subscription.email}")
                 
                 # Check if user wants alerts for this department
@@ -192,7 +265,17 @@ def create_incident():
             # Don't fail the incident creation if email sending fails
 
         # Return the newly created incident's data as JSON with a 201 Created status
-        return jsonify(new_incident.to_dict()), 201
+        response = new_incident.to_dict()
+        if near_duplicate:
+            # Similar description but no evidence it's the same place: accepted, with a heads-up
+            existing = near_duplicate.incident
+            response['possible_duplicate'] = {
+                "existing_incident": existing.to_dict(),
+                "similarity": round(near_duplicate.similarity, 2),
+                "message": f"A {existing.department_classification.lower()} incident with a similar description was reported {format_time_ago(existing.timestamp)}. Please check the Alerts page to see if this is the same incident.",
+                "alerts_page_url": "/alerts.html"
+            }
+        return jsonify(response), 201
 
     except Exception as e:
         # Catch any unexpected errors and return a 500 Internal Server Error
@@ -200,19 +283,145 @@ def create_incident():
         db.session.rollback() # Rollback the session in case of an error
         return jsonify({"error": str(e)}), 500
 
+# Route to bulk import incidents (e.g. historical reports from other city systems)
+@incidents_bp.route('/incidents/import', methods=['POST'])
+@department_auth()
+def import_incidents_route():
+    """
+    Imports many incidents from an NDJSON or CSV upload, read as a stream and
+    inserted in batches (see utils/bulk_import.py). Requires a department
+    session token.
+
+    The file is either the raw request body (Content-Type text/csv or
+    application/x-ndjson) or a multipart 'file' field. Query parameters:
+        format: 'ndjson' or 'csv' (default: from the file name / Content-Type)
+        batch_size: rows per transaction (default 500)
+        geocode: 'false' to skip geocoding rows without coordinates
+        notify: 'true' to email subscribers about the imported incidents
+
+    Returns the counts and per-row errors. Very large files are better
+    imported with `flask import-incidents`, which isn't bound by the request
+    timeout or by MAX_REQUEST_MB.
+    """
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    fmt = (request.args.get('format') or detect_format(upload.filename if upload else None, request.content_type) or '').lower()
+    if fmt not in FORMATS:
+        return jsonify({"error": f"Unknown import format; pass format={' or format='.join(FORMATS)}"}), 400
+    try:
+        batch_size = int(request.args.get('batch_size', DEFAULT_BATCH_SIZE))
+    except ValueError:
+        return jsonify({"error": "batch_size must be an integer"}), 400
+
+    print(f"Bulk import ({fmt}) started by {g.department['name']}")
+    try:
+        result = import_incidents(
+            stream, fmt,
+            batch_size=batch_size,
+            geocode=request.args.get('geocode', 'true').lower() != 'false',
+            notify=request.args.get('notify', 'false').lower() == 'true',
+        )
+    except RequestEntityTooLarge:
+        # A chunked body (no Content-Length) ran past MAX_CONTENT_LENGTH mid-import
+        db.session.rollback()
+        raise
+    except Exception as e:
+        db.session.rollback()
+        print(f"ERROR: Bulk import failed: {e}")
+        return jsonify({"error": f"Import failed: {e}"}), 500
+    return jsonify(result.to_dict()), 200
+
+# Route to export incidents as a stream (for analysts and reporting tools)
+@incidents_bp.route('/incidents/export', methods=['GET'])
+def export_incidents():
+    """
+    Streams matching incidents as NDJSON (default) or CSV without loading them
+    all into memory (see utils/incident_export.py). Query parameters:
+        format: 'ndjson' or 'csv'
+        since, until: ISO 8601 bounds on the report time (until is exclusive)
+        department: only incidents assigned to this department
+        status: comma-separated statuses, e.g. 'reported,in_progress'
+    """
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in incident_export.FORMATS:
+        return jsonify({"error": f"Unknown export format; use {' or '.join(incident_export.FORMATS)}"}), 400
+    try:
+        filters = incident_export.parse_filters(request.args)
+    except incident_export.ExportFilterError as e:
+        return jsonify({"error": str(e)}), 400
+
+    filename = f"incidents-{datetime.datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{fmt}"
+    # stream_with_context keeps the database session open while the rows are sent
+    return Response(
+        stream_with_context(incident_export.export_chunks(filters, fmt)),
+        mimetype=incident_export.FORMATS[fmt],
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'X-Accel-Buffering': 'no',
+        }
+    )
+
+# Route to search incidents by description and location (full-text index)
+@incidents_bp.route('/incidents/search', methods=['GET'])
+@conditional_on(INCIDENTS)
+def search_incidents():
+    """
+    Ranked full-text search over incident descriptions and locations.
+
+    Query parameters:
+        q: search words (all must match)
+        department, status, since, until: same filters as the export
+        fields / view: same as GET /incidents
+        limit (default 20, at most 100), offset
+    Each result carries a 'rank' (higher is a better match).
+    """
+    query = (request.args.get('q') or '').strip()
+    if not query:
+        return jsonify({"error": "q is required"}), 400
+    try:
+        filters = incident_export.parse_filters(request.args)
+        fields = selected_fields(request.args)
+        limit = request.args.get('limit', incident_search.DEFAULT_LIMIT, type=int)
+        offset = request.args.get('offset', 0, type=int)
+        if not 1 <= limit <= incident_search.MAX_LIMIT or offset < 0:
+            return jsonify({"error": f"limit must be 1-{incident_search.MAX_LIMIT} and offset 0 or more"}), 400
+        results, has_more = incident_search.search_incidents(query, filters, fields, limit, offset)
+    except (incident_export.ExportFilterError, FieldSelectionError, incident_search.SearchQueryError) as e:
+        return jsonify({"error": str(e)}), 400
+    except incident_search.SearchUnavailableError as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    return json_response({
+        "query": query,
+        "results": results,
+        "limit": limit,
+        "offset": offset,
+        "has_more": has_more,
+    })
+
 # Route to get all incidents
 @incidents_bp.route('/incidents', methods=['GET'])
+@conditional_on(INCIDENTS)
 def get_all_incidents():
     """
     Retrieves all incident reports from the database.
     Can be filtered by 'status' or 'department'.
+    'fields' (comma-separated) or 'view=summary' trims each incident to fewer fields.
+    Sends ETag/Last-Modified; an unchanged poll gets 304 without running the query.
     """
     try:
         # Get query parameters for filtering
         status_filter = request.args.get('status')
         department_filter = request.args.get('department')
+        try:
+            fields = selected_fields(request.args)
+        except FieldSelectionError as e:
+            return jsonify({"error": str(e)}), 400
 
-        query = Incident.query
+        # Select just the requested columns as plain rows (no ORM objects)
+        query = db.session.query(*columns(fields))
 
         if status_filter:
             query = query.filter_by(status=status_filter)
@@ -221,12 +430,7 @@ def get_all_incidents():
             # This allows for incidents classified under multiple departments
             query = query.filter(Incident.department_classification.like(f"%{department_filter}%"))
 
-        incidents = query.all() # Fetch all incidents matching the query
-
-        # Convert list of Incident objects to list of dictionaries
-        incidents_data = [incident.to_dict() for incident in incidents]
-
-        return jsonify(incidents_data), 200
+        return json_response(records(fields, query.all()))
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -251,12 +455,15 @@ def get_incident(incident_id):
 
 # Route to update an existing incident
 @incidents_bp.route('/incidents/<int:incident_id>', methods=['PUT'])
+@department_auth()
 def update_incident(incident_id):
     """
     Updates an existing incident report by its ID.
     Expects JSON data with fields to update (e.g., 'status', 'description').
     If location is updated, it will also re-geocode the new location.
     Now also sends email notifications when status changes.
+    Requires a department session token for a department the incident is
+    classified under.
     """
     try:
         incident = Incident.query.get(incident_id) # Find the incident by ID
@@ -264,6 +471,9 @@ def update_incident(incident_id):
         if not incident:
             return jsonify({"message": "Incident not found"}), 404
 
+        if not department_can_access(g.department, incident.department_classification):
+            return jsonify({"error": "Department not authorized to update this incident"}), 403
+
         data = request.get_json() # Get JSON data from the request body
 
         if not data:
@@ -287,7 +497,10 @@ def update_incident(incident_id):
         if 'image_url' in data:
             incident.image_url = data['image_url']
         if 'department_classification' in data:
-            incident.department_classification = data['department_classification']
+            department_classification, classification_error = validate_classification(data['department_classification'])
+            if classification_error:
+                return classification_error
+            incident.department_classification = department_classification
         if 'status' in data:
             new_status = data['status']
             if new_status != old_status:
@@ -295,6 +508,7 @@ def update_incident(incident_id):
                 status_changed = True
                 print(f"Status changed from '{old_status}' to '{new_status}' for incident {incident_id}")
 
+        incidents_changed()
         db.session.commit() # Commit the changes to the database
 
         # Send status update emails if status changed
@@ -309,7 +523,13 @@ def update_incident(incident_id):
                 emails_sent = 0
                 emails_failed = 0
                 
-                for subscription in active_subscriptions:
+                for index, subscription in enumerate(active_subscriptions):
+                    # Fail fast while the mail server is down instead of timing out per subscriber
+                    if not email_delivery_available():
+                        print(f"⚠️ SMTP circuit open - skipping the remaining {len(active_subscriptions) - index} status update emails")
+                        emails_failed += len(active_subscriptions) - index
+                        break
+
                     # Check if user wants alerts for this department
                     if subscription.department_filter:
                         user_departments = [dept.strip().upper() for dept in subscription.department_filter.split(',')]
@@ -343,12 +563,103 @@ def update_incident(incident_id):
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
+# Most incidents one bulk status request may change
+MAX_BULK_STATUS_UPDATES = 500
+
+# Route to change the status of many incidents at once (department dashboards)
+@incidents_bp.route('/incidents/status', methods=['POST'])
+@department_auth()
+@rate_limited('bulk-status', BULK_STATUS_RATE_LIMIT_PER_MINUTE, BULK_STATUS_RATE_LIMIT_BURST)
+def bulk_update_status():
+    """
+    Applies many status changes in one transaction and sends each subscriber
+    one email covering all the changes relevant to them.
+
+    Expects JSON data with either
+        {"updates": [{"id": 1, "status": "resolved"}, ...]}
+    or, to move several incidents to the same status,
+        {"ids": [1, 2, 3], "status": "resolved"}
+
+    Requires a department session token. Invalid entries (unknown incident
+    or status, or an incident the calling department isn't assigned to) are reported and skipped; the valid
+    changes are committed together. Returns a result per entry.
+    """
+    data = request.get_json(silent=True) or {}
+    if isinstance(data.get('ids'), list) and 'status' in data:
+        updates = [{"id": incident_id, "status": data['status']} for incident_id in data['ids']]
+    else:
+        updates = data.get('updates')
+    if not isinstance(updates, list) or not updates:
+        return jsonify({"error": "Send {\"updates\": [{\"id\": ..., \"status\": ...}, ...]} or {\"ids\": [...], \"status\": ...}"}), 400
+    if len(updates) > MAX_BULK_STATUS_UPDATES:
+        return jsonify({"error": f"At most {MAX_BULK_STATUS_UPDATES} updates per request"}), 400
+
+    try:
+        # One query for every incident in the batch. type() rather than isinstance():
+        # JSON true/false arrive as bools, which are ints (True == 1) in Python
+        ids = {update['id'] for update in updates if isinstance(update, dict) and type(update.get('id')) is int}
+        incidents = {incident.id: incident for incident in Incident.query.filter(Incident.id.in_(ids)).all()} if ids else {}
+
+        results = []
+        changes = []
+        for update in updates:
+            update = update if isinstance(update, dict) else {}
+            incident_id = update.get('id')
+            new_status = update.get('status')
+            incident = incidents.get(incident_id) if type(incident_id) is int else None
+
+            if incident is None:
+                results.append({"id": incident_id, "ok": False, "error": "Incident not found"})
+            elif new_status not in INCIDENT_STATUSES:
+                results.append({"id": incident_id, "ok": False, "error": f"status must be one of: {', '.join(INCIDENT_STATUSES)}"})
+            elif not department_can_access(g.department, incident.department_classification):
+                results.append({"id": incident_id, "ok": False, "error": "Department not authorized to update this incident"})
+            elif incident.status == new_status:
+                results.append({"id": incident_id, "ok": True, "changed": False, "status": new_status})
+            else:
+                old_status = incident.status
+                incident.status = new_status
+                changes.append({"incident": incident, "old_status": old_status, "new_status": new_status})
+                results.append({"id": incident_id, "ok": True, "changed": True, "old_status": old_status, "status": new_status})
+
+        if changes:
+            incidents_changed()
+        db.session.commit() # All the changes land together
+        failed = sum(1 for result in results if not result['ok'])
+        print(f"Bulk status update: {len(changes)} changed, {failed} rejected")
+
+        notifications = None
+        if changes:
+            try:
+                for change in changes:
+                    change['incident'] = change['incident'].to_dict()
+                notifications = send_status_update_digests(changes)
+                print(f"📧 Status digest summary: {notifications}")
+            except Exception as email_error:
+                print(f"❌ Critical error in status digest process: {str(email_error)}")
+                import traceback
+                traceback.print_exc()
+                # Don't fail the update if email sending fails
+
+        return jsonify({
+            "updated": len(changes),
+            "failed": failed,
+            "results": results,
+            "notifications": notifications,
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
 # Route to delete an incident
 @incidents_bp.route('/incidents/<int:incident_id>', methods=['DELETE'])
+@department_auth()
 def delete_incident(incident_id):
     """
     Deletes an incident report by its ID.
-    Requires department authentication via department_key and department_name in request body.
+    Requires a department session token (verified in memory) for a
+    department the incident is classified under.
     """
     try:
         incident = Incident.query.get(incident_id) # Find the incident by ID
@@ -356,23 +667,11 @@ def delete_incident(incident_id):
         if not incident:
             return jsonify({"error": "Incident not found"}), 404
 
-        # Check if request has JSON data for department authentication
-        data = request.get_json()
-        if data and 'department_key' in data and 'department_name' in data:
-            # Validate department credentials
-            department = Department.query.filter_by(
-                name=data['department_name'].upper(),
-                login_key=data['department_key']
-            ).first()
-            
-            if not department:
-                return jsonify({"error": "Invalid department credentials"}), 401
-            
-            # Check if department is authorized to delete this incident
-            if data['department_name'].upper() not in incident.department_classification:
-                return jsonify({"error": "Department not authorized to delete this incident"}), 403
+        if not department_can_access(g.department, incident.department_classification):
+            return jsonify({"error": "Department not authorized to delete this incident"}), 403
 
         db.session.delete(incident) # Delete the incident from the session
+        incidents_changed()
         db.session.commit() # Commit the deletion
 
         print(f"✓ Incident {incident_id} deleted successfully")
@@ -396,6 +695,7 @@ def clear_all_incidents():
         
         # Delete all incidents
         Incident.query.delete()
+        incidents_changed()
         db.session.commit()
         
         print(f"✓ Successfully deleted all {count} incidents")
@@ -415,12 +715,29 @@ def serve_image(filename):
     Serves uploaded images from the uploads directory.
     """
     try:
-        uploads_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads')
-        return send_from_directory(uploads_dir, filename)
+        return send_from_directory(UPLOADS_DIR, filename)
     except Exception as e:
         print(f"ERROR serving image {filename}: {str(e)}")
         return jsonify({"error": str(e)}), 404
 
+def validate_classification(value):
+    """
+    Normalizes a comma-separated department classification (e.g. "police, fire")
+    against the department registry.
+
+    Returns:
+        tuple: (normalized classification string, None) if valid,
+               (None, error response) if empty or naming unknown departments
+    """
+    departments = parse_classification(value if isinstance(value, str) else '')
+    unknown = unknown_departments(departments)
+    if not departments or unknown:
+        return None, (jsonify({
+            "error": f"Invalid department classification: {', '.join(unknown) if unknown else 'none given'}",
+            "valid_departments": sorted(DEPARTMENT_NAMES)
+        }), 400)
+    return ','.join(departments), None
+
 # Add helper function at the end of the file
 def format_time_ago(timestamp):
     """
@@ -0,0 +1,28 @@
+# backend/routes/monitoring.py
+
+from flask import Blueprint, jsonify
+from utils.http_client import upstream_stats
+from utils.email_service import smtp_breaker
+from utils.rate_limit import rate_limit_stats
+
+# Create a Blueprint for operational/monitoring routes
+monitoring_bp = Blueprint('monitoring_bp', __name__)
+
+
+@monitoring_bp.route('/monitoring/upstreams', methods=['GET'])
+def get_upstream_stats():
+    """
+    Returns call counts, retries, latency percentiles, connection reuse and
+    circuit breaker state for each external API client, plus the SMTP
+    breaker. Figures are per worker process, since every worker keeps its
+    own connection pools and breakers.
+    """
+    stats = upstream_stats()
+    stats['smtp'] = {"circuit": smtp_breaker.snapshot()}
+    return jsonify(stats), 200
+
+
+@monitoring_bp.route('/monitoring/rate-limits', methods=['GET'])
+def get_rate_limit_stats():
+    """Returns the rate limit settings and this worker's expensive-request concurrency figures."""
+    return jsonify(rate_limit_stats()), 200
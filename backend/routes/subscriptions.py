@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify, redirect, render_template_string
 from database import db
 from models import UserSubscription
 from utils.email_service import send_subscription_confirmation_email
+from utils.fast_json import json_response, records
 import re
 
 subscriptions_bp = Blueprint('subscriptions_bp', __name__)
@@ -145,7 +146,7 @@ def get_subscriptions():
     Get all active subscriptions (admin endpoint).
     """
     try:
-        subscriptions = UserSubscription.query.filter_by(is_active=True).all()
-        return jsonify([sub.to_dict() for sub in subscriptions]), 200
+        rows = db.session.query(*[getattr(UserSubscription, field) for field in UserSubscription.FIELDS]).filter_by(is_active=True).all()
+        return json_response(records(UserSubscription.FIELDS, rows))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
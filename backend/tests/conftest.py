@@ -0,0 +1,29 @@
+# backend/tests/conftest.py
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+# config.py reads the environment at import time, so point it at a throwaway
+# database before any app module is imported
+_tmp = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_tmp, 'test.db')
+os.environ.setdefault('SECRET_KEY', 'test-secret-key')
+os.environ['RATE_LIMIT_ENABLED'] = 'false'
+os.environ['GOOGLE_MAPS_API_KEY'] = ''
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import create_app, init_database
+    app = create_app()
+    init_database(app)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
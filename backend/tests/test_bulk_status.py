@@ -0,0 +1,22 @@
+# backend/tests/test_bulk_status.py
+
+
+def _token(client, login_key):
+    return client.post('/api/departments/login', json={"login_key": login_key}).get_json()['token']
+
+
+def test_boolean_ids_are_not_incident_ids(client):
+    created = client.post('/api/incidents', json={
+        "description": "bulk status bool id report",
+        "location": "1 Bulk Test Way",
+        "department_classification": "FIRE",
+    })
+    assert created.status_code == 201
+    headers = {"Authorization": f"Bearer {_token(client, 'firekey')}"}
+    # true == 1 in Python; it must not be read as incident 1
+    response = client.post('/api/incidents/status', headers=headers,
+                           json={"ids": [True, created.get_json()['id']], "status": "in_progress"})
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert results[0] == {"id": True, "ok": False, "error": "Incident not found"}
+    assert results[1]['ok'] is True
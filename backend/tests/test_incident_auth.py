@@ -0,0 +1,29 @@
+# backend/tests/test_incident_auth.py
+
+
+def _create_incident(client, location):
+    response = client.post('/api/incidents', json={
+        "description": "auth test report",
+        "location": location,
+        "department_classification": "FIRE",
+    })
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+
+def _token(client, login_key):
+    return client.post('/api/departments/login', json={"login_key": login_key}).get_json()['token']
+
+
+def test_update_and_delete_require_a_token(client):
+    incident_id = _create_incident(client, "1 Auth Test Way")
+    assert client.put(f'/api/incidents/{incident_id}', json={"status": "resolved"}).status_code == 401
+    assert client.delete(f'/api/incidents/{incident_id}').status_code == 401
+
+
+def test_only_assigned_departments_may_delete(client):
+    incident_id = _create_incident(client, "2 Auth Test Way")
+    police = {"Authorization": f"Bearer {_token(client, 'policekey')}"}
+    fire = {"Authorization": f"Bearer {_token(client, 'firekey')}"}
+    assert client.delete(f'/api/incidents/{incident_id}', headers=police).status_code == 403
+    assert client.delete(f'/api/incidents/{incident_id}', headers=fire).status_code == 200
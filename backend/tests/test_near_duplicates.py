@@ -0,0 +1,33 @@
+# backend/tests/test_near_duplicates.py
+
+from datetime import datetime, timedelta
+
+
+def test_sync_picks_up_a_lower_id_committed_after_a_higher_one(app):
+    from database import db
+    from models import Incident
+    from utils import change_counters
+    from utils.http_caching import INCIDENTS
+    from utils.near_duplicates import NearDuplicateIndex
+
+    with app.app_context():
+        index = NearDuplicateIndex()
+        index.sync()
+
+        # Worker A flushes first (lower id) but commits after worker B
+        stamped = datetime.utcnow() - timedelta(seconds=5)
+        slow = Incident(description="tree down blocking oak street", location="5 Oak St",
+                        department_classification="PUBLIC_WORKS", timestamp=stamped)
+        fast = Incident(description="streetlight out on elm avenue", location="9 Elm Ave",
+                        department_classification="UTILITIES")
+        db.session.add_all([slow, fast])
+        change_counters.bump(INCIDENTS)
+        db.session.commit()
+        index.add(fast)
+        assert slow.id < fast.id
+
+        index.sync()
+        assert slow.id in index._entries
+
+        match = index.candidates("tree down blocking oak street", "5 Oak St", None, None, "PUBLIC_WORKS")[0]
+        assert match.incident_id == slow.id and match.blocking
@@ -0,0 +1,49 @@
+# backend/tests/test_pre_classifier.py
+
+from utils.pre_classifier import classify_text
+
+
+def test_clear_fire_report():
+    result = classify_text("house on fire, flames everywhere")
+    assert result['department'] == 'FIRE'
+    assert result['clear']
+
+
+def test_fire_hydrant_is_utilities_not_fire():
+    result = classify_text("fire hydrant leaking water")
+    assert result['department'] == 'UTILITIES'
+    assert result['clear']
+
+
+def test_phrase_words_are_not_counted_again():
+    result = classify_text("downed power line on the sidewalk")
+    assert result['matches'] == ['downed power line']
+
+
+def test_ambiguous_report_is_not_clear():
+    result = classify_text("someone smoking weed in the park")
+    assert not result['clear']
+
+
+def test_no_match_falls_back_to_general():
+    result = classify_text("something odd happened")
+    assert result['department'] == 'GENERAL'
+    assert not result['clear']
+
+
+def test_unclassified_ambiguous_incident_is_rejected(client):
+    response = client.post('/api/incidents', json={
+        "description": "someone smoking weed in the park",
+        "location": "Central Park",
+    })
+    assert response.status_code == 400
+    assert 'department_classification' in response.get_json()['error']
+
+
+def test_unclassified_clear_incident_is_classified_locally(client):
+    response = client.post('/api/incidents', json={
+        "description": "fire hydrant leaking water everywhere",
+        "location": "12 Test Street",
+    })
+    assert response.status_code == 201
+    assert response.get_json()['department_classification'] == 'UTILITIES'
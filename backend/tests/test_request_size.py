@@ -0,0 +1,16 @@
+# backend/tests/test_request_size.py
+
+from config import MAX_REQUEST_BYTES
+
+
+def test_oversized_bodies_get_a_json_413(client):
+    response = client.post('/api/incidents', data=b'{' + b' ' * MAX_REQUEST_BYTES + b'}',
+                           content_type='application/json')
+    assert response.status_code == 413
+    assert 'error' in response.get_json()
+
+
+def test_oversized_image_uploads_get_a_json_413(client):
+    response = client.post('/api/images', data=b'x' * (MAX_REQUEST_BYTES + 1),
+                           content_type='multipart/form-data; boundary=x')
+    assert response.status_code == 413
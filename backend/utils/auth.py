@@ -0,0 +1,94 @@
+# backend/utils/auth.py
+
+"""
+Stateless session tokens for department dashboards.
+
+department_login issues a signed, time-limited token carrying the
+department's id and name. Later requests send it as
+"Authorization: Bearer <token>" and the department_auth guard verifies the
+signature in memory, so authenticated dashboard actions need no database
+query to check credentials.
+
+Tokens are signed with SECRET_KEY. When it is not set, logins are refused
+and no token is accepted, rather than signing with a guessable key.
+"""
+
+from functools import wraps
+
+from flask import g, jsonify, request
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+from config import SECRET_KEY, DEPARTMENT_SESSION_TTL
+
+# The salt keeps these tokens from being valid for any other signed value in the app
+_serializer = URLSafeTimedSerializer(SECRET_KEY, salt='department-session') if SECRET_KEY else None
+if _serializer is None:
+    print("WARNING: SECRET_KEY is not set; department logins are disabled until it is configured")
+
+
+def sessions_enabled():
+    """True if SECRET_KEY is set, so session tokens can be issued and verified."""
+    return _serializer is not None
+
+
+def issue_department_token(department):
+    """
+    Creates a session token for a department dict ({'id': ..., 'name': ...}).
+    """
+    if _serializer is None:
+        raise RuntimeError("SECRET_KEY is not set; cannot issue department session tokens")
+    return _serializer.dumps({'id': department['id'], 'name': department['name']})
+
+
+def verify_department_token(token):
+    """
+    Returns the department dict ({'id', 'name'}) stored in a valid token,
+    or None if the token is malformed, tampered with or older than
+    DEPARTMENT_SESSION_TTL seconds (always None when SECRET_KEY is not set).
+    """
+    if _serializer is None:
+        return None
+    try:
+        return _serializer.loads(token, max_age=DEPARTMENT_SESSION_TTL)
+    except (SignatureExpired, BadSignature):
+        return None
+
+
+def _bearer_token():
+    header = request.headers.get('Authorization', '')
+    scheme, _, token = header.partition(' ')
+    if scheme.lower() == 'bearer' and token.strip():
+        return token.strip()
+    return None
+
+
+def department_auth(required=True):
+    """
+    Route decorator that authenticates the calling department.
+
+    Sets g.department to the token's {'id', 'name'} dict, or to None when no
+    token was sent and required=False (so routes can keep serving public or
+    legacy callers). A token that is present but invalid or expired is
+    always rejected with 401.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            g.department = None
+            token = _bearer_token()
+            if token:
+                department = verify_department_token(token)
+                if department is None:
+                    return jsonify({"error": "Invalid or expired session token"}), 401
+                g.department = department
+            elif required:
+                return jsonify({"error": "Department session token required"}), 401
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def department_can_access(department, department_classification):
+    """True if the department is one of those an incident is classified under."""
+    assigned = [dept.strip().upper() for dept in (department_classification or '').split(',')]
+    return department['name'].upper() in assigned
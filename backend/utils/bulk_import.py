@@ -0,0 +1,275 @@
+# backend/utils/bulk_import.py
+
+"""
+Bulk import of historical incidents (POST /api/incidents/import and the
+`flask import-incidents` command).
+
+Records are read one at a time from an NDJSON or CSV stream, so the file is
+never held in memory, and inserted in batches of `batch_size` rows, one
+transaction and one multi-row INSERT per batch. For each batch the distinct
+addresses without coordinates are geocoded together through the geocoding
+cache (utils/geocoding.py). The per-report work of create_incident
+(duplicate checks, email fan-out) is skipped; alerts are only sent when
+asked for.
+
+Accepted fields per record (CSV columns or JSON keys):
+    description, location                  required
+    department_classification              classified locally when missing
+    status                                 reported (default), in_progress or resolved
+    timestamp                              ISO 8601; defaults to the import time
+    latitude, longitude                    used as given instead of geocoding
+    image_url                              a URL (data URIs are not accepted here)
+"""
+
+import codecs
+import csv
+import json
+from datetime import datetime, timezone
+
+from database import db
+from models import Incident, INCIDENT_STATUSES
+from utils.department_registry import parse_classification, unknown_departments, DEFAULT_DEPARTMENT
+from utils.geocoding import geocode_addresses
+from utils.http_caching import incidents_changed
+from utils.notifications import send_new_incident_alerts
+from utils.pre_classifier import classify_text
+
+FORMATS = ('ndjson', 'csv')
+DEFAULT_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 5000
+# Per-row errors listed in the result; the rest are only counted
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportRowError(ValueError):
+    """A record that can't be imported; the message is reported for its row."""
+
+
+def detect_format(filename=None, content_type=None):
+    """Guesses 'ndjson' or 'csv' from a file name or Content-Type; None if neither fits."""
+    hint = f"{filename or ''} {content_type or ''}".lower()
+    if 'csv' in hint:
+        return 'csv'
+    if 'ndjson' in hint or 'jsonl' in hint or 'json' in hint:
+        return 'ndjson'
+    return None
+
+
+def iter_records(stream, fmt):
+    """
+    Yields (row number, record dict or ImportRowError) from a binary stream.
+    Row numbers are 1-based data rows (the CSV header is not counted).
+    """
+    text = codecs.getreader('utf-8-sig')(stream)
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row_number, row in enumerate(reader, start=1):
+            if None in row:
+                yield row_number, ImportRowError("Row has more values than the header")
+            else:
+                yield row_number, {key.strip(): value for key, value in row.items() if key}
+        return
+
+    row_number = 0
+    for line in text:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row_number, ImportRowError(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield row_number, ImportRowError("Each line must be a JSON object")
+            continue
+        yield row_number, record
+
+
+def _text(record, field):
+    value = record.get(field)
+    if value is None:
+        return ''
+    return str(value).strip()
+
+
+def _float(record, field):
+    value = _text(record, field)
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ImportRowError(f"{field} must be a number")
+
+
+def _timestamp(value):
+    if not value:
+        return datetime.utcnow()
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ImportRowError("timestamp must be ISO 8601, e.g. 2024-05-01T14:30:00Z")
+    # Stored as naive UTC like every other timestamp
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def prepare_row(record):
+    """Validates one record and returns the incident row to insert (raises ImportRowError)."""
+    description = _text(record, 'description')
+    location = _text(record, 'location')
+    if not description or not location:
+        raise ImportRowError("description and location are required")
+    if len(location) > 255:
+        raise ImportRowError("location is longer than 255 characters")
+
+    classification = _text(record, 'department_classification')
+    if not classification:
+        # Only clear-cut descriptions are classified locally; the rest go to GENERAL for triage
+        result = classify_text(description)
+        classification = result['department'] if result['clear'] else DEFAULT_DEPARTMENT
+    departments = parse_classification(classification)
+    unknown = unknown_departments(departments)
+    if unknown:
+        raise ImportRowError(f"Invalid department classification: {', '.join(unknown)}")
+
+    status = (_text(record, 'status') or 'reported').lower()
+    if status not in INCIDENT_STATUSES:
+        raise ImportRowError(f"status must be one of: {', '.join(INCIDENT_STATUSES)}")
+
+    image_url = _text(record, 'image_url') or None
+    if image_url and (image_url.startswith('data:') or len(image_url) > 500):
+        raise ImportRowError("image_url must be a URL of at most 500 characters")
+
+    latitude, longitude = _float(record, 'latitude'), _float(record, 'longitude')
+    if (latitude is None) != (longitude is None):
+        raise ImportRowError("latitude and longitude must be given together")
+
+    return {
+        'description': description,
+        'location': location,
+        'latitude': latitude,
+        'longitude': longitude,
+        'department_classification': ','.join(departments),
+        'status': status,
+        'timestamp': _timestamp(_text(record, 'timestamp')),
+        'image_url': image_url,
+    }
+
+
+class ImportResult:
+    """Counters and per-row errors of one import run."""
+
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.geocoded = 0
+        self.batches = 0
+        self.errors = []
+        self.notifications = None
+
+    def add_error(self, row_number, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "error": message})
+
+    def to_dict(self):
+        result = {
+            "imported": self.imported,
+            "failed": self.failed,
+            "geocoded": self.geocoded,
+            "batches": self.batches,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+        if self.notifications is not None:
+            result["notifications"] = self.notifications
+        return result
+
+
+def _insert_batch(batch, result, geocode, notify):
+    """Geocodes and inserts one batch of (row number, row) pairs in a single transaction."""
+    if geocode:
+        addresses = [row['location'] for _, row in batch if row['latitude'] is None]
+        if addresses:
+            coordinates = geocode_addresses(addresses)
+            for _, row in batch:
+                if row['latitude'] is None:
+                    row['latitude'], row['longitude'] = coordinates.get(row['location'], (None, None))
+                    if row['latitude'] is not None:
+                        result.geocoded += 1
+
+    rows = [row for _, row in batch]
+    try:
+        if notify:
+            # The alerts need the new IDs, so go through the ORM
+            incidents = [Incident(**row) for row in rows]
+            db.session.add_all(incidents)
+            incidents_changed()
+            db.session.commit()
+            incident_dicts = [incident.to_dict() for incident in incidents]
+        else:
+            db.session.execute(Incident.__table__.insert(), rows)
+            incidents_changed()
+            db.session.commit()
+            incident_dicts = None
+    except Exception as e:
+        db.session.rollback()
+        print(f"ERROR: Import batch of {len(batch)} rows failed: {e}")
+        for row_number, _ in batch:
+            result.add_error(row_number, f"Batch insert failed: {type(e).__name__}")
+        return None
+
+    result.imported += len(batch)
+    result.batches += 1
+    return incident_dicts
+
+
+def import_incidents(stream, fmt, batch_size=DEFAULT_BATCH_SIZE, geocode=True, notify=False, progress=None):
+    """
+    Imports incidents from an NDJSON or CSV binary stream.
+
+    Args:
+        stream: Binary file-like object (request.stream, an open file, ...)
+        fmt (str): 'ndjson' or 'csv'
+        batch_size (int): Rows per transaction
+        geocode (bool): Geocode rows that have no latitude/longitude
+        notify (bool): Send new-incident alerts to subscribers (off for historical data)
+        progress (callable): Called with the ImportResult after every batch
+
+    Returns:
+        ImportResult
+    """
+    batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+    result = ImportResult()
+    if notify:
+        result.notifications = {"sent": 0, "failed": 0}
+    batch = []
+
+    def flush():
+        incident_dicts = _insert_batch(batch, result, geocode, notify)
+        if incident_dicts:
+            for key, count in send_new_incident_alerts(incident_dicts).items():
+                result.notifications[key] += count
+        batch.clear()
+        if progress:
+            progress(result)
+
+    for row_number, record in iter_records(stream, fmt):
+        if isinstance(record, ImportRowError):
+            result.add_error(row_number, str(record))
+            continue
+        try:
+            batch.append((row_number, prepare_row(record)))
+        except ImportRowError as e:
+            result.add_error(row_number, str(e))
+            continue
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    print(f"Bulk import: {result.imported} imported, {result.failed} failed in {result.batches} batches")
+    return result
@@ -0,0 +1,55 @@
+# backend/utils/change_counters.py
+
+"""
+Per-dataset version counters stored in the change_counters table.
+
+Writers call bump() in the same transaction as their change; readers call
+get_version() (a primary-key lookup) to find out whether anything changed
+since they last looked, without re-running their real query.
+"""
+
+from datetime import datetime
+
+from database import db
+from models import ChangeCounter
+
+
+def get_version(name):
+    """
+    Returns (version, updated_at) for a dataset, or (0, None) if it has
+    never been bumped.
+    """
+    row = db.session.query(ChangeCounter.version, ChangeCounter.updated_at).filter(
+        ChangeCounter.name == name
+    ).first()
+    if row is None:
+        return 0, None
+    return row.version, row.updated_at
+
+
+def bump(name):
+    """
+    Increments a dataset's version inside the current session transaction.
+    The caller commits (so the bump is atomic with the change it describes).
+    """
+    table = ChangeCounter.__table__
+    now = datetime.utcnow()
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(table).values(name=name, version=1, updated_at=now)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.name],
+            set_={'version': table.c.version + 1, 'updated_at': now}
+        )
+        db.session.execute(statement)
+    else:
+        updated = db.session.execute(
+            table.update().where(table.c.name == name).values(version=table.c.version + 1, updated_at=now)
+        ).rowcount
+        if not updated:
+            db.session.execute(table.insert().values(name=name, version=1, updated_at=now))
@@ -0,0 +1,106 @@
+# backend/utils/chat_context.py
+
+"""
+Keeps the chat context sent to Gemini bounded.
+
+The chatbot instructions travel once per request in Gemini's
+systemInstruction field, which is identical on every call so the upstream
+can reuse it as a cached prompt prefix. The conversation itself is capped by
+an approximate token budget: once the recent turns exceed
+CHAT_HISTORY_TOKEN_BUDGET, the oldest turns are folded into a short
+extractive summary (capped at CHAT_SUMMARY_TOKEN_BUDGET) that is sent along
+with the instructions instead of the turns themselves.
+
+Folding happens in steps: when the budget is exceeded the window is cut
+back to half the budget, so the fold point (and with it the summary and the
+prompt prefix) stays the same for several turns instead of shifting on every
+message.
+"""
+
+from config import CHAT_HISTORY_TOKEN_BUDGET, CHAT_MIN_RECENT_MESSAGES, CHAT_SUMMARY_TOKEN_BUDGET
+
+# Rough size of English text in Gemini tokens
+CHARS_PER_TOKEN = 4
+# Gemini bills each inline image as a fixed number of tokens
+IMAGE_TOKENS = 258
+# Longest excerpt of a single message kept in the summary
+SUMMARY_LINE_CHARS = 240
+
+SPEAKERS = {"user": "Reporter", "model": "CityAlert"}
+
+
+def estimate_tokens(message):
+    """Approximate token count of one {'role', 'parts'} chat message."""
+    tokens = 0
+    for part in message.get('parts', []):
+        if 'text' in part:
+            tokens += len(part['text'] or '') // CHARS_PER_TOKEN + 1
+        if 'inlineData' in part or 'imageId' in part:
+            tokens += IMAGE_TOKENS
+    return tokens
+
+
+def fold_point(history, budget=CHAT_HISTORY_TOKEN_BUDGET, min_recent=CHAT_MIN_RECENT_MESSAGES):
+    """
+    Returns how many of the oldest messages to summarize instead of sending.
+
+    Replays the conversation message by message: whenever the unsummarized
+    window grows past `budget`, old messages are folded until it is back under
+    half the budget (always keeping the last `min_recent` messages). Being a
+    pure function of the history, it gives the same answer on every turn until
+    the window overflows again.
+    """
+    costs = [estimate_tokens(message) for message in history]
+    fold = 0
+    window = 0
+    for end, cost in enumerate(costs, start=1):
+        window += cost
+        if window > budget:
+            while window > budget // 2 and end - fold > min_recent:
+                window -= costs[fold]
+                fold += 1
+    return fold
+
+
+def summarize(messages, budget=CHAT_SUMMARY_TOKEN_BUDGET):
+    """
+    Condenses older messages into "Speaker: excerpt" lines, replacing images
+    with a marker. If the lines exceed the budget, the first one (usually the
+    incident description) is kept along with as many of the latest as fit.
+    """
+    lines = []
+    for message in messages:
+        texts = [part['text'].strip() for part in message.get('parts', []) if (part.get('text') or '').strip()]
+        text = ' '.join(' '.join(texts).split())
+        if len(text) > SUMMARY_LINE_CHARS:
+            text = text[:SUMMARY_LINE_CHARS - 3].rstrip() + '...'
+        if any('inlineData' in part or 'imageId' in part for part in message.get('parts', [])):
+            text = f"{text} [photo attached]".strip()
+        if text:
+            lines.append(f"{SPEAKERS.get(message.get('role'), 'Reporter')}: {text}")
+
+    max_chars = budget * CHARS_PER_TOKEN
+    if sum(len(line) + 1 for line in lines) > max_chars and len(lines) > 1:
+        kept = []
+        remaining = max_chars - len(lines[0]) - 1
+        for line in reversed(lines[1:]):
+            if len(line) + 1 > remaining:
+                break
+            kept.insert(0, line)
+            remaining -= len(line) + 1
+        lines = [lines[0], "..."] + kept
+    return '\n'.join(lines)
+
+
+def fit_history(history):
+    """
+    Splits a chat history into (summary, recent_messages).
+    summary is None while the whole conversation fits in the budget.
+    """
+    fold = fold_point(history)
+    if not fold:
+        return None, history
+    # Gemini expects the contents to open with a user turn
+    while fold < len(history) - 1 and history[fold].get('role') == 'model':
+        fold += 1
+    return summarize(history[:fold]), history[fold:]
@@ -0,0 +1,127 @@
+# backend/utils/chat_sessions.py
+
+"""
+Server-held chat sessions.
+
+The chat proxy keeps each conversation's history on the server under a
+random session ID, so chat.js only sends the messages added since its last
+turn instead of the whole history (images included) every time.
+
+Two backends, selected with CHAT_SESSION_BACKEND:
+
+- 'memory' (default): a per-worker dict with idle-TTL and size-bound
+  eviction. Fast, but sessions are lost on restart and not shared between
+  gunicorn workers; clients recover by resending their history when told
+  a session is unknown.
+- 'database': the chat_sessions table, shared by all workers and kept
+  across restarts.
+
+Both expire sessions that have been idle for CHAT_SESSION_TTL seconds.
+"""
+
+import json
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from config import CHAT_SESSION_BACKEND, CHAT_SESSION_TTL, CHAT_SESSION_MAX
+from database import db
+from models import ChatSession
+
+# The database backend deletes expired rows once every this many saves per worker
+PURGE_EVERY = 200
+
+
+def new_session_id():
+    return secrets.token_urlsafe(24)
+
+
+class MemoryChatSessionStore:
+    """Per-process session store: least recently used first, evicted by idle time and count."""
+
+    def __init__(self, ttl=CHAT_SESSION_TTL, max_sessions=CHAT_SESSION_MAX):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()  # id -> (last_used, history)
+
+    def _evict(self, now):
+        # Entries are kept in last-used order, so expired ones are at the front
+        while self._sessions:
+            session_id, (last_used, _) = next(iter(self._sessions.items()))
+            if now - last_used <= self.ttl and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[session_id]
+
+    def get(self, session_id):
+        """Returns a copy of the session's history, or None if unknown or expired."""
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            return list(entry[1])
+
+    def save(self, session_id, history):
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[session_id] = (now, list(history))
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class DatabaseChatSessionStore:
+    """Session store backed by the chat_sessions table (shared by all workers)."""
+
+    def __init__(self, ttl=CHAT_SESSION_TTL):
+        self.ttl = ttl
+        self._saves = 0
+
+    def _cutoff(self):
+        return datetime.utcnow() - timedelta(seconds=self.ttl)
+
+    def get(self, session_id):
+        row = db.session.query(ChatSession.history).filter(
+            ChatSession.id == session_id,
+            ChatSession.updated_at >= self._cutoff()
+        ).first()
+        return json.loads(row.history) if row else None
+
+    def save(self, session_id, history):
+        now = datetime.utcnow()
+        session = db.session.get(ChatSession, session_id)
+        if session is None:
+            session = ChatSession(id=session_id, created_at=now)
+            db.session.add(session)
+        session.history = json.dumps(history, separators=(',', ':'))
+        session.updated_at = now
+
+        self._saves += 1
+        if self._saves % PURGE_EVERY == 0:
+            ChatSession.query.filter(ChatSession.updated_at < self._cutoff()).delete(synchronize_session=False)
+        db.session.commit()
+
+    def delete(self, session_id):
+        ChatSession.query.filter(ChatSession.id == session_id).delete(synchronize_session=False)
+        db.session.commit()
+
+
+def create_store(backend=CHAT_SESSION_BACKEND):
+    if backend == 'database':
+        return DatabaseChatSessionStore()
+    if backend != 'memory':
+        print(f"WARNING: Unknown CHAT_SESSION_BACKEND '{backend}', using in-memory chat sessions")
+    return MemoryChatSessionStore()
+
+
+chat_session_store = create_store()
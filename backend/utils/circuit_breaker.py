@@ -0,0 +1,155 @@
+# backend/utils/circuit_breaker.py
+
+"""
+Circuit breakers for the external dependencies (Gemini, Google Geocoding, SMTP).
+
+Each breaker watches the outcome of the last CIRCUIT_WINDOW calls to one
+upstream. A call counts against it if it failed, or if it succeeded but took
+longer than the upstream's slow-call threshold. Once at least
+CIRCUIT_MIN_CALLS calls are in the window and the bad share reaches
+CIRCUIT_FAILURE_RATE, the breaker opens:
+
+- open: calls are rejected immediately with CircuitOpenError, so callers fall
+  back to their degraded behavior (scripted chat replies, incidents without
+  coordinates, skipped emails) instead of tying up a worker thread waiting on
+  a dependency that is known to be down.
+- half-open: after CIRCUIT_OPEN_SECONDS, one probe call at a time is let
+  through. A good probe closes the breaker; a bad one reopens it.
+- closed: normal operation.
+
+Breakers are per worker process. Their state is reported at
+GET /api/monitoring/upstreams (see routes/monitoring.py).
+
+Usage:
+    breaker.before_call()          # raises CircuitOpenError while open
+    started = time.monotonic()
+    ...                            # the call
+    breaker.record(ok, (time.monotonic() - started) * 1000.0)
+"""
+
+import threading
+import time
+from collections import deque
+
+from config import CIRCUIT_WINDOW, CIRCUIT_MIN_CALLS, CIRCUIT_FAILURE_RATE, CIRCUIT_OPEN_SECONDS
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+    def __init__(self, name, retry_in):
+        super().__init__(f"{name} circuit is open, not calling it for another {retry_in:.0f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Error-rate and latency circuit breaker for one upstream.
+
+    Args:
+        name (str): Label used in logs and monitoring, e.g. 'gemini'.
+        slow_call_ms (float): Calls slower than this count as failures.
+        error_class: Exception raised while open (CircuitOpenError or a subclass).
+    """
+
+    def __init__(self, name, slow_call_ms, window=CIRCUIT_WINDOW, min_calls=CIRCUIT_MIN_CALLS,
+                 failure_rate=CIRCUIT_FAILURE_RATE, open_seconds=CIRCUIT_OPEN_SECONDS, error_class=CircuitOpenError):
+        self.name = name
+        self.slow_call_ms = slow_call_ms
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.error_class = error_class
+
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window)  # True for a bad (failed or slow) call
+        self._state = CLOSED
+        self._opened_at = None
+        self._probe_in_flight = False
+        self.trips = 0
+        self.rejected = 0
+        self.last_trip_reason = None
+
+    def _refresh(self, now):
+        # Must hold the lock. An open breaker turns half-open once its cool-down is over.
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+            print(f"[{self.name}] circuit half-open, probing")
+
+    def _open(self, now, reason):
+        # Must hold the lock
+        self._state = OPEN
+        self._opened_at = now
+        self._probe_in_flight = False
+        self.trips += 1
+        self.last_trip_reason = reason
+        print(f"[{self.name}] circuit OPEN for {self.open_seconds:.0f}s: {reason}")
+
+    @property
+    def state(self):
+        with self._lock:
+            self._refresh(time.monotonic())
+            return self._state
+
+    def is_open(self):
+        """True while calls are being rejected (does not use up the half-open probe)."""
+        return self.state == OPEN
+
+    def before_call(self):
+        """Raises error_class if the call must not be made; otherwise lets it through."""
+        now = time.monotonic()
+        with self._lock:
+            self._refresh(now)
+            if self._state == CLOSED:
+                return
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self.rejected += 1
+            retry_in = max(0.0, self.open_seconds - (now - self._opened_at))
+        raise self.error_class(self.name, retry_in)
+
+    def record(self, ok, latency_ms):
+        """Records the outcome of a call that before_call() let through."""
+        bad = not ok or latency_ms > self.slow_call_ms
+        now = time.monotonic()
+        with self._lock:
+            if self._state == HALF_OPEN:
+                if bad:
+                    self._open(now, "probe failed" if not ok else f"probe took {latency_ms:.0f} ms")
+                else:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                    print(f"[{self.name}] circuit closed, upstream recovered")
+                return
+            if self._state == OPEN:
+                # A call that started before the breaker opened; it no longer counts
+                return
+
+            self._outcomes.append(bad)
+            if len(self._outcomes) >= self.min_calls:
+                bad_calls = sum(self._outcomes)
+                if bad_calls / len(self._outcomes) >= self.failure_rate:
+                    self._open(now, f"{bad_calls} of the last {len(self._outcomes)} calls failed or were slow")
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self._lock:
+            self._refresh(now)
+            bad_calls = sum(self._outcomes)
+            return {
+                "state": self._state,
+                "bad_call_rate": round(bad_calls / len(self._outcomes), 2) if self._outcomes else None,
+                "window_calls": len(self._outcomes),
+                "trips": self.trips,
+                "rejected": self.rejected,
+                "last_trip_reason": self.last_trip_reason,
+                "retry_in_s": round(max(0.0, self.open_seconds - (now - self._opened_at)), 1) if self._state == OPEN else None,
+                "slow_call_ms": self.slow_call_ms,
+            }
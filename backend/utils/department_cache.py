@@ -0,0 +1,89 @@
+# backend/utils/department_cache.py
+
+"""
+In-process read-through cache of the departments table.
+
+Departments almost never change, so login and authorization checks are
+served from memory: by name and by a SHA-256 hash of the login key (the raw
+key is never kept in the cache). Each worker re-checks the "departments"
+change counter at most every DEPARTMENT_CACHE_TTL seconds and reloads only
+when it moved, so a write in one worker reaches all of them within that time.
+"""
+
+import hashlib
+import threading
+import time
+
+from config import DEPARTMENT_CACHE_TTL
+from models import Department
+from utils import change_counters
+
+COUNTER_NAME = 'departments'
+
+
+def hash_login_key(login_key):
+    return hashlib.sha256(login_key.encode('utf-8')).hexdigest()
+
+
+class DepartmentCache:
+    """Thread-safe snapshot of all departments, refreshed on version change."""
+
+    def __init__(self, ttl=DEPARTMENT_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        self._by_name = {}
+        self._by_key_hash = {}
+        self._all = []
+
+    def _refresh_if_stale(self):
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.ttl:
+            return
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            if self._version is not None and now - self._checked_at < self.ttl:
+                return
+            version, _ = change_counters.get_version(COUNTER_NAME)
+            if version != self._version:
+                departments = Department.query.order_by(Department.id).all()
+                # Build new dicts and swap them in, so readers never see a partial snapshot
+                self._all = [dept.to_dict() for dept in departments]
+                self._by_name = {dept.name: dept.to_dict() for dept in departments}
+                self._by_key_hash = {hash_login_key(dept.login_key): dept.to_dict() for dept in departments}
+                self._version = version
+            self._checked_at = now
+
+    def all(self):
+        """Returns every department as a dict (id, name), ordered by id."""
+        self._refresh_if_stale()
+        return list(self._all)
+
+    def get_by_name(self, name):
+        self._refresh_if_stale()
+        return self._by_name.get((name or '').upper())
+
+    def get_by_login_key(self, login_key):
+        if not login_key:
+            return None
+        self._refresh_if_stale()
+        return self._by_key_hash.get(hash_login_key(login_key))
+
+    def invalidate(self):
+        """Forces a reload on next access (used after local writes)."""
+        with self._lock:
+            self._version = None
+
+
+department_cache = DepartmentCache()
+
+
+def departments_changed():
+    """
+    Call after adding, renaming or re-keying departments (before committing):
+    bumps the shared version so other workers reload, and drops this
+    worker's snapshot immediately.
+    """
+    change_counters.bump(COUNTER_NAME)
+    department_cache.invalidate()
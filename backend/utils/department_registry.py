@@ -0,0 +1,85 @@
+# backend/utils/department_registry.py
+
+"""
+Single source of truth for the city departments.
+
+The registry drives the default department seeding (app.py), the department
+classification guide in the Gemini instructions (routes/chat.py), the
+validation of department classifications on incident routes and the local
+keyword pre-classifier. Add a new department here and all of them pick it up.
+"""
+
+# Each entry: name (as stored in the DB), development login key, the
+# description used in the chatbot's classification guide, and the lower-case
+# words/phrases the local pre-classifier (utils/pre_classifier.py) looks for.
+DEPARTMENTS = [
+    {"name": "POLICE", "login_key": "policekey",
+     "description": "Criminal activities, suspicious behavior, traffic violations, missing persons, theft, vandalism",
+     "keywords": ["theft", "stolen", "robbery", "robbed", "burglary", "break in", "broke into", "vandalism", "vandalized", "graffiti", "suspicious", "assault", "fight", "gunshot", "shooting", "shots fired", "gun", "weapon", "knife", "missing person", "hit and run", "drunk driver", "reckless driving", "speeding", "trespassing", "drug", "harassment", "crime", "car accident", "accident", "crash"]},
+    {"name": "FIRE", "login_key": "firekey",
+     "description": "Fires, smoke, burning smells, fire hazards, fire safety concerns",
+     "keywords": ["fire", "smoke", "smoking", "burning", "flame", "blaze", "on fire", "explosion", "wildfire", "arson", "burning smell", "smell of smoke"]},
+    {"name": "MEDICAL", "login_key": "medicalkey",
+     "description": "Medical emergencies, injuries, health hazards, public health concerns",
+     "keywords": ["injured", "injury", "injuries", "hurt", "bleeding", "unconscious", "not breathing", "heart attack", "overdose", "seizure", "stroke", "collapsed", "fainted", "ambulance", "medical"]},
+    {"name": "PUBLIC_WORKS", "login_key": "publicworkskey",
+     "description": "Potholes, street lights, road hazards, drainage issues, fallen trees",
+     "keywords": ["pothole", "street light", "streetlight", "sinkhole", "drainage", "storm drain", "clogged drain", "fallen tree", "tree down", "downed tree", "manhole", "road damage", "cracked sidewalk", "water main"]},
+    {"name": "ENVIRONMENT", "login_key": "environmentkey",
+     "description": "Pollution, illegal dumping, hazardous materials, water quality issues",
+     "keywords": ["pollution", "illegal dumping", "dumping", "dumped", "chemical spill", "oil spill", "hazardous waste", "hazardous material", "sewage", "toxic", "contaminated", "dead fish"]},
+    {"name": "ANIMAL_CONTROL", "login_key": "animalkey",
+     "description": "Stray animals, animal cruelty, wildlife concerns, dangerous animals",
+     "keywords": ["stray", "dog", "cat", "raccoon", "coyote", "snake", "bat", "animal", "wildlife", "dead animal", "rabid", "animal bite", "dog bite", "loose dog", "animal cruelty"]},
+    {"name": "BUILDING_SAFETY", "login_key": "buildingsafetykey",
+     "description": "Unsafe structures, building code violations, construction issues",
+     "keywords": ["unsafe building", "unsafe structure", "structural", "building collapse", "scaffolding", "construction site", "building code", "code violation", "crumbling", "abandoned building", "cracked foundation"]},
+    {"name": "TRANSPORTATION", "login_key": "transportationkey",
+     "description": "Traffic signal issues, road signs, public transit problems, parking violations",
+     "keywords": ["traffic light", "traffic signal", "signal", "stop sign", "road sign", "bus stop", "bus", "transit", "train", "parking", "illegally parked", "crosswalk"]},
+    {"name": "PARKS_RECREATION", "login_key": "parkskey",
+     "description": "Park maintenance, playground equipment, public space issues",
+     "keywords": ["park", "playground", "swing", "slide", "bench", "trail", "basketball court", "tennis court", "picnic", "public pool"]},
+    {"name": "UTILITIES", "login_key": "utilitieskey",
+     "description": "Power outages, water leaks, gas leaks, utility emergencies",
+     "keywords": ["power outage", "outage", "no power", "power line", "downed line", "downed power line", "transformer", "gas leak", "smell of gas", "water leak", "leaking water", "water leaking", "burst pipe", "fire hydrant", "hydrant", "no water", "utility"]},
+    {"name": "GENERAL", "login_key": "generalkey",
+     "description": "Anything that does not clearly fit another department",
+     "keywords": []},
+]
+
+# Fallback department when a report can't be classified
+DEFAULT_DEPARTMENT = "GENERAL"
+
+DEPARTMENT_NAMES = frozenset(dept["name"] for dept in DEPARTMENTS)
+
+
+def classification_guide():
+    """
+    Returns the "- NAME: description" lines for the chatbot instructions.
+    The default department is described separately in the prompt text.
+    """
+    return "\n".join(
+        f"- {dept['name']}: {dept['description']}"
+        for dept in DEPARTMENTS
+        if dept["name"] != DEFAULT_DEPARTMENT
+    )
+
+
+def parse_classification(value):
+    """
+    Splits a comma-separated department classification into a list of
+    normalized (upper-case, de-duplicated) department names, keeping order.
+    Example: " police, Fire,POLICE" -> ["POLICE", "FIRE"]
+    """
+    names = []
+    for part in (value or "").split(","):
+        name = part.strip().upper().replace(" ", "_")
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def unknown_departments(names):
+    """Returns the names that are not registered departments."""
+    return [name for name in names if name not in DEPARTMENT_NAMES]
@@ -1,9 +1,72 @@
+import html
 import smtplib
 import ssl
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
-from config import SMTP_SERVER, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD, SENDER_EMAIL, SENDER_NAME, BASE_URL
+from config import SMTP_SERVER, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD, SENDER_EMAIL, SENDER_NAME, BASE_URL, SMTP_USE_TLS, SMTP_TIMEOUT, SMTP_SLOW_CALL_MS
+from utils.circuit_breaker import CircuitBreaker
+
+# Trips when the SMTP server keeps failing or stalling, so a dead mail server
+# costs one fast rejection per email instead of a timeout each
+smtp_breaker = CircuitBreaker('smtp', SMTP_SLOW_CALL_MS)
+
+
+def email_delivery_available():
+    """False while the SMTP circuit breaker is open (sending would fail immediately)."""
+    return not smtp_breaker.is_open()
+
+
+def _is_server_failure(error):
+    """
+    True if a delivery error says the mail server is unreachable or unhealthy
+    (connection, authentication, server-level errors), False if it concerns
+    only this message or address. Only the former count against the breaker,
+    so a few bad subscriber addresses can't stop all email.
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return False
+    # 5xx after DATA: the server rejected this particular message
+    if isinstance(error, smtplib.SMTPDataError) and error.smtp_code >= 500:
+        return False
+    # Addresses that can't be encoded for SMTP fail before anything is sent
+    if isinstance(error, ValueError):
+        return False
+    return True
+
+
+def _send_message(recipient_email, message):
+    """
+    Delivers a prepared message over SMTP (SSL on port 465, STARTTLS otherwise),
+    guarded by the SMTP circuit breaker. Raises CircuitOpenError while the
+    breaker is open, or the SMTP/network error if delivery fails.
+    """
+    smtp_breaker.before_call()
+    started = time.monotonic()
+    ok = False
+    try:
+        context = ssl.create_default_context()
+        if SMTP_PORT == 465:
+            # Use SMTP_SSL for port 465 (SSL/TLS from start)
+            with smtplib.SMTP_SSL(SMTP_SERVER, SMTP_PORT, context=context, timeout=SMTP_TIMEOUT) as server:
+                server.login(SMTP_USERNAME, SMTP_PASSWORD)
+                server.sendmail(SENDER_EMAIL, recipient_email, message.as_string())
+        else:
+            # Use SMTP with starttls for other ports (e.g., 587)
+            with smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=SMTP_TIMEOUT) as server:
+                if SMTP_USE_TLS:
+                    server.starttls(context=context)
+                server.login(SMTP_USERNAME, SMTP_PASSWORD)
+                server.sendmail(SENDER_EMAIL, recipient_email, message.as_string())
+        ok = True
+    except Exception as e:
+        # A refused recipient or message still means the server is working
+        ok = not _is_server_failure(e)
+        raise
+    finally:
+        smtp_breaker.record(ok, (time.monotonic() - started) * 1000.0)
+
 
 def send_incident_alert_email(recipient_email, incident_data):
     """
@@ -116,29 +179,8 @@ CityAlert - Your City, Safer Together
 
         # Send the email with detailed error handling
         print(f"📧 Connecting to SMTP server: {SMTP_SERVER}:{SMTP_PORT}")
-        context = ssl.create_default_context()
-        
-        # --- MODIFICATION START ---
-        if SMTP_PORT == 465:
-            # Use SMTP_SSL for port 465 (SSL/TLS from start)
-            with smtplib.SMTP_SSL(SMTP_SERVER, SMTP_PORT, context=context) as server:
-                print(f"📧 Logging in with username: {SMTP_USERNAME}")
-                server.login(SMTP_USERNAME, SMTP_PASSWORD)
-                
-                print(f"📧 Sending email from {SENDER_EMAIL} to {recipient_email}")
-                server.sendmail(SENDER_EMAIL, recipient_email, message.as_string())
-        else:
-            # Use SMTP with starttls for other ports (e.g., 587)
-            with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-                print("📧 Starting TLS...")
-                server.starttls(context=context)
-                
-                print(f"📧 Logging in with username: {SMTP_USERNAME}")
-                server.login(SMTP_USERNAME, SMTP_PASSWORD)
-                
-                print(f"📧 Sending email from {SENDER_EMAIL} to {recipient_email}")
-                server.sendmail(SENDER_EMAIL, recipient_email, message.as_string())
-        # --- MODIFICATION END ---
+        print(f"📧 Sending email from {SENDER_EMAIL} to {recipient_email}")
+        _send_message(recipient_email, message)
             
         print(f"✅ Alert email sent successfully to {recipient_email}")
         return True
@@ -205,21 +247,7 @@ def send_subscription_confirmation_email(recipient_email):
         message.attach(html_part)
 
         # Send the email
-        context = ssl.create_default_context()
-        
-        # --- MODIFICATION START ---
-        if SMTP_PORT == 465:
-            # Use SMTP_SSL for port 465 (SSL/TLS from start)
-            with smtplib.SMTP_SSL(SMTP_SERVER, SMTP_PORT, context=context) as server:
-                server.login(SMTP_USERNAME, SMTP_PASSWORD)
-                server.sendmail(SENDER_EMAIL, recipient_email, message.as_string())
-        else:
-            # Use SMTP with starttls for other ports (e.g., 587)
-            with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-                server.starttls(context=context)
-                server.login(SMTP_USERNAME, SMTP_PASSWORD)
-                server.sendmail(SENDER_EMAIL, recipient_email, message.as_string())
-        # --- MODIFICATION END ---
+        _send_message(recipient_email, message)
             
         print(f"✓ Confirmation email sent successfully to {recipient_email}")
         return True
@@ -363,17 +391,7 @@ CityAlert - Your City, Safer Together
         message.attach(html_part)
 
         # Send the email with existing SMTP logic
-        context = ssl.create_default_context()
-        
-        if SMTP_PORT == 465:
-            with smtplib.SMTP_SSL(SMTP_SERVER, SMTP_PORT, context=context) as server:
-                server.login(SMTP_USERNAME, SMTP_PASSWORD)
-                server.sendmail(SENDER_EMAIL, recipient_email, message.as_string())
-        else:
-            with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-                server.starttls(context=context)
-                server.login(SMTP_USERNAME, SMTP_PASSWORD)
-                server.sendmail(SENDER_EMAIL, recipient_email, message.as_string())
+        _send_message(recipient_email, message)
             
         print(f"✅ Status update email sent successfully to {recipient_email}")
         return True
@@ -382,3 +400,115 @@ CityAlert - Your City, Safer Together
         print(f"❌ Failed to send status update email to {recipient_email}: {str(e)}")
         print(f"❌ Error type: {type(e).__name__}")
         return False
+
+def send_status_digest_email(recipient_email, changes):
+    """
+    Sends one email summarizing several incident status changes (used by the
+    bulk status endpoint so a subscriber gets one message per batch).
+
+    Args:
+        recipient_email (str): The email address to send the digest to
+        changes (list): Dicts with 'incident' (incident data), 'old_status' and 'new_status'
+    """
+    try:
+        print(f"📧 Attempting to send status digest ({len(changes)} updates) to: {recipient_email}")
+
+        # Validate email configuration
+        if not all([SMTP_SERVER, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD, SENDER_EMAIL]):
+            print("❌ Email configuration incomplete - missing required settings")
+            return False
+
+        message = MIMEMultipart("alternative")
+        message["Subject"] = f"CityAlert: {len(changes)} Incident Status Updates"
+        message["From"] = f"{SENDER_NAME} <{SENDER_EMAIL}>"
+        message["To"] = recipient_email
+
+        # Create status color coding
+        status_colors = {
+            'reported': '#ef4444',     # Red
+            'in_progress': '#f59e0b',  # Yellow/Orange
+            'resolved': '#10b981'      # Green
+        }
+
+        text_lines = []
+        html_items = []
+        for change in changes:
+            incident_data = change['incident']
+            old_status_display = change['old_status'].replace('_', ' ').title()
+            new_status_display = change['new_status'].replace('_', ' ').title()
+            new_status_color = status_colors.get(change['new_status'], '#6b7280')
+            # Descriptions and locations are free text from the public report form
+            description_html = html.escape(incident_data['description'] or '')
+            location_html = html.escape(incident_data['location'] or '')
+            department_html = html.escape(incident_data['department_classification'] or '')
+
+            text_lines.append(
+                f"- {incident_data['description']} ({incident_data['location']}, {incident_data['department_classification']}): "
+                f"{old_status_display} → {new_status_display}"
+            )
+            html_items.append(f"""
+                    <div style="padding: 12px 0; border-bottom: 1px solid #e5e7eb;">
+                        <p style="margin: 0 0 5px 0; color: #1f2937;"><strong>{description_html}</strong></p>
+                        <p style="margin: 0 0 8px 0; color: #6b7280; font-size: 14px;">{location_html} · {department_html}</p>
+                        <span style="background-color: #e5e7eb; color: #374151; padding: 4px 8px; border-radius: 12px; font-size: 12px; text-decoration: line-through;">{old_status_display}</span>
+                        <span style="margin: 0 8px; color: #6b7280;">→</span>
+                        <span style="background-color: {new_status_color}; color: white; padding: 4px 8px; border-radius: 12px; font-size: 12px; font-weight: bold;">{new_status_display}</span>
+                    </div>""")
+
+        newline = "\n"
+        text_content = f"""
+CityAlert Status Updates
+
+{len(changes)} incidents you may be interested in have been updated:
+
+{newline.join(text_lines)}
+
+View all current alerts: {BASE_URL}/public/alerts.html
+
+To unsubscribe from these alerts, visit: {BASE_URL}/api/subscriptions/unsubscribe?email={recipient_email}
+
+---
+CityAlert - Your City, Safer Together
+        """
+
+        html_content = f"""
+        <html>
+        <body style="font-family: Arial, sans-serif; margin: 0; padding: 20px; background-color: #f5f5f5;">
+            <div style="max-width: 600px; margin: 0 auto; background-color: white; padding: 30px; border-radius: 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.1);">
+                <div style="text-align: center; margin-bottom: 30px;">
+                    <h1 style="color: #2563eb; margin: 0; font-size: 28px;">CityAlert</h1>
+                    <p style="color: #6b7280; margin: 5px 0 0 0;">Status Updates</p>
+                </div>
+
+                <div style="background-color: #f8fafc; padding: 20px; border-radius: 8px; border-left: 4px solid #3b82f6; margin-bottom: 20px;">
+                    <h2 style="color: #1f2937; margin: 0 0 10px 0; font-size: 20px;">{len(changes)} Incidents Updated</h2>
+                    {"".join(html_items)}
+                </div>
+
+                <div style="text-align: center; margin-bottom: 20px;">
+                    <a href="{BASE_URL}/public/alerts.html" style="background-color: #3b82f6; color: white; padding: 12px 24px; text-decoration: none; border-radius: 6px; font-weight: bold; display: inline-block;">View All Current Alerts</a>
+                </div>
+
+                <div style="text-align: center; padding-top: 20px; border-top: 1px solid #e5e7eb;">
+                    <p style="color: #6b7280; font-size: 14px; margin: 0;">
+                        <a href="{BASE_URL}/api/subscriptions/unsubscribe?email={recipient_email}" style="color: #6b7280; text-decoration: underline;">Unsubscribe</a> from these alerts
+                    </p>
+                    <p style="color: #9ca3af; font-size: 12px; margin: 10px 0 0 0;">CityAlert - Your City, Safer Together</p>
+                </div>
+            </div>
+        </body>
+        </html>
+        """
+
+        message.attach(MIMEText(text_content, "plain"))
+        message.attach(MIMEText(html_content, "html"))
+
+        _send_message(recipient_email, message)
+
+        print(f"✅ Status digest sent successfully to {recipient_email}")
+        return True
+
+    except Exception as e:
+        print(f"❌ Failed to send status digest to {recipient_email}: {str(e)}")
+        print(f"❌ Error type: {type(e).__name__}")
+        return False
@@ -0,0 +1,45 @@
+# backend/utils/fast_json.py
+
+"""
+Lean JSON responses for the list endpoints.
+
+The list routes select only the columns they return (plain row tuples, no
+ORM instances) and hand them to json_response(), which encodes with orjson
+when it is installed. orjson writes datetimes itself, in the same format as
+datetime.isoformat(), so rows don't need a per-row isoformat() call. Without
+orjson the standard json module is used, with the same output.
+"""
+
+import json
+from datetime import date, datetime
+
+from flask import Response
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+
+def _default(value):
+    # Only reached on the fallback encoder; orjson handles datetimes natively
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(data):
+    """Encodes data (dicts, lists, str/int/float/bool/None, datetimes) to UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def records(columns, rows):
+    """Turns row tuples into dicts keyed by column name."""
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def json_response(data, status=200):
+    """A JSON Response, like jsonify(data) but encoded with dumps()."""
+    return Response(dumps(data), status=status, mimetype='application/json')
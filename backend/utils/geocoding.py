@@ -2,12 +2,61 @@
 
 import requests
 import json
-from config import GOOGLE_MAPS_API_KEY
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from config import GOOGLE_MAPS_API_KEY, GEOCODING_API_URL, GEOCODE_CACHE_SIZE, GEOCODE_CACHE_TTL, GEOCODE_BATCH_CONCURRENCY
+from utils.http_client import geocoding_client
+
+
+class GeocodeCache:
+    """
+    LRU of address -> (latitude, longitude), expiring entries after a TTL.
+    Only definitive answers are cached (a match, or ZERO_RESULTS as (None, None));
+    errors and timeouts are retried on the next call.
+    """
+
+    def __init__(self, max_entries=GEOCODE_CACHE_SIZE, ttl=GEOCODE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # normalized address -> (stored_at, (lat, lng))
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(address):
+        return ' '.join(address.lower().split())
+
+    def get(self, address):
+        """Returns the cached (lat, lng), or None on a miss."""
+        key = self.normalize(address)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, address, coordinates):
+        key = self.normalize(address)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), coordinates)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+geocode_cache = GeocodeCache()
+
 
 def geocode_address(address):
     """
     Converts a human-readable address to latitude and longitude coordinates
-    using Google's Geocoding API.
+    using Google's Geocoding API. Results are cached per worker (GEOCODE_CACHE_*).
     
     Args:
         address (str): The human-readable address to geocode
@@ -27,12 +76,15 @@ def geocode_address(address):
         print("WARNING: Google Maps API key not configured")
         return None, None
     
+    # Clean up the address - remove extra whitespace
+    clean_address = address.strip()
+    cached = geocode_cache.get(clean_address)
+    if cached is not None:
+        return cached
+
     try:
-        # Clean up the address - remove extra whitespace
-        clean_address = address.strip()
-        
         # Google Geocoding API endpoint
-        base_url = "https://maps.googleapis.com/maps/api/geocode/json"
+        base_url = GEOCODING_API_URL
         
         # Parameters for the API request
         params = {
@@ -42,8 +94,8 @@ def geocode_address(address):
         
         print(f"Geocoding address: {clean_address}")
         
-        # Make the API request
-        response = requests.get(base_url, params=params, timeout=10)
+        # Make the API request (pooled connection; timeouts and retries per GEOCODING_* settings)
+        response = geocoding_client.get(base_url, params=params)
         response.raise_for_status()  # Raise an exception for bad status codes
         
         # Parse the JSON response
@@ -57,10 +109,12 @@ def geocode_address(address):
             longitude = location['lng']
             
             print(f"✓ Geocoded '{clean_address}' to ({latitude}, {longitude})")
+            geocode_cache.put(clean_address, (latitude, longitude))
             return latitude, longitude
             
         elif data['status'] == 'ZERO_RESULTS':
             print(f"WARNING: No results found for address: {clean_address}")
+            geocode_cache.put(clean_address, (None, None))
             return None, None
             
         elif data['status'] == 'OVER_QUERY_LIMIT':
@@ -95,6 +149,36 @@ def geocode_address(address):
         print(f"ERROR: Unexpected error during geocoding: {e}")
         return None, None
 
+def geocode_addresses(addresses, max_workers=GEOCODE_BATCH_CONCURRENCY):
+    """
+    Geocodes many addresses at once for bulk work. Each distinct address is
+    looked up once (cache first), and cache misses are sent to the API in
+    parallel over the pooled geocoding client.
+
+    Args:
+        addresses (iterable of str): Addresses, duplicates allowed
+
+    Returns:
+        dict: {address: (latitude, longitude)}, with (None, None) for failures
+    """
+    results = {}
+    pending = []
+    for address in set(addresses):
+        cached = geocode_cache.get(address.strip()) if address and address.strip() else (None, None)
+        if cached is not None:
+            results[address] = cached
+        else:
+            pending.append(address)
+
+    if len(pending) == 1 or max_workers <= 1:
+        for address in pending:
+            results[address] = geocode_address(address)
+    elif pending:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+            for address, coordinates in zip(pending, executor.map(geocode_address, pending)):
+                results[address] = coordinates
+    return results
+
 def reverse_geocode(latitude, longitude):
     """
     Converts latitude and longitude coordinates to a human-readable address.
@@ -113,7 +197,7 @@ def reverse_geocode(latitude, longitude):
     
     try:
         # Google Reverse Geocoding API endpoint
-        base_url = "https://maps.googleapis.com/maps/api/geocode/json"
+        base_url = GEOCODING_API_URL
         
         # Parameters for the API request
         params = {
@@ -123,8 +207,8 @@ def reverse_geocode(latitude, longitude):
         
         print(f"Reverse geocoding coordinates: ({latitude}, {longitude})")
         
-        # Make the API request
-        response = requests.get(base_url, params=params, timeout=10)
+        # Make the API request (pooled connection; timeouts and retries per GEOCODING_* settings)
+        response = geocoding_client.get(base_url, params=params)
         response.raise_for_status()
         
         # Parse the JSON response
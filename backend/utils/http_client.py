@@ -0,0 +1,236 @@
+# backend/utils/http_client.py
+
+"""
+Shared outbound HTTP client for the external APIs (Gemini, Google Geocoding).
+
+Each upstream gets one UpstreamClient per worker process, wrapping a
+requests.Session so connections are kept alive and reused instead of paying
+DNS, TCP and TLS setup on every call. On top of the session it adds:
+
+- per-upstream (connect, read) timeouts, so a slow upstream can never hang a
+  request thread indefinitely,
+- bounded retries with jittered exponential backoff for connection errors,
+  timeouts and retryable HTTP statuses (429 and 5xx),
+- a circuit breaker per upstream (utils/circuit_breaker.py) that fails calls
+  fast with UpstreamUnavailable while the upstream is erroring or too slow,
+- counters, latency figures and breaker state per upstream, exposed at
+  GET /api/monitoring/upstreams (see routes/monitoring.py).
+
+UpstreamUnavailable is a requests.exceptions.RequestException, so callers'
+existing network-error handling doubles as their degraded mode.
+
+Usage:
+    from utils.http_client import gemini_client
+    response = gemini_client.post(url, json=payload)
+"""
+
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import (
+    HTTP_POOL_SIZE, HTTP_RETRY_BACKOFF, HTTP_RETRY_BACKOFF_MAX,
+    GEMINI_CONNECT_TIMEOUT, GEMINI_READ_TIMEOUT, GEMINI_MAX_RETRIES, GEMINI_SLOW_CALL_MS,
+    GEOCODING_CONNECT_TIMEOUT, GEOCODING_READ_TIMEOUT, GEOCODING_MAX_RETRIES, GEOCODING_SLOW_CALL_MS,
+)
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+# Responses worth retrying: rate limited, or a transient server-side failure
+RETRYABLE_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+# Number of recent call latencies kept per upstream for the percentiles
+LATENCY_WINDOW = 500
+
+
+class UpstreamUnavailable(CircuitOpenError, requests.exceptions.ConnectionError):
+    """Raised without contacting the upstream while its circuit breaker is open."""
+
+
+class UpstreamMetrics:
+    """Thread-safe call counters and a rolling latency window for one upstream."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.retries = 0
+        self.last_error = None
+        self._latencies_ms = deque(maxlen=LATENCY_WINDOW)
+
+    def record_attempt(self, latency_ms):
+        with self._lock:
+            self.requests += 1
+            self._latencies_ms.append(latency_ms)
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_result(self, ok, error=None):
+        with self._lock:
+            if ok:
+                self.successes += 1
+            else:
+                self.failures += 1
+                self.last_error = error
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self._latencies_ms)
+            snapshot = {
+                "requests": self.requests,
+                "successes": self.successes,
+                "failures": self.failures,
+                "retries": self.retries,
+                "last_error": self.last_error,
+            }
+        snapshot["latency_ms"] = {
+            "samples": len(latencies),
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+            "max": round(latencies[-1], 1) if latencies else None,
+        }
+        return snapshot
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return round(sorted_values[index], 1)
+
+
+class UpstreamClient:
+    """
+    Pooled, retrying HTTP client for a single upstream service.
+
+    Args:
+        name (str): Label used in logs and metrics, e.g. 'gemini'.
+        connect_timeout (float): Seconds to wait for a TCP/TLS connection.
+        read_timeout (float): Seconds to wait between bytes of the response.
+        max_retries (int): Extra attempts after the first one fails.
+        slow_call_ms (float): Attempts slower than this count against the circuit breaker.
+        pool_size (int): Keep-alive connections kept per host.
+    """
+
+    def __init__(self, name, connect_timeout, read_timeout, max_retries, slow_call_ms,
+                 pool_size=HTTP_POOL_SIZE, backoff=HTTP_RETRY_BACKOFF, backoff_max=HTTP_RETRY_BACKOFF_MAX):
+        self.name = name
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.metrics = UpstreamMetrics()
+        self.breaker = CircuitBreaker(name, slow_call_ms, error_class=UpstreamUnavailable)
+
+        self.session = requests.Session()
+        # Retries are handled in request() so they can be counted and jittered;
+        # pool_block=False lets bursts open extra (non-pooled) connections
+        # rather than queueing behind the pool.
+        self._adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', self._adapter)
+        self.session.mount('http://', self._adapter)
+
+    def _backoff_delay(self, attempt):
+        """Full-jitter exponential backoff: uniform(0, min(max, base * 2^attempt))."""
+        return random.uniform(0, min(self.backoff_max, self.backoff * (2 ** attempt)))
+
+    def request(self, method, url, **kwargs):
+        """
+        Sends a request, retrying transient failures up to max_retries times.
+
+        Returns the final requests.Response (which may still be an error
+        status once retries are exhausted), or raises the last
+        requests.exceptions.RequestException if no response was received.
+        Raises UpstreamUnavailable straight away (or instead of a retry)
+        while the circuit breaker is open.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        attempt = 0
+        while True:
+            try:
+                self.breaker.before_call()
+            except UpstreamUnavailable as e:
+                self.metrics.record_result(False, "circuit open")
+                print(f"[{self.name}] {e}")
+                raise
+            started = time.monotonic()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                latency_ms = (time.monotonic() - started) * 1000.0
+                self.metrics.record_attempt(latency_ms)
+                self.breaker.record(False, latency_ms)
+                if attempt >= self.max_retries:
+                    self.metrics.record_result(False, type(e).__name__)
+                    raise
+                error = type(e).__name__
+            except Exception:
+                self.breaker.record(False, (time.monotonic() - started) * 1000.0)
+                raise
+            else:
+                latency_ms = (time.monotonic() - started) * 1000.0
+                self.metrics.record_attempt(latency_ms)
+                self.breaker.record(response.status_code not in RETRYABLE_STATUSES, latency_ms)
+                if response.status_code not in RETRYABLE_STATUSES or attempt >= self.max_retries:
+                    ok = response.status_code < 400
+                    self.metrics.record_result(ok, None if ok else f"HTTP {response.status_code}")
+                    return response
+                error = f"HTTP {response.status_code}"
+                # Release the connection back to the pool before sleeping
+                response.close()
+
+            delay = self._backoff_delay(attempt)
+            attempt += 1
+            self.metrics.record_retry()
+            print(f"[{self.name}] {error}, retrying in {delay:.2f}s (attempt {attempt + 1} of {self.max_retries + 1})")
+            time.sleep(delay)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def connection_stats(self):
+        """
+        New connections opened vs. requests sent over them, summed over the
+        session's connection pools. A reuse ratio near 1.0 means almost every
+        call skipped DNS, TCP and TLS setup.
+        """
+        opened = sent = 0
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                sent += pool.num_requests
+        return {
+            "opened": opened,
+            "requests": sent,
+            "reuse_ratio": round(1 - opened / sent, 3) if sent else None,
+        }
+
+    def stats(self):
+        stats = self.metrics.snapshot()
+        stats["connections"] = self.connection_stats()
+        stats["timeout_s"] = {"connect": self.timeout[0], "read": self.timeout[1]}
+        stats["max_retries"] = self.max_retries
+        stats["circuit"] = self.breaker.snapshot()
+        return stats
+
+
+gemini_client = UpstreamClient('gemini', GEMINI_CONNECT_TIMEOUT, GEMINI_READ_TIMEOUT, GEMINI_MAX_RETRIES, GEMINI_SLOW_CALL_MS)
+geocoding_client = UpstreamClient('geocoding', GEOCODING_CONNECT_TIMEOUT, GEOCODING_READ_TIMEOUT, GEOCODING_MAX_RETRIES, GEOCODING_SLOW_CALL_MS)
+
+UPSTREAM_CLIENTS = {client.name: client for client in (gemini_client, geocoding_client)}
+
+
+def upstream_stats():
+    """Returns {upstream name: stats()} for every shared client in this worker."""
+    return {name: client.stats() for name, client in UPSTREAM_CLIENTS.items()}
@@ -0,0 +1,219 @@
+# backend/utils/idempotency.py
+
+"""
+Idempotency-Key support for request handlers with side effects.
+
+A client that may send the same request twice (a retry after a timeout, a
+double click) puts a random Idempotency-Key header on it. The first request
+with a key runs normally and its response is stored; later requests with
+the same key and the same body get that stored response back (marked with
+"Idempotent-Replayed: true") without the handler running again, so no second
+incident, geocoding call or email fan-out. Keys expire after IDEMPOTENCY_TTL
+seconds.
+
+- Same key, different body: 422 (the key was reused for another request).
+- Same key while the first request is still running: 409 with Retry-After.
+- Server errors (5xx) and 429s are not stored, so those can be retried.
+
+Records live in a per-worker dict ('memory') or in the idempotency_records
+table ('database', needed for retries to be caught across gunicorn workers),
+selected with IDEMPOTENCY_BACKEND.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import Response, current_app, jsonify, request
+from sqlalchemy.exc import IntegrityError
+
+from config import IDEMPOTENCY_BACKEND, IDEMPOTENCY_TTL
+from database import db
+from models import IdempotencyRecord
+
+# Longest accepted header value (UUIDs are 36 characters)
+MAX_KEY_LENGTH = 128
+
+# A request still marked as running after this many seconds is assumed to have
+# died with its worker (gunicorn kills requests after GUNICORN_TIMEOUT)
+IN_PROGRESS_TIMEOUT = 120
+
+# Most records the memory backend keeps per worker
+MAX_MEMORY_RECORDS = 10000
+
+# The database backend deletes expired records once every this many new keys per worker
+PURGE_EVERY = 200
+
+# Outcomes of IdempotencyStore.begin()
+NEW = 'new'
+REPLAY = 'replay'
+MISMATCH = 'mismatch'
+IN_PROGRESS = 'in_progress'
+
+
+def request_fingerprint():
+    """SHA-256 of the method, path and raw body, to tell a retry from a different request."""
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {request.path}\n".encode('utf-8'))
+    digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+
+class MemoryIdempotencyStore:
+    """Per-process idempotency records, evicted by age and count."""
+
+    def __init__(self, ttl=IDEMPOTENCY_TTL, max_records=MAX_MEMORY_RECORDS):
+        self.ttl = ttl
+        self.max_records = max_records
+        self._lock = threading.Lock()
+        self._records = OrderedDict()  # key -> [created_at, fingerprint, status_code, body]
+
+    def _evict(self, now):
+        # Records are kept in creation order, so expired ones are at the front
+        while self._records:
+            key, (created_at, _, _, _) = next(iter(self._records.items()))
+            if now - created_at <= self.ttl and len(self._records) <= self.max_records:
+                break
+            del self._records[key]
+
+    def begin(self, key, fingerprint):
+        """
+        Claims a key for a new request. Returns (outcome, stored), where stored
+        is (status_code, body) for a REPLAY and None otherwise.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            record = self._records.get(key)
+            if record is not None and record[2] is None and now - record[0] > IN_PROGRESS_TIMEOUT:
+                record = None
+            if record is None:
+                self._records[key] = [now, fingerprint, None, None]
+                self._records.move_to_end(key)
+                return NEW, None
+            if record[1] != fingerprint:
+                return MISMATCH, None
+            if record[2] is None:
+                return IN_PROGRESS, None
+            return REPLAY, (record[2], record[3])
+
+    def complete(self, key, status_code, body):
+        with self._lock:
+            record = self._records.get(key)
+            if record is not None:
+                record[2] = status_code
+                record[3] = body
+
+    def release(self, key):
+        with self._lock:
+            self._records.pop(key, None)
+
+
+class DatabaseIdempotencyStore:
+    """Idempotency records in the idempotency_records table (shared by all workers)."""
+
+    def __init__(self, ttl=IDEMPOTENCY_TTL):
+        self.ttl = ttl
+        self._claims = 0
+
+    def begin(self, key, fingerprint):
+        now = datetime.utcnow()
+        record = db.session.get(IdempotencyRecord, key)
+        stale = record is not None and (
+            record.created_at < now - timedelta(seconds=self.ttl)
+            or (record.status_code is None and record.created_at < now - timedelta(seconds=IN_PROGRESS_TIMEOUT))
+        )
+        if record is not None and not stale:
+            if record.fingerprint != fingerprint:
+                return MISMATCH, None
+            if record.status_code is None:
+                return IN_PROGRESS, None
+            return REPLAY, (record.status_code, record.response_body)
+
+        if stale:
+            db.session.delete(record)
+            db.session.flush()
+        db.session.add(IdempotencyRecord(key=key, fingerprint=fingerprint, created_at=now))
+        self._claims += 1
+        if self._claims % PURGE_EVERY == 0:
+            IdempotencyRecord.query.filter(
+                IdempotencyRecord.created_at < now - timedelta(seconds=self.ttl)
+            ).delete(synchronize_session=False)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another worker claimed the key between our read and insert
+            db.session.rollback()
+            return IN_PROGRESS, None
+        return NEW, None
+
+    def complete(self, key, status_code, body):
+        # The handler may have left a failed transaction behind
+        db.session.rollback()
+        IdempotencyRecord.query.filter(IdempotencyRecord.key == key).update(
+            {'status_code': status_code, 'response_body': body}, synchronize_session=False
+        )
+        db.session.commit()
+
+    def release(self, key):
+        db.session.rollback()
+        IdempotencyRecord.query.filter(IdempotencyRecord.key == key).delete(synchronize_session=False)
+        db.session.commit()
+
+
+def create_store(backend=IDEMPOTENCY_BACKEND):
+    if backend == 'database':
+        return DatabaseIdempotencyStore()
+    if backend != 'memory':
+        print(f"WARNING: Unknown IDEMPOTENCY_BACKEND '{backend}', using in-memory idempotency records")
+    return MemoryIdempotencyStore()
+
+
+idempotency_store = create_store()
+
+
+def idempotent(scope):
+    """
+    Route decorator honouring the Idempotency-Key header. Requests without
+    the header are handled as before. `scope` namespaces the keys per endpoint.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            header = request.headers.get('Idempotency-Key', '').strip()
+            if not header:
+                return view(*args, **kwargs)
+            if len(header) > MAX_KEY_LENGTH:
+                return jsonify({"error": f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters"}), 400
+
+            key = f"{scope}:{header}"
+            outcome, stored = idempotency_store.begin(key, request_fingerprint())
+            if outcome == REPLAY:
+                status_code, body = stored
+                print(f"Idempotency-Key replay for {scope} (status {status_code})")
+                response = Response(body, status=status_code, mimetype='application/json')
+                response.headers['Idempotent-Replayed'] = 'true'
+                return response
+            if outcome == MISMATCH:
+                return jsonify({"error": "This Idempotency-Key was already used for a different request"}), 422
+            if outcome == IN_PROGRESS:
+                response = jsonify({"error": "A request with this Idempotency-Key is still being processed"})
+                response.status_code = 409
+                response.headers['Retry-After'] = '1'
+                return response
+
+            try:
+                response = current_app.make_response(view(*args, **kwargs))
+            except Exception:
+                idempotency_store.release(key)
+                raise
+            if response.status_code >= 500 or response.status_code == 429:
+                idempotency_store.release(key)
+            else:
+                idempotency_store.complete(key, response.status_code, response.get_data(as_text=True))
+            return response
+        return wrapper
+    return decorator
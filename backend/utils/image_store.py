@@ -0,0 +1,149 @@
+# backend/utils/image_store.py
+
+"""
+Single ingestion path for report images.
+
+An image is uploaded once (POST /api/images, see routes/images.py), checked,
+and written to the uploads directory under a content-derived name. That name
+is the image's handle ("imageId"): chat messages reference it with
+{"imageId": ...} parts and create_incident accepts it as "image_id", so the
+bytes never travel from the browser again.
+
+The Gemini proxy still has to send images inline; inline_data() base64-encodes
+each image at most once per worker and keeps the result in a size-bounded
+LRU cache for the following turns.
+"""
+
+import base64
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from config import UPLOADS_DIR, IMAGE_MAX_BYTES, IMAGE_INLINE_CACHE_BYTES
+
+# File extension per accepted image type
+IMAGE_TYPES = {
+    'image/png': 'png',
+    'image/jpeg': 'jpg',
+    'image/gif': 'gif',
+    'image/webp': 'webp',
+}
+MIME_TYPES = {extension: mime_type for mime_type, extension in IMAGE_TYPES.items()}
+
+# Handles look like "img_<32 hex chars>.<ext>"; anything else is rejected before touching the filesystem
+IMAGE_ID_PATTERN = re.compile(r'^img_[0-9a-f]{32}\.(png|jpg|gif|webp)$')
+
+
+def sniff_mime_type(image_bytes):
+    """Identifies the image type from its magic bytes (the client's claim isn't trusted)."""
+    if image_bytes.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if image_bytes.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if image_bytes.startswith((b'GIF87a', b'GIF89a')):
+        return 'image/gif'
+    if image_bytes[:4] == b'RIFF' and image_bytes[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def _handle(image_id, size):
+    extension = image_id.rsplit('.', 1)[1]
+    return {
+        "imageId": image_id,
+        "url": f"/uploads/{image_id}",
+        "mimeType": MIME_TYPES[extension],
+        "size": size,
+    }
+
+
+def store_image(image_bytes):
+    """
+    Validates and stores an image, returning (handle, None) or (None, error message).
+    Identical uploads map to the same file, so storing twice costs nothing.
+    """
+    if not image_bytes:
+        return None, "Image is empty"
+    if len(image_bytes) > IMAGE_MAX_BYTES:
+        return None, f"Image is larger than {IMAGE_MAX_BYTES // (1024 * 1024)} MB"
+    mime_type = sniff_mime_type(image_bytes)
+    if mime_type is None:
+        return None, "Unsupported image type (use PNG, JPEG, GIF or WebP)"
+
+    image_id = f"img_{hashlib.sha256(image_bytes).hexdigest()[:32]}.{IMAGE_TYPES[mime_type]}"
+    path = os.path.join(UPLOADS_DIR, image_id)
+    if not os.path.exists(path):
+        os.makedirs(UPLOADS_DIR, exist_ok=True)
+        # Write to a temporary name first so readers never see a partial file
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(image_bytes)
+        os.replace(temp_path, path)
+        print(f"✓ Image stored as: {image_id} ({len(image_bytes)} bytes)")
+    return _handle(image_id, len(image_bytes)), None
+
+
+def store_data_uri(data_uri):
+    """Decodes a 'data:image/...;base64,...' URI (legacy clients) and stores it."""
+    try:
+        _, encoded = data_uri.split(',', 1)
+        image_bytes = base64.b64decode(encoded, validate=True)
+    except (ValueError, TypeError):
+        return None, "Invalid base64 image data"
+    return store_image(image_bytes)
+
+
+def get_image(image_id):
+    """Returns the handle of a stored image, or None if the ID is invalid or unknown."""
+    if not isinstance(image_id, str) or not IMAGE_ID_PATTERN.match(image_id):
+        return None
+    try:
+        size = os.path.getsize(os.path.join(UPLOADS_DIR, image_id))
+    except OSError:
+        return None
+    return _handle(image_id, size)
+
+
+class InlineDataCache:
+    """LRU of base64-encoded images, bounded by total encoded size."""
+
+    def __init__(self, max_bytes=IMAGE_INLINE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # image_id -> base64 str
+        self._size = 0
+
+    def get(self, image_id):
+        """
+        Returns {'mimeType', 'data'} for a Gemini inlineData part, or None if
+        the image doesn't exist.
+        """
+        with self._lock:
+            encoded = self._entries.get(image_id)
+            if encoded is not None:
+                self._entries.move_to_end(image_id)
+
+        if encoded is None:
+            handle = get_image(image_id)
+            if handle is None:
+                return None
+            with open(os.path.join(UPLOADS_DIR, image_id), 'rb') as f:
+                encoded = base64.b64encode(f.read()).decode('ascii')
+            with self._lock:
+                if image_id not in self._entries:
+                    self._entries[image_id] = encoded
+                    self._size += len(encoded)
+                    while self._size > self.max_bytes and len(self._entries) > 1:
+                        _, evicted = self._entries.popitem(last=False)
+                        self._size -= len(evicted)
+
+        return {"mimeType": MIME_TYPES[image_id.rsplit('.', 1)[1]], "data": encoded}
+
+
+inline_data_cache = InlineDataCache()
+
+
+def inline_data(image_id):
+    return inline_data_cache.get(image_id)
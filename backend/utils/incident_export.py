@@ -0,0 +1,144 @@
+# backend/utils/incident_export.py
+
+"""
+Streaming incident export (GET /api/incidents/export).
+
+Rows are read with a server-side cursor (stream_results + yield_per) in
+batches of EXPORT_BATCH_SIZE plain tuples, with no ORM objects, and each batch is
+encoded and sent before the next is fetched. Memory use stays flat no matter
+how many incidents match; a long export only holds one database connection
+open for its duration.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+
+from database import db
+from models import Incident, INCIDENT_STATUSES
+from utils.department_registry import DEPARTMENT_NAMES
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Same fields, in the same order, as Incident.to_dict()
+EXPORT_COLUMNS = Incident.FIELDS
+
+# Rows fetched from the cursor (and encoded into one response chunk) at a time
+EXPORT_BATCH_SIZE = 1000
+
+
+class ExportFilterError(ValueError):
+    """An invalid export query parameter; the message is returned to the client."""
+
+
+def _parse_time(args, name):
+    value = (args.get(name) or '').strip()
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ExportFilterError(f"{name} must be an ISO 8601 date or time, e.g. 2024-05-01 or 2024-05-01T14:30:00Z")
+    # Timestamps are stored as naive UTC
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_filters(args):
+    """
+    Reads the export filters from request args:
+        since, until: ISO 8601 bounds on the report time (since inclusive, until exclusive)
+        department: a department name
+        status: one or more comma-separated statuses
+    """
+    filters = {'since': _parse_time(args, 'since'), 'until': _parse_time(args, 'until')}
+
+    department = (args.get('department') or '').strip().upper()
+    if department and department not in DEPARTMENT_NAMES:
+        raise ExportFilterError(f"Unknown department: {department}")
+    filters['department'] = department or None
+
+    statuses = [status.strip().lower() for status in (args.get('status') or '').split(',') if status.strip()]
+    unknown = [status for status in statuses if status not in INCIDENT_STATUSES]
+    if unknown:
+        raise ExportFilterError(f"Unknown status: {', '.join(unknown)}")
+    filters['statuses'] = statuses
+    return filters
+
+
+def apply_filters(statement, filters):
+    """Adds the WHERE clauses for parsed filters to a SELECT on incidents."""
+    if filters['since']:
+        statement = statement.where(Incident.timestamp >= filters['since'])
+    if filters['until']:
+        statement = statement.where(Incident.timestamp < filters['until'])
+    if filters['statuses']:
+        statement = statement.where(Incident.status.in_(filters['statuses']))
+    if filters['department']:
+        # department_classification is a comma-separated list, e.g. "POLICE,FIRE"
+        department = filters['department']
+        statement = statement.where(db.or_(
+            Incident.department_classification == department,
+            Incident.department_classification.like(f"{department},%"),
+            Incident.department_classification.like(f"%,{department}"),
+            Incident.department_classification.like(f"%,{department},%"),
+        ))
+    return statement
+
+
+def export_statement(filters):
+    """SELECT of the export columns matching the filters, in id order."""
+    statement = select(*[getattr(Incident, column) for column in EXPORT_COLUMNS]).order_by(Incident.id)
+    return apply_filters(statement, filters)
+
+
+def iter_row_batches(statement, batch_size=EXPORT_BATCH_SIZE):
+    """Yields lists of row tuples from a server-side cursor."""
+    # yield_per makes the ORM fetch batch by batch from a server-side cursor
+    # instead of buffering the whole result first
+    result = db.session.execute(statement.execution_options(stream_results=True, yield_per=batch_size))
+    try:
+        for partition in result.partitions(batch_size):
+            yield partition
+    finally:
+        result.close()
+
+
+def _record(row):
+    record = dict(zip(EXPORT_COLUMNS, row))
+    record['timestamp'] = record['timestamp'].isoformat()
+    return record
+
+
+def ndjson_chunks(batches):
+    """One JSON object per line, one response chunk per batch."""
+    for batch in batches:
+        yield ''.join(json.dumps(_record(row), ensure_ascii=False) + '\n' for row in batch)
+
+
+def csv_chunks(batches):
+    """A header line, then one CSV row per incident, one response chunk per batch."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue()
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in batch:
+            record = _record(row)
+            writer.writerow(['' if record[column] is None else record[column] for column in EXPORT_COLUMNS])
+        yield buffer.getvalue()
+
+
+def export_chunks(filters, fmt):
+    """Generator of encoded response chunks for the matching incidents."""
+    batches = iter_row_batches(export_statement(filters))
+    return csv_chunks(batches) if fmt == 'csv' else ndjson_chunks(batches)
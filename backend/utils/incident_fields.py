@@ -0,0 +1,46 @@
+# backend/utils/incident_fields.py
+
+"""
+Field selection for the incident list endpoints.
+
+Clients that poll often, or only plot markers, can ask for less than the
+full Incident.to_dict() payload:
+    ?view=summary          id, department_classification, status, latitude, longitude, timestamp
+    ?fields=id,status      any subset of Incident.FIELDS (id is always included)
+Only the selected columns are read from the database.
+"""
+
+from models import Incident
+
+VIEWS = {
+    'full': Incident.FIELDS,
+    'summary': Incident.SUMMARY_FIELDS,
+}
+
+
+class FieldSelectionError(ValueError):
+    """An invalid fields/view parameter; the message is returned to the client."""
+
+
+def selected_fields(args):
+    """Reads ?fields= or ?view= from request args and returns the field names, in to_dict() order."""
+    requested = (args.get('fields') or '').strip()
+    view = (args.get('view') or '').strip().lower()
+    if requested and view:
+        raise FieldSelectionError("Use either fields or view, not both")
+
+    if not requested:
+        if view and view not in VIEWS:
+            raise FieldSelectionError(f"view must be one of: {', '.join(VIEWS)}")
+        return VIEWS[view or 'full']
+
+    names = {name.strip().lower() for name in requested.split(',') if name.strip()}
+    unknown = sorted(names - set(Incident.FIELDS))
+    if unknown:
+        raise FieldSelectionError(f"Unknown field: {', '.join(unknown)} (available: {', '.join(Incident.FIELDS)})")
+    return tuple(field for field in Incident.FIELDS if field in names or field == 'id')
+
+
+def columns(fields):
+    """The Incident columns for a list of field names, to pass to db.session.query()."""
+    return [getattr(Incident, field) for field in fields]
@@ -0,0 +1,120 @@
+# backend/utils/incident_search.py
+
+"""
+Full-text search over incident descriptions and locations
+(GET /api/incidents/search).
+
+The index is created by migrations/v0007_incident_search.py and kept up to
+date by the database itself (FTS5 triggers on SQLite, a GIN expression index
+on PostgreSQL), so writers don't have to do anything.
+
+Queries are reduced to plain words, all of which must match; words are
+stemmed ("burning" finds "burn"). There is no prefix matching: a short
+prefix can expand to a large share of the index, and ranking that many rows
+takes far longer than an exact lookup. Results are ranked with bm25 (SQLite) or ts_rank_cd (PostgreSQL),
+description matches weighing more than location matches, and can be
+narrowed with the same filters as the export (department, status, since,
+until).
+"""
+
+import re
+
+from sqlalchemy import column, func, literal_column, select, table, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from database import db
+from models import Incident
+from utils.fast_json import records
+from utils.incident_export import apply_filters
+from utils.incident_fields import columns
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+# Longest query and most words looked at; the rest is ignored
+MAX_QUERY_LENGTH = 200
+MAX_TERMS = 12
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+# The expression the PostgreSQL GIN index is built on (migrations/v0007_incident_search.py
+# imports it from here); queries must use it verbatim for the planner to use the index
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(description, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(location, '')), 'B')"
+)
+
+
+class SearchQueryError(ValueError):
+    """An unusable search query; the message is returned to the client."""
+
+
+class SearchUnavailableError(RuntimeError):
+    """The database has no full-text index (migration 7 not applied, or SQLite without FTS5)."""
+
+
+def query_terms(query):
+    """The words of a search query, lowercased, in order."""
+    return [term.lower() for term in _WORD.findall(query[:MAX_QUERY_LENGTH])][:MAX_TERMS]
+
+
+def _sqlite_statement(terms, fields):
+    fts = table('incidents_fts', column('rowid'))
+    # bm25() is lower for better matches; description counts double
+    bm25 = literal_column('bm25(incidents_fts, 2.0, 1.0)')
+    # Quoted, so words like AND/OR/NEAR aren't read as FTS5 operators
+    match = ' '.join(f'"{term}"' for term in terms)
+    return (
+        select(*columns(fields), (-bm25).label('rank'))
+        .select_from(fts.join(Incident.__table__, Incident.id == fts.c.rowid))
+        .where(text('incidents_fts MATCH :match').bindparams(match=match))
+        .order_by(bm25, Incident.timestamp.desc())
+    )
+
+
+def _postgres_statement(terms, fields):
+    # Terms are plain words, so they can't inject tsquery operators
+    tsquery = func.to_tsquery('english', ' & '.join(terms))
+    search_vector = literal_column(f"({SEARCH_VECTOR_SQL})")
+    rank = func.ts_rank_cd(search_vector, tsquery)
+    return (
+        select(*columns(fields), rank.label('rank'))
+        .where(search_vector.op('@@')(tsquery))
+        .order_by(rank.desc(), Incident.timestamp.desc())
+    )
+
+
+def search_incidents(query, filters, fields, limit=DEFAULT_LIMIT, offset=0):
+    """
+    Runs a ranked full-text search.
+
+    Args:
+        query (str): The user's search text
+        filters (dict): Parsed filters from incident_export.parse_filters()
+        fields (tuple): Incident fields to return (see utils/incident_fields.py)
+        limit (int), offset (int): Page of results
+
+    Returns:
+        (list of result dicts with the fields plus 'rank', has_more)
+    """
+    terms = query_terms(query)
+    if not terms:
+        raise SearchQueryError("q must contain at least one word")
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        statement = _sqlite_statement(terms, fields)
+    elif dialect == 'postgresql':
+        statement = _postgres_statement(terms, fields)
+    else:
+        raise SearchUnavailableError(f"Full-text search is not supported on {dialect}")
+
+    statement = apply_filters(statement, filters).limit(limit + 1).offset(offset)
+    try:
+        rows = db.session.execute(statement).all()
+    except (OperationalError, ProgrammingError) as e:
+        if 'incidents_fts' in str(e):
+            db.session.rollback()
+            raise SearchUnavailableError("The full-text index is missing; run `flask db upgrade`")
+        raise
+
+    return records(tuple(fields) + ('rank',), rows[:limit]), len(rows) > limit
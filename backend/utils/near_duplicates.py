@@ -0,0 +1,348 @@
+# backend/utils/near_duplicates.py
+
+"""
+Near-duplicate detection for new incident reports.
+
+Two people rarely describe the same incident with the same words ("fire on
+5th and Main" vs "5th St & Main burning"), so create_incident also looks for
+a recent active incident that is *similar* rather than equal:
+
+- Descriptions are normalized (lowercased, stop words and street suffixes
+  dropped, light stemming) and turned into character-trigram shingles.
+  Similarity is the Jaccard overlap of two shingle sets.
+- Each worker keeps an in-memory index of the active incidents from the last
+  NEAR_DUPLICATE_WINDOW_HOURS: MinHash signatures (one-permutation hashing)
+  bucketed by LSH bands (finds textually similar reports anywhere) and a
+  lat/lng grid (finds everything nearby). A lookup only compares the new
+  report with the few candidates from those buckets, never the whole table.
+- A candidate is a duplicate if it shares a department and either lies within
+  NEAR_DUPLICATE_RADIUS_M with similarity >= NEAR_DUPLICATE_MIN_SIMILARITY,
+  or (when either side has no coordinates) has similarity >=
+  NEAR_DUPLICATE_TEXT_SIMILARITY and the same normalized location text.
+  Without coordinates, a similar description at a different or unknown
+  location ("pothole" on 12 vs 14 Main St) is only a possible duplicate:
+  the report is accepted and the match returned as a warning, so reports
+  are not blocked city-wide while geocoding is down.
+
+The index follows the 'incidents' change counter: when it moves, rows
+stamped since the previous sync (minus SYNC_OVERLAP_SECONDS, for rows another
+worker had flushed but not yet committed) are loaded, and the whole window is
+reloaded every FULL_RELOAD_SECONDS to pick up edits and bulk imports. Matches are re-checked against the
+database before they are reported, so resolved or deleted incidents are
+never returned.
+"""
+
+import math
+import re
+import threading
+import time
+import zlib
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from config import (
+    NEAR_DUPLICATE_WINDOW_HOURS, NEAR_DUPLICATE_RADIUS_M,
+    NEAR_DUPLICATE_MIN_SIMILARITY, NEAR_DUPLICATE_TEXT_SIMILARITY,
+)
+from database import db
+from models import Incident
+from utils import change_counters
+from utils.http_caching import INCIDENTS
+
+ACTIVE_STATUSES = ('reported', 'in_progress')
+
+# MinHash signature length = LSH_BANDS * LSH_ROWS. With 16 bands of 3 rows a
+# pair with similarity 0.6 shares a bucket 98% of the time, one with 0.1 under 2%.
+# (Nearby pairs are found through the grid whatever their similarity.)
+LSH_BANDS = 16
+LSH_ROWS = 3
+SIGNATURE_SIZE = LSH_BANDS * LSH_ROWS
+
+FULL_RELOAD_SECONDS = 300
+# Incident.timestamp is set when the row is flushed, which can be a while
+# before another worker's transaction commits; incremental syncs re-read this
+# much of the past so such rows are not missed (unchanged rows are skipped).
+SYNC_OVERLAP_SECONDS = 60
+EARTH_RADIUS_M = 6371000
+METERS_PER_DEGREE = 111320
+
+# Odd multiplier that scrambles CRC-32 values (a bijection on 32 bits)
+_MIX = 0x9E3779B1
+
+_WORD = re.compile(r'[a-z0-9]+')
+STOP_WORDS = frozenset((
+    'a', 'an', 'the', 'and', 'or', 'on', 'at', 'in', 'of', 'to', 'by', 'near', 'next', 'is', 'are',
+    'was', 'there', 'some', 'someone', 'it', 'its', 'this', 'that', 'with', 'for', 'from', 'i', 'my',
+    'st', 'street', 'ave', 'avenue', 'rd', 'road', 'blvd', 'boulevard', 'dr', 'drive', 'ln', 'lane',
+))
+
+
+def normalize_tokens(text):
+    """Lowercased words without stop words or street suffixes, lightly stemmed."""
+    tokens = []
+    for word in _WORD.findall((text or '').lower()):
+        if word in STOP_WORDS:
+            continue
+        for suffix in ('ing', 'ed', 'es', 's'):
+            if len(word) > len(suffix) + 2 and word.endswith(suffix):
+                word = word[:-len(suffix)]
+                break
+        tokens.append(word)
+    return tokens
+
+
+def location_key(location):
+    """Normalized words of a location, order-insensitive ("Main St and 5th" == "5th Ave & Main")."""
+    return frozenset(normalize_tokens(location))
+
+
+def shingles(text):
+    """Character trigrams of each normalized word (with word boundaries marked)."""
+    result = set()
+    for token in normalize_tokens(text):
+        padded = f"#{token}#"
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(result)
+
+
+def minhash(shingle_set):
+    """
+    MinHash signature (SIGNATURE_SIZE ints) of a shingle set, by one-permutation
+    hashing: each shingle is hashed once into one of SIGNATURE_SIZE bins and
+    each bin keeps its minimum, so the cost is one hash per shingle rather
+    than one per shingle and permutation. Empty bins borrow the next filled
+    bin's value (rotation densification), offset by the distance so borrowed
+    values only match other borrowed values.
+    """
+    if not shingle_set:
+        return None
+    bins = [None] * SIGNATURE_SIZE
+    for shingle in shingle_set:
+        value = (_MIX * zlib.crc32(shingle.encode('utf-8'))) & 0xFFFFFFFF
+        index, value = value % SIGNATURE_SIZE, value // SIGNATURE_SIZE
+        if bins[index] is None or value < bins[index]:
+            bins[index] = value
+    signature = list(bins)
+    for index in range(SIGNATURE_SIZE):
+        if bins[index] is None:
+            source, distance = index, 0
+            while bins[source] is None:
+                source, distance = (source + 1) % SIGNATURE_SIZE, distance + 1
+            signature[index] = bins[source] + (distance << 32)
+    return signature
+
+
+def band_keys(signature):
+    return [(band, tuple(signature[band * LSH_ROWS:(band + 1) * LSH_ROWS])) for band in range(LSH_BANDS)]
+
+
+def jaccard(first, second):
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def distance_m(lat1, lng1, lat2, lng2):
+    """Great-circle distance in meters."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def _departments(classification):
+    return {dept.strip().upper() for dept in (classification or '').split(',') if dept.strip()}
+
+
+# One indexed incident. row is (id, description, location, latitude, longitude,
+# department_classification, timestamp)
+IndexEntry = namedtuple('IndexEntry', 'row shingles band_keys departments cell')
+TIMESTAMP = 6
+
+# A duplicate rule match from NearDuplicateIndex.candidates
+Candidate = namedtuple('Candidate', 'similarity distance_m incident_id blocking')
+
+# The result of find_near_duplicate
+NearDuplicate = namedtuple('NearDuplicate', 'incident similarity distance_m blocking')
+
+
+class NearDuplicateIndex:
+    """Per-worker index of recent active incidents (MinHash LSH buckets + lat/lng grid)."""
+
+    def __init__(self, window_hours=NEAR_DUPLICATE_WINDOW_HOURS, radius_m=NEAR_DUPLICATE_RADIUS_M,
+                 min_similarity=NEAR_DUPLICATE_MIN_SIMILARITY, text_similarity=NEAR_DUPLICATE_TEXT_SIMILARITY):
+        self.window = timedelta(hours=window_hours)
+        self.radius_m = radius_m
+        self.min_similarity = min_similarity
+        self.text_similarity = text_similarity
+        # Grid cells are one radius tall, so everything within the radius is in the 3 rows around a point
+        self.cell_degrees = radius_m / METERS_PER_DEGREE
+        self._lock = threading.Lock()
+        self._entries = {}  # id -> IndexEntry
+        self._bands = {}    # (band, values) -> set of ids
+        self._cells = {}    # (row, column) -> set of ids
+        self._watermark = None
+        self._version = None
+        self._loaded_at = None
+
+    def _cell(self, lat, lng):
+        return (math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees))
+
+    def _nearby_cells(self, lat, lng):
+        row, col = self._cell(lat, lng)
+        # Away from the equator a cell is narrower than it is tall, so look further east and west
+        span = math.ceil(1 / max(math.cos(math.radians(lat)), 0.01))
+        return [(row + dr, col + dc) for dr in (-1, 0, 1) for dc in range(-span, span + 1)]
+
+    def _add(self, row):
+        """Indexes a row, replacing an older version of it; unchanged rows are skipped."""
+        incident_id, description, _, lat, lng, classification, _ = row
+        entry = self._entries.get(incident_id)
+        if entry is not None:
+            if entry.row == row:
+                return
+            self._remove(incident_id)
+        shingle_set = shingles(description)
+        signature = minhash(shingle_set)
+        keys = band_keys(signature) if signature else []
+        cell = self._cell(lat, lng) if lat is not None and lng is not None else None
+        self._entries[incident_id] = IndexEntry(row, shingle_set, keys, _departments(classification), cell)
+        for key in keys:
+            self._bands.setdefault(key, set()).add(incident_id)
+        if cell is not None:
+            self._cells.setdefault(cell, set()).add(incident_id)
+
+    def _remove(self, incident_id):
+        entry = self._entries.pop(incident_id, None)
+        if entry is None:
+            return
+        buckets = [(self._bands, key) for key in entry.band_keys]
+        if entry.cell is not None:
+            buckets.append((self._cells, entry.cell))
+        for index, key in buckets:
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.discard(incident_id)
+                if not bucket:
+                    del index[key]
+
+    def sync(self):
+        """Brings the index up to date with the database (cheap when nothing changed)."""
+        version, _ = change_counters.get_version(INCIDENTS)
+        now = time.monotonic()
+        with self._lock:
+            full_reload = self._loaded_at is None or now - self._loaded_at >= FULL_RELOAD_SECONDS
+            if version == self._version and not full_reload:
+                return
+            started = datetime.utcnow()
+            cutoff = started - self.window
+            query = db.session.query(
+                Incident.id, Incident.description, Incident.location, Incident.latitude, Incident.longitude,
+                Incident.department_classification, Incident.timestamp,
+            ).filter(Incident.timestamp >= cutoff, Incident.status.in_(ACTIVE_STATUSES))
+            if not full_reload:
+                since = self._watermark - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+                query = query.filter(Incident.timestamp >= since)
+            rows = [tuple(row) for row in query.all()]
+
+            if full_reload:
+                # Drop what left the window or was resolved/deleted; only new or edited rows are re-hashed
+                live = {row[0] for row in rows}
+                for incident_id in [i for i in self._entries if i not in live]:
+                    self._remove(incident_id)
+                self._loaded_at = now
+            else:
+                for incident_id in [i for i, entry in self._entries.items() if entry.row[TIMESTAMP] < cutoff]:
+                    self._remove(incident_id)
+            for row in rows:
+                self._add(row)
+            self._version = version
+            self._watermark = started
+
+    def add(self, incident):
+        """Indexes an incident this worker just created."""
+        with self._lock:
+            self._add((incident.id, incident.description, incident.location, incident.latitude,
+                       incident.longitude, incident.department_classification, incident.timestamp))
+
+    def candidates(self, description, location, latitude, longitude, department_classification):
+        """
+        Returns a Candidate for each indexed incident that passes the
+        duplicate rules, best first.
+        blocking is False for a text-only match at a different or unknown
+        location, which is a possible duplicate rather than a certain one.
+        """
+        shingle_set = shingles(description)
+        place = location_key(location)
+        signature = minhash(shingle_set)
+        departments = _departments(department_classification)
+        has_coordinates = latitude is not None and longitude is not None
+
+        with self._lock:
+            ids = set()
+            if signature:
+                for key in band_keys(signature):
+                    ids.update(self._bands.get(key, ()))
+            if has_coordinates:
+                for cell in self._nearby_cells(latitude, longitude):
+                    ids.update(self._cells.get(cell, ()))
+            entries = [self._entries[incident_id] for incident_id in ids]
+
+        matches = []
+        for entry in entries:
+            if not departments & entry.departments:
+                continue
+            similarity = jaccard(shingle_set, entry.shingles)
+            incident_id, _, other_location, lat, lng, _, _ = entry.row
+            if has_coordinates and lat is not None and lng is not None:
+                distance = distance_m(latitude, longitude, lat, lng)
+                if distance <= self.radius_m and similarity >= self.min_similarity:
+                    matches.append(Candidate(similarity, distance, incident_id, True))
+            elif similarity >= self.text_similarity:
+                same_place = bool(place) and place == location_key(other_location)
+                matches.append(Candidate(similarity, None, incident_id, same_place))
+        # Blocking matches first, then the most similar and closest
+        matches.sort(key=lambda match: (not match.blocking, -match.similarity, match.distance_m or 0))
+        return matches
+
+    def forget(self, incident_ids):
+        with self._lock:
+            for incident_id in incident_ids:
+                self._remove(incident_id)
+
+
+near_duplicate_index = NearDuplicateIndex()
+
+
+def find_near_duplicate(description, location, latitude, longitude, department_classification):
+    """
+    Looks for a likely duplicate of a new report among recent active incidents.
+
+    Returns:
+        A NearDuplicate (incident, similarity, distance_m or None, blocking),
+        or None.
+        When blocking is False the report should be accepted, with the match
+        passed on as a warning.
+    """
+    near_duplicate_index.sync()
+    started = time.perf_counter()
+    matches = near_duplicate_index.candidates(description, location, latitude, longitude,
+                                              department_classification)
+    lookup_ms = (time.perf_counter() - started) * 1000
+    if not matches:
+        return None
+
+    # Confirm against the database: the incident may since have been resolved or deleted
+    ids = [match.incident_id for match in matches]
+    current = {incident.id: incident for incident in Incident.query.filter(
+        Incident.id.in_(ids), Incident.status.in_(ACTIVE_STATUSES)
+    ).all()}
+    near_duplicate_index.forget([incident_id for incident_id in ids if incident_id not in current])
+    for similarity, distance, incident_id, blocking in matches:
+        if incident_id in current:
+            print(f"{'Near-duplicate' if blocking else 'Possible duplicate'} of incident {incident_id} "
+                  f"(similarity {similarity:.2f}, distance {'unknown' if distance is None else f'{distance:.0f}m'}, "
+                  f"lookup {lookup_ms:.2f}ms)")
+            return NearDuplicate(current[incident_id], similarity, distance, blocking)
+    return None
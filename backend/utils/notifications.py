@@ -0,0 +1,80 @@
+# backend/utils/notifications.py
+
+"""
+Subscriber email fan-out for bulk operations.
+
+The single-incident routes send their emails inline; bulk operations
+(utils/bulk_import.py, the bulk status endpoint) load the active
+subscriptions once and go through these helpers instead.
+"""
+
+from models import UserSubscription
+from utils.email_service import (
+    send_incident_alert_email, send_status_update_email, send_status_digest_email, email_delivery_available,
+)
+
+
+def subscription_matches(subscription, department_classification):
+    """True if a subscription's department filter (if any) covers one of the incident's departments."""
+    if not subscription.department_filter:
+        return True
+    wanted = [dept.strip().upper() for dept in subscription.department_filter.split(',')]
+    return any(dept.strip().upper() in wanted for dept in department_classification.split(','))
+
+
+def send_new_incident_alerts(incident_dicts):
+    """
+    Sends the usual new-incident alert for each incident to every matching
+    active subscriber. Stops early while the SMTP circuit breaker is open.
+
+    Returns:
+        dict: {'sent': int, 'failed': int}
+    """
+    subscriptions = UserSubscription.query.filter_by(is_active=True).all()
+    sent = failed = 0
+    for incident in incident_dicts:
+        for subscription in subscriptions:
+            if not subscription_matches(subscription, incident['department_classification']):
+                continue
+            if not email_delivery_available():
+                print("⚠️ SMTP circuit open - skipping the remaining import alert emails")
+                return {"sent": sent, "failed": failed}
+            if send_incident_alert_email(subscription.email, incident):
+                sent += 1
+            else:
+                failed += 1
+    return {"sent": sent, "failed": failed}
+
+
+def send_status_update_digests(changes):
+    """
+    Notifies subscribers about a batch of status changes with one email each:
+    the usual status update email if only one change concerns them, a digest
+    of all of them otherwise.
+
+    Args:
+        changes (list): Dicts with 'incident' (incident data), 'old_status' and 'new_status'
+
+    Returns:
+        dict: {'sent': int, 'failed': int, 'skipped': int}
+    """
+    subscriptions = UserSubscription.query.filter_by(is_active=True).all()
+    sent = failed = 0
+    for index, subscription in enumerate(subscriptions):
+        relevant = [change for change in changes
+                    if subscription_matches(subscription, change['incident']['department_classification'])]
+        if not relevant:
+            continue
+        if not email_delivery_available():
+            print(f"⚠️ SMTP circuit open - skipping the remaining {len(subscriptions) - index} status digests")
+            return {"sent": sent, "failed": failed, "skipped": len(subscriptions) - index}
+        if len(relevant) == 1:
+            change = relevant[0]
+            ok = send_status_update_email(subscription.email, change['incident'], change['old_status'], change['new_status'])
+        else:
+            ok = send_status_digest_email(subscription.email, relevant)
+        if ok:
+            sent += 1
+        else:
+            failed += 1
+    return {"sent": sent, "failed": failed, "skipped": 0}
@@ -0,0 +1,112 @@
+# backend/utils/pre_classifier.py
+
+"""
+Local keyword classifier for incident reports.
+
+Scores a report against the "keywords" of each department in
+utils/department_registry.py: one point per matched word, two per matched
+multi-word phrase. Words inside a matched phrase don't also count on their
+own, so "fire hydrant" (utilities) isn't outvoted by "fire". All lookups are dict hits on the report's words, so a
+typical chat message is classified in well under a millisecond with no
+network round trip.
+
+It is used to pre-tag chat turns, to keep the chat flow going when Gemini is
+unavailable (see routes/chat.py), and to classify clear-cut incidents
+submitted without a department_classification.
+"""
+
+import re
+
+from utils.department_registry import DEPARTMENTS, DEFAULT_DEPARTMENT
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+PHRASE_WEIGHT = 2
+WORD_WEIGHT = 1
+# A result is "clear" when the winner has at least this score and at least
+# CLEAR_MARGIN times the runner-up's score (so any uncontested match counts)
+CLEAR_MIN_SCORE = 1
+CLEAR_MARGIN = 2.0
+
+
+def _words(text):
+    return _WORD_RE.findall((text or '').lower())
+
+
+def _singular(word):
+    # Lets "potholes" match "pothole" without a stemmer; leaves "gas", "grass" alone
+    if len(word) > 4 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+class PreClassifier:
+    """Keyword/phrase scorer compiled once from the department registry."""
+
+    def __init__(self, departments=DEPARTMENTS):
+        self._words = {}    # word -> [department names]
+        self._phrases = {}  # first word -> [(word tuple, department name)]
+        self._order = {}    # department name -> registry position (tie-breaker)
+        for position, dept in enumerate(departments):
+            self._order[dept['name']] = position
+            for keyword in dept.get('keywords', []):
+                words = tuple(_singular(word) for word in _words(keyword))
+                if len(words) == 1:
+                    self._words.setdefault(words[0], []).append(dept['name'])
+                elif words:
+                    self._phrases.setdefault(words[0], []).append((words, dept['name']))
+        # Longest phrases first, so they claim their words before shorter ones
+        for phrases in self._phrases.values():
+            phrases.sort(key=lambda phrase: -len(phrase[0]))
+
+    def scores(self, text):
+        """Returns ({department: score}, {department: [matched keywords]})."""
+        words = [_singular(word) for word in _words(text)]
+        scores = {}
+        matches = {}
+        covered = set()  # positions of words that are part of a matched phrase
+        for index, word in enumerate(words):
+            if index in covered:
+                continue
+            for phrase, name in self._phrases.get(word, ()):
+                if tuple(words[index:index + len(phrase)]) == phrase:
+                    scores[name] = scores.get(name, 0) + PHRASE_WEIGHT
+                    matches.setdefault(name, []).append(' '.join(phrase))
+                    covered.update(range(index, index + len(phrase)))
+                    break
+        for index, word in enumerate(words):
+            if index in covered:
+                continue
+            for name in self._words.get(word, ()):
+                scores[name] = scores.get(name, 0) + WORD_WEIGHT
+                matches.setdefault(name, []).append(word)
+        return scores, matches
+
+    def classify(self, text):
+        """
+        Returns a dict:
+            department (str): best-scoring department, or DEFAULT_DEPARTMENT if nothing matched
+            confidence (float): the winner's share of all points (0.0 - 1.0)
+            clear (bool): True if the winner is unambiguous enough to act on without Gemini
+            matches (list): keywords that matched for the winner
+        """
+        scores, matches = self.scores(text)
+        if not scores:
+            return {"department": DEFAULT_DEPARTMENT, "confidence": 0.0, "clear": False, "matches": []}
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self._order[item[0]]))
+        department, top = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0
+        return {
+            "department": department,
+            "confidence": round(top / sum(scores.values()), 2),
+            "clear": top >= CLEAR_MIN_SCORE and top >= CLEAR_MARGIN * runner_up,
+            "matches": matches[department],
+        }
+
+
+pre_classifier = PreClassifier()
+
+
+def classify_text(text):
+    return pre_classifier.classify(text)
@@ -0,0 +1,246 @@
+# backend/utils/rate_limit.py
+
+"""
+Rate limiting and load shedding for the expensive public endpoints.
+
+Creating an incident (geocoding, duplicate checks, an email to every
+subscriber) and chatting (a Gemini call) need no login, so the rate_limited
+guard puts two limits in front of them:
+
+- a token bucket per client and endpoint group: each request takes a token,
+  tokens come back at a steady rate up to a burst size, and a client with an
+  empty bucket gets 429 with a Retry-After header. Clients are keyed by their
+  department session if they send one, otherwise by IP address.
+- a cap on how many rate-limited requests a worker runs at once
+  (MAX_CONCURRENT_EXPENSIVE_REQUESTS). Over the cap, requests are shed with
+  429 immediately, so a burst of slow calls can't take every worker thread
+  and starve the cheap read endpoints.
+
+Buckets live in a per-worker dict ('memory') or in the rate_limit_buckets
+table ('database'), selected with RATE_LIMIT_BACKEND.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import jsonify, request
+from sqlalchemy import case, select
+from sqlalchemy.exc import IntegrityError
+
+from config import (
+    RATE_LIMIT_ENABLED, RATE_LIMIT_BACKEND, RATE_LIMIT_TRUSTED_PROXIES,
+    MAX_CONCURRENT_EXPENSIVE_REQUESTS,
+)
+from database import db
+from models import RateLimitBucket
+from utils.auth import _bearer_token, verify_department_token
+
+# Most buckets the memory backend keeps per worker (least recently used are dropped;
+# a dropped bucket was idle long enough to be full again anyway)
+MAX_MEMORY_BUCKETS = 10000
+
+# The database backend deletes buckets idle for this long, once every PURGE_EVERY takes
+BUCKET_IDLE_SECONDS = 3600
+PURGE_EVERY = 500
+
+
+def _refill(tokens, updated_at, now, rate, burst):
+    """Tokens in a bucket after refilling at `rate` per second since updated_at."""
+    return min(float(burst), tokens + max(0.0, now - updated_at) * rate)
+
+
+def _take(tokens, rate):
+    """Returns (tokens left, seconds until the next token) after trying to take one."""
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+class MemoryRateLimitStore:
+    """Per-process token buckets."""
+
+    def __init__(self, max_buckets=MAX_MEMORY_BUCKETS):
+        self.max_buckets = max_buckets
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+
+    def take(self, key, rate, burst):
+        """Takes a token from the bucket; returns 0 if allowed, else seconds to wait."""
+        now = time.time()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (float(burst), now))
+            tokens, retry_after = _take(_refill(tokens, updated_at, now, rate, burst), rate)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+
+class DatabaseRateLimitStore:
+    """
+    Token buckets in the rate_limit_buckets table (shared by all workers).
+
+    A token is refilled and spent by one conditional UPDATE, so two workers
+    can never spend the same token: the database applies the UPDATEs one
+    after the other and the second one no longer matches an empty bucket.
+    It runs in its own short transaction, never touching the request's
+    session.
+    """
+
+    def __init__(self):
+        self._takes = 0
+
+    def take(self, key, rate, burst):
+        now = time.time()
+        table = RateLimitBucket.__table__
+        # _refill() in SQL, computed from the row as it is when the UPDATE applies
+        elapsed = case((table.c.updated_at < now, now - table.c.updated_at), else_=0.0)
+        refilled = case((table.c.tokens + elapsed * rate < burst, table.c.tokens + elapsed * rate),
+                        else_=float(burst))
+
+        self._takes += 1
+        for attempt in range(2):
+            try:
+                with db.engine.begin() as connection:
+                    if self._takes % PURGE_EVERY == 0:
+                        connection.execute(table.delete().where(table.c.updated_at < now - BUCKET_IDLE_SECONDS))
+                    spent = connection.execute(
+                        table.update()
+                        .where(table.c.key == key, refilled >= 1)
+                        .values(tokens=refilled - 1, updated_at=now)
+                    )
+                    if spent.rowcount:
+                        return 0.0
+                    row = connection.execute(
+                        select(table.c.tokens, table.c.updated_at).where(table.c.key == key)
+                    ).first()
+                    if row is None:
+                        connection.execute(table.insert().values(key=key, tokens=float(burst) - 1, updated_at=now))
+                        return 0.0
+                    return _take(_refill(row.tokens, row.updated_at, now, rate, burst), rate)[1]
+            except IntegrityError:
+                # Another worker created this client's bucket first; spend from that one
+                if attempt:
+                    raise
+
+
+def create_store(backend=RATE_LIMIT_BACKEND):
+    if backend == 'database':
+        return DatabaseRateLimitStore()
+    if backend != 'memory':
+        print(f"WARNING: Unknown RATE_LIMIT_BACKEND '{backend}', using in-memory rate limits")
+    return MemoryRateLimitStore()
+
+
+rate_limit_store = create_store()
+
+
+class ConcurrencyLimiter:
+    """Non-blocking cap on in-flight requests in this worker."""
+
+    def __init__(self, limit=MAX_CONCURRENT_EXPENSIVE_REQUESTS):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.shed = 0
+
+    def try_acquire(self):
+        with self._lock:
+            if self.limit and self.in_flight >= self.limit:
+                self.shed += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+expensive_requests = ConcurrencyLimiter()
+
+
+def client_ip():
+    """
+    The caller's IP address. Behind RATE_LIMIT_TRUSTED_PROXIES reverse proxies
+    it is read from X-Forwarded-For, counting from the right so clients can't
+    pick their own address by sending the header themselves.
+    """
+    if RATE_LIMIT_TRUSTED_PROXIES:
+        forwarded = [ip.strip() for ip in request.headers.get('X-Forwarded-For', '').split(',') if ip.strip()]
+        if len(forwarded) >= RATE_LIMIT_TRUSTED_PROXIES:
+            return forwarded[-RATE_LIMIT_TRUSTED_PROXIES]
+    return request.remote_addr or 'unknown'
+
+
+def client_key():
+    """Department session if the request carries a valid one, otherwise the client's IP."""
+    token = _bearer_token()
+    department = verify_department_token(token) if token else None
+    if department:
+        return f"department:{department['id']}"
+    return f"ip:{client_ip()}"
+
+
+def _too_many_requests(message, retry_after):
+    response = jsonify({"error": message, "retryAfter": retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+def rate_limited(name, per_minute, burst):
+    """
+    Route decorator applying a token bucket (shared by every route using the
+    same `name`) and the per-worker concurrency cap. Streamed responses hold
+    their concurrency slot until the stream is closed.
+    """
+    rate = per_minute / 60.0
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not RATE_LIMIT_ENABLED:
+                return view(*args, **kwargs)
+
+            key = client_key()
+            retry_after = rate_limit_store.take(f"{name}:{key}", rate, burst)
+            if retry_after:
+                print(f"Rate limit hit for {name} by {key}")
+                return _too_many_requests("Too many requests, please slow down and try again shortly",
+                                          max(1, math.ceil(retry_after)))
+
+            if not expensive_requests.try_acquire():
+                print(f"Shedding {name} request: {expensive_requests.limit} already in progress")
+                return _too_many_requests("The server is busy, please try again in a moment", 1)
+
+            try:
+                response = view(*args, **kwargs)
+            except Exception:
+                expensive_requests.release()
+                raise
+
+            # The body of a streamed response runs after the view returns
+            if getattr(response, 'is_streamed', False):
+                response.call_on_close(expensive_requests.release)
+            else:
+                expensive_requests.release()
+            return response
+        return wrapper
+    return decorator
+
+
+def rate_limit_stats():
+    return {
+        "enabled": RATE_LIMIT_ENABLED,
+        "backend": RATE_LIMIT_BACKEND,
+        "expensive_requests": {
+            "limit": expensive_requests.limit,
+            "in_flight": expensive_requests.in_flight,
+            "shed": expensive_requests.shed,
+        },
+    }
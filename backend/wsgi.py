@@ -0,0 +1,10 @@
+# backend/wsgi.py
+
+# WSGI entry point for production servers, e.g.:
+#   gunicorn -c gunicorn.conf.py
+# The schema and seed data are initialized once by the gunicorn master
+# (see gunicorn.conf.py), not here, so importing this module never touches
+# the database.
+from app import create_app
+
+app = create_app()
@@ -52,6 +52,8 @@ document.addEventListener('DOMContentLoaded', () => {
                 // Store department name in UPPERCASE to match the format in incident classifications
                 sessionStorage.setItem('departmentName', departmentData.name.toUpperCase());
                 sessionStorage.setItem('displayName', departmentData.name); // Store display name separately
+                // Session token sent with every dashboard request instead of the login key
+                sessionStorage.setItem('sessionToken', departmentData.token);
                 
                 // Redirect to the department dashboard
                 window.location.href = `dashboard.html?department=${encodeURIComponent(departmentData.name)}`;
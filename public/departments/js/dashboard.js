@@ -49,6 +49,30 @@ document.addEventListener('DOMContentLoaded', () => {
         return; // Stop script execution to prevent further errors
     }
 
+    /**
+     * Builds request headers including the department session token issued at login.
+     * @param {object} extraHeaders Additional headers to include.
+     * @returns {object} The headers object for fetch().
+     */
+    function authHeaders(extraHeaders = {}) {
+        const headers = { ...extraHeaders };
+        const sessionToken = sessionStorage.getItem('sessionToken');
+        if (sessionToken) {
+            headers['Authorization'] = `Bearer ${sessionToken}`;
+        }
+        return headers;
+    }
+
+    /**
+     * Clears the stored session and sends the user back to the login page.
+     */
+    function endSession() {
+        sessionStorage.removeItem('departmentName'); // Clear stored department name
+        sessionStorage.removeItem('displayName'); // Clear any other stored user data
+        sessionStorage.removeItem('sessionToken'); // Clear the session token
+        window.location.href = 'login.html'; // Redirect to login page
+    }
+
     // Display the retrieved department name on the dashboard
     departmentNameDisplay.textContent = `${departmentName} Department`;
 
@@ -119,7 +143,13 @@ document.addEventListener('DOMContentLoaded', () => {
         try {
             // Construct the API URL for fetching department-specific incidents
             const url = `${API_BASE_URL}/departments/${departmentName}/incidents${status ? `?status=${status}` : ''}`;
-            const response = await fetch(url);
+            const response = await fetch(url, { headers: authHeaders() });
+
+            // The session token expired or is no longer valid - log in again
+            if (response.status === 401) {
+                endSession();
+                return;
+            }
 
             if (response.ok) {
                 const incidents = await response.json();
@@ -264,8 +294,7 @@ document.addEventListener('DOMContentLoaded', () => {
     function confirmDeleteIncident(incidentId) {
         modalContent.innerHTML = `
             <p class="text-lg font-semibold mb-4">Delete Incident</p>
-            <p class="text-sm text-gray-600 mb-4">Enter your department key to confirm deletion:</p>
-            <input type="password" id="departmentKeyInput" placeholder="Department Key" class="w-full p-2 border border-gray-300 rounded-lg mb-4 focus:outline-none focus:ring-2 focus:ring-blue-500">
+            <p class="text-sm text-gray-600 mb-4">Are you sure you want to delete this incident?</p>
             <p class="text-xs text-red-600 mb-4">This action cannot be undone.</p>
             <div class="flex justify-center space-x-4">
                 <button id="cancelDeleteBtn" class="bg-gray-300 hover:bg-gray-400 text-gray-800 font-bold py-2 px-4 rounded-lg">Cancel</button>
@@ -277,42 +306,30 @@ document.addEventListener('DOMContentLoaded', () => {
         // Add event listeners to the buttons
         document.getElementById('cancelDeleteBtn').onclick = () => modalOverlay.classList.add('hidden');
         document.getElementById('confirmDeleteBtn').onclick = () => {
-            const departmentKey = document.getElementById('departmentKeyInput').value.trim();
-            if (!departmentKey) {
-                showCustomAlert("Please enter your department key to confirm deletion.");
-                return;
-            }
-            deleteIncident(incidentId, departmentKey);
+            deleteIncident(incidentId);
             modalOverlay.classList.add('hidden');
         };
-
-        // Allow Enter key to confirm deletion
-        document.getElementById('departmentKeyInput').addEventListener('keypress', (e) => {
-            if (e.key === 'Enter') {
-                document.getElementById('confirmDeleteBtn').click();
-            }
-        });
     }
 
     /**
      * Deletes an incident via the backend API.
      * After a successful deletion, it refreshes the incident list.
+     * The department is authenticated by the session token from login.
      * @param {number} incidentId The ID of the incident to delete.
-     * @param {string} departmentKey The department key for authentication.
      */
-    async function deleteIncident(incidentId, departmentKey) {
+    async function deleteIncident(incidentId) {
         try {
             const response = await fetch(`${API_BASE_URL}/incidents/${incidentId}`, {
                 method: 'DELETE',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    department_key: departmentKey,
-                    department_name: departmentName
-                })
+                headers: authHeaders()
             });
 
+            if (response.status === 401) {
+                // Session token missing or expired: log in again
+                endSession();
+                return;
+            }
+
             const responseText = await response.text();
             
             // Try to parse as JSON, fallback to text if it fails
@@ -350,9 +367,9 @@ document.addEventListener('DOMContentLoaded', () => {
         try {
             const response = await fetch(`${API_BASE_URL}/incidents/${incidentId}`, {
                 method: 'PUT',
-                headers: {
+                headers: authHeaders({
                     'Content-Type': 'application/json',
-                },
+                }),
                 body: JSON.stringify({ status: newStatus })
             });
 
@@ -392,9 +409,7 @@ document.addEventListener('DOMContentLoaded', () => {
     // Event listener for the logout button.
     // Clears session storage and redirects to the login page.
     logoutBtn.addEventListener('click', () => {
-        sessionStorage.removeItem('departmentName'); // Clear stored department name
-        sessionStorage.removeItem('displayName'); // Clear any other stored user data
-        window.location.href = 'login.html'; // Redirect to login page
+        endSession();
     });
 
     // Initialize map when page loads - wait for DOM and scripts to be ready
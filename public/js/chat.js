@@ -14,7 +14,9 @@ document.addEventListener('DOMContentLoaded', () => {
     const placePicker = document.getElementById('placePicker');
 
     let chatHistory = []; // Stores the conversation history for sending to the LLM
-    let uploadedImageBase64 = null; // Stores the base64 string of the uploaded image
+    let chatSessionId = null; // Server-side chat session; the server keeps the history sent so far
+    let syncedMessageCount = 0; // How many chatHistory messages the server session already has
+    let uploadedImage = null; // Handle of the uploaded image: { imageId, url, previewUrl }
     let isLocationMode = false; // Flag to track if we're in location input mode
     let hasAnalyzedImage = false; // Flag to track if image has been analyzed
 
@@ -24,15 +26,18 @@ document.addEventListener('DOMContentLoaded', () => {
         description: '',
         location: '',
         department_classification: '',
-        image_url: null
+        image_id: null
     };
     let awaitingConfirmation = false; // Flag to indicate if the bot is awaiting user confirmation for submission
+    // Idempotency-Key of the report being submitted, reused when the same report is sent again
+    let submission = { key: null, body: null };
 
     /**
      * Adds a message bubble to the chat interface.
      * @param {string} message The text content of the message.
      * @param {string} sender 'user' or 'bot' to apply appropriate styling.
      * @param {string} [imageUrl=null] Optional URL for an image to display with the message.
+     * @returns {HTMLElement} The message bubble element.
      */
     function addMessage(message, sender, imageUrl = null) {
         const messageElement = document.createElement('div');
@@ -49,6 +54,7 @@ document.addEventListener('DOMContentLoaded', () => {
         chatMessages.appendChild(messageElement);
         // Scroll to the bottom of the chat messages to show the latest message
         chatMessages.scrollTop = chatMessages.scrollHeight;
+        return messageElement;
     }
 
     // Function to simulate bot typing indicator
@@ -70,6 +76,124 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    /**
+     * Clears the conversation and starts a new server-side chat session.
+     */
+    function resetChatSession() {
+        chatHistory = [];
+        chatSessionId = null;
+        syncedMessageCount = 0;
+    }
+
+    /**
+     * Sends the messages added since the last turn to the streaming Gemini
+     * proxy and renders the bot's reply into a new message bubble as it is
+     * generated, so the first words show up without waiting for the whole
+     * reply. On success the reply is appended to chatHistory.
+     * @returns {Promise<{ok: boolean, text?: string, error?: object}>}
+     *   ok with the full reply text, or the proxy's error object.
+     */
+    async function streamBotReply() {
+        let response = await postChatTurn();
+
+        // The session expired (or lives on another server): start a new one with the full history
+        if (response.status === 404 && chatSessionId) {
+            chatSessionId = null;
+            syncedMessageCount = 0;
+            response = await postChatTurn();
+        }
+
+        // Errors before the stream starts come back as a regular JSON body
+        if (!response.ok) {
+            return { ok: false, error: await response.json() };
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let replyText = '';
+        let bubble = null;
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) {
+                break;
+            }
+            buffer += decoder.decode(value, { stream: true });
+
+            // Server-sent events are separated by a blank line
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const rawEvent = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let eventType = 'message';
+                let eventData = '';
+                for (const line of rawEvent.split('\n')) {
+                    if (line.startsWith('event:')) {
+                        eventType = line.slice(6).trim();
+                    } else if (line.startsWith('data:')) {
+                        eventData += line.slice(5).trim();
+                    }
+                }
+                const payload = eventData ? JSON.parse(eventData) : {};
+
+                if (eventType === 'chunk') {
+                    if (!bubble) {
+                        hideTypingIndicator();
+                        bubble = addMessage('', 'bot');
+                    }
+                    replyText += payload.text;
+                    bubble.textContent = replyText;
+                    chatMessages.scrollTop = chatMessages.scrollHeight;
+                } else if (eventType === 'done') {
+                    replyText = payload.response;
+                    chatSessionId = payload.sessionId;
+                } else if (eventType === 'error') {
+                    if (bubble) {
+                        bubble.remove();
+                    }
+                    return { ok: false, error: payload };
+                }
+            }
+        }
+
+        if (!bubble) {
+            return { ok: false, error: { error: 'Empty response from chatbot' } };
+        }
+        bubble.textContent = replyText;
+        chatHistory.push({ role: "model", parts: [{ text: replyText }] });
+        syncedMessageCount = chatHistory.length;
+        return { ok: true, text: replyText };
+    }
+
+    /**
+     * POSTs only the messages the server session doesn't have yet.
+     */
+    function postChatTurn() {
+        return fetch(`${API_BASE_URL}/chat/gemini/stream`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                sessionId: chatSessionId,
+                messages: chatHistory.slice(syncedMessageCount)
+            })
+        });
+    }
+
+    /**
+     * Creates a random key for the Idempotency-Key header.
+     * @returns {string}
+     */
+    function newIdempotencyKey() {
+        if (window.crypto && crypto.randomUUID) {
+            return crypto.randomUUID();
+        }
+        return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}${Math.random().toString(36).slice(2)}`;
+    }
+
     /**
      * Submits the incident details to the backend API.
      * This function is called when the user confirms the incident report.
@@ -79,13 +203,21 @@ document.addEventListener('DOMContentLoaded', () => {
         addMessage("Submitting your report...", 'bot');
         showTypingIndicator();
 
+        // Retries and double submissions of the same report share one key, so the
+        // server returns the original result instead of filing the report twice
+        const body = JSON.stringify(incidentData);
+        if (submission.body !== body) {
+            submission = { key: newIdempotencyKey(), body };
+        }
+
         try {
             const response = await fetch(`${API_BASE_URL}/incidents`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
+                    'Idempotency-Key': submission.key,
                 },
-                body: JSON.stringify(incidentData)
+                body
             });
 
             const responseText = await response.text();
@@ -104,8 +236,8 @@ document.addEventListener('DOMContentLoaded', () => {
                 hideTypingIndicator();
                 addMessage("Thank you! Your report has been successfully submitted to the CityAlert system. Incident ID: " + result.id, 'bot');
                 // Reset chat for a new report after successful submission
-                chatHistory = [];
-                currentIncidentDetails = { description: '', location: '', department_classification: '', image_url: null };
+                resetChatSession();
+                currentIncidentDetails = { description: '', location: '', department_classification: '', image_id: null };
                 awaitingConfirmation = false;
             } else if (response.status === 409) {
                 // Handle duplicate incident detection
@@ -119,8 +251,8 @@ document.addEventListener('DOMContentLoaded', () => {
                 addDuplicateIncidentActions(result.existing_incident);
                 
                 // Reset chat state
-                chatHistory = [];
-                currentIncidentDetails = { description: '', location: '', department_classification: '', image_url: null };
+                resetChatSession();
+                currentIncidentDetails = { description: '', location: '', department_classification: '', image_id: null };
                 awaitingConfirmation = false;
             } else {
                 hideTypingIndicator();
@@ -179,7 +311,7 @@ document.addEventListener('DOMContentLoaded', () => {
         actionsElement.querySelector('.report-anyway-btn').addEventListener('click', () => {
             addMessage("I'd like to report a different incident.", 'user');
             addMessage("Of course! Please tell me about the new incident you'd like to report.", 'bot');
-            chatHistory = [];
+            resetChatSession();
             resetImageUpload();
         });
     }
@@ -295,21 +427,10 @@ document.addEventListener('DOMContentLoaded', () => {
         showTypingIndicator();
         
         try {
-            const response = await fetch(`${API_BASE_URL}/chat/gemini`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({ chatHistory: chatHistory })
-            });
-
-            if (response.ok) {
-                const data = await response.json();
-                hideTypingIndicator();
+            const reply = await streamBotReply();
 
-                const botResponse = data.response;
-                addMessage(botResponse, 'bot');
-                chatHistory.push({ role: "model", parts: [{ text: botResponse }] });
+            if (reply.ok) {
+                const botResponse = reply.text;
 
                 // Use the same improved pattern matching logic
                 const summaryRegex = /(?:Okay|Alright|So),?\s+(?:so\s+)?I\s+have\s+that\s+there\s+is\s+(?:an?\s+)?(.*?)\s+at\s+(.*?)\.\s+This\s+will\s+be\s+classified\s+under\s+([A-Z_,\s]+)\.\s+Is\s+this\s+information\s+correct\s+and\s+complete\?/i;
@@ -324,7 +445,7 @@ document.addEventListener('DOMContentLoaded', () => {
                     currentIncidentDetails.location = match[2].trim();
                     const deptClassification = match[3].trim().split(',')[0].trim().toUpperCase();
                     currentIncidentDetails.department_classification = deptClassification;
-                    currentIncidentDetails.image_url = uploadedImageBase64;
+                    currentIncidentDetails.image_id = uploadedImage ? uploadedImage.imageId : null;
                     awaitingConfirmation = true;
                     console.log("📋 Incident details parsed from location response:", currentIncidentDetails);
                 } else {
@@ -332,7 +453,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 }
 
             } else {
-                const errorData = await response.json();
+                const errorData = reply.error;
                 hideTypingIndicator();
                 console.error('Error from chatbot API:', errorData);
                 addMessage("I'm sorry, I encountered an error processing your request.", 'bot');
@@ -384,22 +505,17 @@ document.addEventListener('DOMContentLoaded', () => {
         }
 
         // Proceed with normal chat if not awaiting confirmation or if response was ambiguous
-        if (userMessage || uploadedImageBase64) {
-            addMessage(userMessage, 'user', uploadedImageBase64); // Display user's message in chat
+        if (userMessage || uploadedImage) {
+            addMessage(userMessage, 'user', uploadedImage && uploadedImage.previewUrl); // Display user's message in chat
 
             const userParts = [];
             if (userMessage) {
                 userParts.push({ text: userMessage });
             }
 
-            // If an image is uploaded, include its base64 data in the message parts for Gemini
-            if (uploadedImageBase64) {
-                userParts.push({
-                    inlineData: {
-                        mimeType: "image/png", // Assuming PNG, adjust if other types are supported
-                        data: uploadedImageBase64.split(',')[1] // Extract base64 data part
-                    }
-                });
+            // If an image is uploaded, reference it by its handle; the server already has the bytes
+            if (uploadedImage) {
+                userParts.push({ imageId: uploadedImage.imageId });
             }
 
             chatHistory.push({ role: "user", parts: userParts }); // Add user message to chat history
@@ -410,22 +526,11 @@ document.addEventListener('DOMContentLoaded', () => {
             showTypingIndicator(); // Show typing indicator while waiting for bot response
 
             try {
-                // Send chat history to the backend Gemini proxy
-                const response = await fetch(`${API_BASE_URL}/chat/gemini`, {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify({ chatHistory: chatHistory })
-                });
-
-                if (response.ok) {
-                    const data = await response.json();
-                    hideTypingIndicator();
+                // Send chat history to the backend Gemini proxy; the reply is displayed as it streams in
+                const reply = await streamBotReply();
 
-                    const botResponse = data.response;
-                    addMessage(botResponse, 'bot'); // Display bot's response
-                    chatHistory.push({ role: "model", parts: [{ text: botResponse }] }); // Add bot message to chat history
+                if (reply.ok) {
+                    const botResponse = reply.text; // Already added to chatHistory by streamBotReply
 
                     // Check if bot is asking for location and switch to location mode
                     if (isAskingForLocation(botResponse)) {
@@ -447,7 +552,7 @@ document.addEventListener('DOMContentLoaded', () => {
                         // Clean up department classification - take first department if multiple
                         const deptClassification = match[3].trim().split(',')[0].trim().toUpperCase();
                         currentIncidentDetails.department_classification = deptClassification;
-                        currentIncidentDetails.image_url = uploadedImageBase64;
+                        currentIncidentDetails.image_id = uploadedImage ? uploadedImage.imageId : null;
                         awaitingConfirmation = true;
                         console.log("📋 Incident details parsed:", currentIncidentDetails);
                     } else {
@@ -460,7 +565,7 @@ document.addEventListener('DOMContentLoaded', () => {
                             currentIncidentDetails.description = altMatch[1].trim();
                             currentIncidentDetails.location = altMatch[2].trim();
                             currentIncidentDetails.department_classification = altMatch[3].trim().toUpperCase();
-                            currentIncidentDetails.image_url = uploadedImageBase64;
+                            currentIncidentDetails.image_id = uploadedImage ? uploadedImage.imageId : null;
                             awaitingConfirmation = true;
                             console.log("📋 Incident details parsed (alt pattern):", currentIncidentDetails);
                         } else {
@@ -471,7 +576,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
                 } else {
                     // Handle errors from the Gemini proxy backend
-                    const errorData = await response.json();
+                    const errorData = reply.error;
                     hideTypingIndicator();
                     console.error('Error from chatbot API:', errorData);
                     
@@ -521,11 +626,30 @@ document.addEventListener('DOMContentLoaded', () => {
         imageUpload.click(); // Trigger the hidden file input click
     });
 
+    /**
+     * Uploads an image file once and returns its handle ({ imageId, url, ... }).
+     * Chat messages and the incident report then reference the imageId.
+     * @param {File} file - The selected image file
+     */
+    async function uploadImage(file) {
+        const formData = new FormData();
+        formData.append('image', file);
+        const response = await fetch(`${API_BASE_URL}/images`, {
+            method: 'POST',
+            body: formData
+        });
+        const result = await response.json();
+        if (!response.ok) {
+            throw new Error(result.error || 'Image upload failed');
+        }
+        return result;
+    }
+
     /**
      * Analyzes an uploaded image immediately using Gemini
-     * @param {string} imageBase64 - The base64 string of the uploaded image
+     * @param {object} image - The uploaded image handle ({ imageId, ... })
      */
-    async function analyzeImageImmediately(imageBase64) {
+    async function analyzeImageImmediately(image) {
         showTypingIndicator();
         
         // Create a special message for immediate image analysis
@@ -533,12 +657,7 @@ document.addEventListener('DOMContentLoaded', () => {
             role: "user",
             parts: [
                 { text: "Please analyze this image and tell me what type of incident or safety issue you can identify. Describe what you see and suggest what should be reported." },
-                {
-                    inlineData: {
-                        mimeType: "image/png",
-                        data: imageBase64.split(',')[1]
-                    }
-                }
+                { imageId: image.imageId }
             ]
         };
 
@@ -546,21 +665,10 @@ document.addEventListener('DOMContentLoaded', () => {
         chatHistory.push(analysisMessage);
 
         try {
-            const response = await fetch(`${API_BASE_URL}/chat/gemini`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({ chatHistory: chatHistory })
-            });
-
-            if (response.ok) {
-                const data = await response.json();
-                hideTypingIndicator();
+            const reply = await streamBotReply();
 
-                const botResponse = data.response;
-                addMessage(botResponse, 'bot');
-                chatHistory.push({ role: "model", parts: [{ text: botResponse }] });
+            if (reply.ok) {
+                const botResponse = reply.text;
                 
                 hasAnalyzedImage = true;
 
@@ -577,13 +685,13 @@ document.addEventListener('DOMContentLoaded', () => {
                     currentIncidentDetails.description = match[1].trim();
                     currentIncidentDetails.location = match[2].trim();
                     currentIncidentDetails.department_classification = match[3].trim().toUpperCase();
-                    currentIncidentDetails.image_url = uploadedImageBase64;
+                    currentIncidentDetails.image_id = uploadedImage ? uploadedImage.imageId : null;
                     awaitingConfirmation = true;
                     console.log("Awaiting confirmation for incident:", currentIncidentDetails);
                 }
 
             } else {
-                const errorData = await response.json();
+                const errorData = reply.error;
                 hideTypingIndicator();
                 console.error('Error from image analysis:', errorData);
                 addMessage("I'm sorry, I encountered an error analyzing the image. You can describe the incident instead.", 'bot');
@@ -599,25 +707,31 @@ document.addEventListener('DOMContentLoaded', () => {
     imageUpload.addEventListener('change', async (event) => {
         const file = event.target.files[0];
         if (file) {
-            const reader = new FileReader();
-            reader.onload = async (e) => {
-                uploadedImageBase64 = e.target.result; // Store base64 string of the image
-                uploadedImagePreview.src = uploadedImageBase64; // Display image preview
-                imagePreviewContainer.classList.remove('hidden'); // Show preview container
-                
-                // Display the image in chat
-                addMessage("I've uploaded an image for analysis.", 'user', uploadedImageBase64);
-                
-                // If this is the first interaction or no meaningful conversation has started,
-                // immediately analyze the image
-                if (chatHistory.length <= 2 || !hasAnalyzedImage) {
-                    await analyzeImageImmediately(uploadedImageBase64);
-                } else {
-                    // If conversation is ongoing, just show that image was uploaded
-                    addMessage("I can see your image. Please tell me what you'd like me to analyze or report about it.", 'bot');
-                }
-            };
-            reader.readAsDataURL(file); // Read file as base64 data URL
+            // Preview straight from the local file; only the upload sends the bytes
+            const previewUrl = URL.createObjectURL(file);
+            uploadedImagePreview.src = previewUrl; // Display image preview
+            imagePreviewContainer.classList.remove('hidden'); // Show preview container
+
+            // Display the image in chat
+            addMessage("I've uploaded an image for analysis.", 'user', previewUrl);
+
+            try {
+                uploadedImage = { ...(await uploadImage(file)), previewUrl: previewUrl };
+            } catch (error) {
+                console.error('Error uploading image:', error);
+                addMessage(`I couldn't upload that image: ${error.message}. You can describe the incident instead.`, 'bot');
+                resetImageUpload();
+                return;
+            }
+
+            // If this is the first interaction or no meaningful conversation has started,
+            // immediately analyze the image
+            if (chatHistory.length <= 2 || !hasAnalyzedImage) {
+                await analyzeImageImmediately(uploadedImage);
+            } else {
+                // If conversation is ongoing, just show that image was uploaded
+                addMessage("I can see your image. Please tell me what you'd like me to analyze or report about it.", 'bot');
+            }
         }
     });
 
@@ -628,7 +742,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
     // Function to reset image upload state (clear preview and data)
     function resetImageUpload() {
-        uploadedImageBase64 = null;
+        uploadedImage = null;
         imageUpload.value = ''; // Clear the file input to allow re-uploading the same file
         uploadedImagePreview.src = '#'; // Reset image source
         imagePreviewContainer.classList.add('hidden'); // Hide preview container
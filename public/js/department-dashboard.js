@@ -19,6 +19,15 @@ document.addEventListener('DOMContentLoaded', async () => {
         return departmentData;
     }
     
+    // Request headers carrying the session token returned by the login endpoint
+    function authHeaders(departmentData, extraHeaders = {}) {
+        const headers = { ...extraHeaders };
+        if (departmentData.token) {
+            headers['Authorization'] = `Bearer ${departmentData.token}`;
+        }
+        return headers;
+    }
+    
     // Logout function
     function logout() {
         localStorage.removeItem('departmentData');
@@ -34,7 +43,9 @@ document.addEventListener('DOMContentLoaded', async () => {
             loadingMessage.classList.remove('hidden');
             noIncidentsMessage.classList.add('hidden');
             
-            const response = await fetch(`${API_BASE_URL}/departments/${departmentData.name}/incidents`);
+            const response = await fetch(`${API_BASE_URL}/departments/${departmentData.name}/incidents`, {
+                headers: authHeaders(departmentData)
+            });
             
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
@@ -152,14 +163,10 @@ document.addEventListener('DOMContentLoaded', async () => {
             
             const response = await fetch(`${API_BASE_URL}/incidents/${incidentId}`, {
                 method: 'PUT',
-                headers: {
+                headers: authHeaders(departmentData, {
                     'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    status: newStatus,
-                    department_name: departmentData.name,
-                    department_key: departmentData.login_key
-                })
+                }),
+                body: JSON.stringify({ status: newStatus })
             });
             
             if (!response.ok) {